@@ -139,8 +139,8 @@ export default function DebateSessionPage() {
             updateStats([...argumentsList, res.arguments.student, res.arguments.ai_opponent]);
 
             setArgText('');
-            if (res.ai_response_audio) {
-                const audio = new Audio(`data:audio/wav;base64,${res.ai_response_audio}`);
+            if (res.ai_response_audio_url) {
+                const audio = new Audio(res.ai_response_audio_url);
                 audio.play().catch(() => { });
             }
         } catch (err) {
@@ -15,6 +15,8 @@ const RealtimeDebateConnection = forwardRef(({
     const analyserRef = useRef(null);
     const audioChunksRef = useRef([]);
     const audioLevelIntervalRef = useRef(null);
+    const lastSeqRef = useRef(null);
+    const resumePendingRef = useRef(false);
 
     useImperativeHandle(ref, () => ({
         startRecording: () => startRecording(),
@@ -41,7 +43,14 @@ const RealtimeDebateConnection = forwardRef(({
             // Determine WebSocket URL
             const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
             const host = window.location.hostname; // Get hostname without port
-            const wsUrl = `${protocol}//${host}:8000/ws/debate/${roomId}/`; // Use port 8000
+            let wsUrl = `${protocol}//${host}:8000/ws/debate/${roomId}/`; // Use port 8000
+
+            // On reconnect, ask the server to replay the events we missed
+            if (lastSeqRef.current !== null) {
+                wsUrl += `?last_seq=${lastSeqRef.current}`;
+            }
+            // Cleared by replay_complete; until then live events past the gap wait for the replay
+            resumePendingRef.current = lastSeqRef.current !== null;
 
             console.log('Connecting to WebSocket:', wsUrl); // Debug log
             // Create WebSocket connection
@@ -95,9 +104,41 @@ const RealtimeDebateConnection = forwardRef(({
     const handleWebSocketMessage = (data) => {
         console.log('WebSocket message:', data.type, data);
 
+        // Room events carry a sequence number; skip any we already handled
+        if (data.seq !== undefined && data.seq !== null) {
+            if (lastSeqRef.current !== null) {
+                if (data.seq <= lastSeqRef.current) {
+                    return;
+                }
+                if (data.seq > lastSeqRef.current + 1) {
+                    // An earlier event hasn't arrived yet; replay the gap in order from the server log
+                    if (!resumePendingRef.current) {
+                        resumePendingRef.current = true;
+                        sendMessage({ type: 'resume', last_seq: lastSeqRef.current });
+                    }
+                    return;
+                }
+            }
+            lastSeqRef.current = data.seq;
+        }
+
         switch (data.type) {
             case 'connection_established':
                 console.log('Connection established:', data);
+                if (lastSeqRef.current === null) {
+                    lastSeqRef.current = data.last_seq ?? 0;
+                }
+                break;
+
+            case 'replay_start':
+                // Part of the gap was trimmed from the server log: accept the jump and resync state
+                lastSeqRef.current = Math.max(lastSeqRef.current ?? 0, data.resume_from - 1);
+                sendMessage({ type: 'get_room_status' });
+                break;
+
+            case 'replay_complete':
+                console.log(`Replayed ${data.replayed} missed events`);
+                resumePendingRef.current = false;
                 break;
 
             case 'room_status':
@@ -153,9 +153,9 @@ export default function VoiceRecorder({ sessionId, onNewArgument }) {
                 }
                 
                 // Play AI response if available
-                if (result.ai_response_audio) {
+                if (result.ai_response_audio_url) {
                     setStatus("Playing AI response...");
-                    await playAIResponse(result.ai_response_audio);
+                    await playAIResponse(result.ai_response_audio_url);
                 }
                 
                 setStatus("Voice debate completed!");
@@ -172,11 +172,10 @@ export default function VoiceRecorder({ sessionId, onNewArgument }) {
         }
     };
 
-    const playAIResponse = async (base64Audio) => {
+    const playAIResponse = async (audioUrl) => {
         try {
-            const audioData = `data:audio/wav;base64,${base64Audio}`;
             if (audioPlayerRef.current) {
-                audioPlayerRef.current.src = audioData;
+                audioPlayerRef.current.src = audioUrl;
                 await audioPlayerRef.current.play();
             }
         } catch (error) {
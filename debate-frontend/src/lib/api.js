@@ -71,19 +71,46 @@ export const postSessionArgument = async (sessionId, content) =>
     ).then(res => res.data);
 
 
-export const submitVoiceDebate = async (sessionId, audioBlob) => {
+// Opponent, coach and moderator responses for one argument; 'agents' reports
+// any that failed or timed out (their responses are then missing)
+export const submitMultiAgentDebate = async (sessionId, argumentText) =>
+    axios.post(`${API_BASE}/multi-agent-debate/`, {
+        session_id: sessionId,
+        argument_text: argumentText
+    }, { headers: authHeaders(), timeout: 30000 }).then(res => res.data);
+
+export const newIdempotencyKey = () =>
+    typeof crypto !== "undefined" && crypto.randomUUID
+        ? crypto.randomUUID()
+        : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
+// POST a debate turn, retrying timeouts with the same Idempotency-Key so the
+// server replays the first turn instead of running (and scoring) it again
+const postTurn = async (url, data, config, idempotencyKey, retries = 1) => {
+    const headers = { ...config.headers, 'Idempotency-Key': idempotencyKey };
+    for (let attempt = 0; ; attempt++) {
+        try {
+            return await axios.post(url, data, { ...config, headers });
+        } catch (error) {
+            const retryable = !error.response || error.response.status === 409;
+            if (!retryable || attempt >= retries) throw error;
+        }
+    }
+};
+
+export const submitVoiceDebate = async (sessionId, audioBlob, idempotencyKey = newIdempotencyKey()) => {
     try {
         const formData = new FormData();
         formData.append('audio', audioBlob, 'recording.wav');
         formData.append('session_id', sessionId);
 
-        const res = await axios.post(`${API_BASE}/voice-debate/`, formData, {
+        const res = await postTurn(`${API_BASE}/voice-debate/`, formData, {
             headers: {
                 ...authHeaders(),
                 'Content-Type': 'multipart/form-data'
             },
             timeout: 30000  // 30 second timeout for voice processing
-        });
+        }, idempotencyKey);
 
         return res.data;
     } catch (error) {
@@ -114,15 +141,15 @@ export const validateAudioUpload = async (audioBlob) => {
     }
 };
 
-export const submitTextDebate = async (sessionId, argumentText) => {
+export const submitTextDebate = async (sessionId, argumentText, idempotencyKey = newIdempotencyKey()) => {
     try {
-        const res = await axios.post(`${API_BASE}/text-debate/`, {
+        const res = await postTurn(`${API_BASE}/text-debate/`, {
             session_id: sessionId,
             argument_text: argumentText
         }, {
             headers: authHeaders(),
             timeout: 30000  // 30 second timeout for processing
-        });
+        }, idempotencyKey);
 
         return res.data;
     } catch (error) {
@@ -134,6 +161,120 @@ export const submitTextDebate = async (sessionId, argumentText) => {
     }
 };
 
+// Queue a turn (?async=1); resolves to { job_id, status_url, events_url } as soon as it is accepted
+export const queueDebateTurn = async (sessionId, { audioBlob = null, argumentText = null } = {}) => {
+    try {
+        let res;
+        if (audioBlob) {
+            const formData = new FormData();
+            formData.append('audio', audioBlob, 'recording.wav');
+            formData.append('session_id', sessionId);
+            res = await axios.post(`${API_BASE}/voice-debate/?async=1`, formData, {
+                headers: { ...authHeaders(), 'Content-Type': 'multipart/form-data' },
+            });
+        } else {
+            res = await axios.post(`${API_BASE}/text-debate/?async=1`, {
+                session_id: sessionId,
+                argument_text: argumentText
+            }, { headers: authHeaders() });
+        }
+        return res.data;
+    } catch (error) {
+        console.error('Queue debate turn error:', error);
+        if (error.response?.data) {
+            throw new Error(error.response.data.error || 'Debate turn failed');
+        }
+        throw error;
+    }
+};
+
+// Read a Server-Sent Events response, calling onEvent(event, data, id) per message;
+// stops early when onEvent returns anything other than undefined, and returns that
+const readEventStream = async (res, onEvent) => {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) return undefined;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const fields = {};
+            for (const line of message.split('\n')) {
+                if (!line || line.startsWith(':')) continue;
+                const colon = line.indexOf(':');
+                fields[line.slice(0, colon)] = line.slice(colon + 1).trimStart();
+            }
+            if (!fields.event || fields.data === undefined) continue;
+            const result = onEvent(fields.event, JSON.parse(fields.data), fields.id);
+            if (result !== undefined) {
+                reader.cancel();
+                return result;
+            }
+        }
+    }
+};
+
+const turnEventHandler = ({ onStage = () => {}, onDelta = () => {}, onGamification = () => {} }, seen = {}) =>
+    (event, data, id) => {
+        if (event === 'stage') {
+            seen.lastEventId = Number(id) || seen.lastEventId;
+            onStage(data);
+        } else if (event === 'rebuttal_delta') {
+            onDelta(data.text);
+        } else if (event === 'gamification') {
+            onGamification(data);
+        } else if (event === 'completed') {
+            return data;
+        } else {
+            throw new Error(data.error || data.detail || 'Debate turn failed');
+        }
+        return undefined;
+    };
+
+// Follow a queued turn's Server-Sent Events. onStage({ stage, ms, data }) fires as each
+// stage finishes (transcript, feedback, AI response, audio URL); resolves to the full turn
+// response. Uses fetch, not EventSource, so the Authorization header can be sent.
+export const streamDebateTurn = async (eventsUrl, onStage = () => {}) => {
+    const seen = { lastEventId: 0 };
+    for (let attempt = 0; attempt < 3; attempt++) {
+        const res = await fetch(eventsUrl, {
+            headers: {
+                ...authHeaders(),
+                Accept: 'text/event-stream',
+                ...(seen.lastEventId ? { 'Last-Event-ID': String(seen.lastEventId) } : {})
+            }
+        });
+        if (!res.ok) {
+            throw new Error(`Debate turn stream failed (${res.status})`);
+        }
+        const result = await readEventStream(res, turnEventHandler({ onStage }, seen));
+        if (result !== undefined) return result;
+        // Connection dropped mid-turn: reconnect and resume after the last stage seen
+    }
+    throw new Error('Lost connection to the debate turn');
+};
+
+// Submit a text argument and stream the turn: onDelta(text) as the AI rebuttal is
+// generated, onStage/onGamification as results arrive; resolves to the full turn response
+export const streamTextDebate = async (sessionId, argumentText, handlers = {}) => {
+    const res = await fetch(`${API_BASE}/text-debate/stream/`, {
+        method: 'POST',
+        headers: { ...authHeaders(), 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+        body: JSON.stringify({ session_id: sessionId, argument_text: argumentText })
+    });
+    if (!res.ok) {
+        const body = await res.json().catch(() => ({}));
+        throw new Error(body.error || `Text debate failed (${res.status})`);
+    }
+    const result = await readEventStream(res, turnEventHandler(handlers));
+    if (result === undefined) throw new Error('Lost connection to the debate turn');
+    return result;
+};
+
 export const completeDebateSession = async (sessionId) => {
     try {
         const res = await axios.post(`${API_BASE}/complete-session/${sessionId}/`, {}, {
@@ -358,6 +499,25 @@ export const getRealtimeDebateRoom = async (roomId) => {
     }
 };
 
+// Page backwards through a real-time debate room's messages
+export const getRealtimeDebateMessages = async (roomId, before = null, limit = 20) => {
+    try {
+        const params = { limit };
+        if (before) params.before = before;
+        const res = await axios.get(`${API_BASE}/realtime-debate/room/${roomId}/messages/`, {
+            headers: authHeaders(),
+            params,
+        });
+        return res.data;
+    } catch (error) {
+        console.error('Get realtime debate messages error:', error);
+        if (error.response?.data) {
+            throw new Error(error.response.data.error || 'Failed to get debate messages');
+        }
+        throw error;
+    }
+};
+
 // List user's real-time debate rooms
 export const getUserRealtimeDebateRooms = async () => {
     try {
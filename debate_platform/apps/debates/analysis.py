@@ -0,0 +1,131 @@
+import contextvars
+from datetime import timedelta
+from typing import Any, Dict
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from apps.sarvam_integration.services import SarvamAIService
+from .models import Argument
+from .serializers import ArgumentSerializer
+from .services import award_turn_points, grade_from_analysis, quality_bonus_points
+import logging
+
+logger = logging.getLogger('debates')
+
+
+def grade_argument(sarvam_service: SarvamAIService, text: str) -> Dict[str, Any]:
+    """quality_score, feedback, logical_fallacies and analysis_status, with defaults when analysis fails"""
+    result = sarvam_service.analyze_argument_quality(text)
+    grade = {'quality_score': 5, 'feedback': "Good argument!", 'logical_fallacies': [], 'analysis_status': 'completed'}
+    if not result['success']:
+        logger.warning(f"Argument analysis failed, using default scores: {result.get('error')}")
+        return dict(grade, analysis_status='failed')
+    try:
+        grade.update(grade_from_analysis(result['analysis']))
+        logger.info(f"Analysis completed - Quality: {grade['quality_score']}")
+    except Exception as parse_error:
+        logger.error(f"Error parsing analysis result: {str(parse_error)}")
+        grade['feedback'] = "Analysis completed - using default values due to parsing error"
+    return grade
+
+
+def session_group_name(session_id: int) -> str:
+    """Channel-layer group of a debate session's DebateSessionConsumer connections"""
+    return f'debate_session_{session_id}'
+
+
+def defer_analysis(argument_id: int, text: str) -> None:
+    """Score a pending argument in the background (see run_deferred_analysis)"""
+    from .turns import get_turn_executor  # turns imports this module
+    get_turn_executor().submit(contextvars.copy_context().run, run_deferred_analysis, argument_id, text)
+
+
+def run_deferred_analysis(argument_id: int, text: str) -> bool:
+    """Analyse a pending argument, apply its scores and quality bonus, and notify the session"""
+    close_old_connections()
+    try:
+        grade = grade_argument(SarvamAIService(), text)
+        return apply_analysis(argument_id, grade)
+    except Exception as e:
+        logger.error(f"Deferred analysis of argument {argument_id} failed: {str(e)}", exc_info=True)
+        return False
+    finally:
+        close_old_connections()
+
+
+def apply_analysis(argument_id: int, grade: Dict[str, Any]) -> bool:
+    """Apply a late analysis exactly once.
+
+    The pending -> scored update is conditional, so when a retry races the
+    original (or a worker picks up an argument already being scored) only
+    the first one applies scores and awards the bonus. Returns whether this
+    call was that one.
+    """
+    with transaction.atomic():
+        applied = Argument.objects.filter(id=argument_id, analysis_status='pending').update(
+            quality_score=grade['quality_score'],
+            feedback=grade['feedback'],
+            logical_fallacies=grade['logical_fallacies'],
+            analysis_status=grade['analysis_status'],
+        )
+        if not applied:
+            logger.info(f"Analysis of argument {argument_id} was already applied")
+            return False
+
+        argument = Argument.objects.select_related('session__topic', 'session__user').get(id=argument_id)
+        session = argument.session
+        bonus_points = quality_bonus_points(grade['quality_score'])
+        gamification_result = None
+        if bonus_points:
+            gamification_result = award_turn_points(
+                session.user, 'high_quality_argument', bonus_points,
+                f'Quality bonus in "{session.topic.title}" (Quality: {grade["quality_score"]}/10)', session
+            )
+
+    logger.info(f"Deferred analysis applied to argument {argument_id} - Quality: {grade['quality_score']}")
+    notify_analysis(argument, bonus_points, gamification_result)
+    return True
+
+
+def notify_analysis(argument: Argument, bonus_points: int, gamification_result=None) -> None:
+    """Tell the session's connected clients that an argument has been scored"""
+    event = {
+        'type': 'argument_analyzed',
+        'argument': ArgumentSerializer(argument).data,
+        'feedback': {
+            'text': argument.feedback,
+            'score': argument.quality_score,
+            'fallacies': argument.logical_fallacies
+        },
+        'quality_bonus': bonus_points,
+    }
+    if gamification_result:
+        event['user_total_points'] = gamification_result.get('total_points', 0)
+        event['current_level'] = gamification_result.get('new_level', 'beginner')
+        event['level_up'] = gamification_result.get('level_up', False)
+        event['achievements_unlocked'] = [
+            {'name': ach.name, 'description': ach.description}
+            for ach in gamification_result.get('new_achievements', [])
+        ]
+    try:
+        async_to_sync(get_channel_layer().group_send)(session_group_name(argument.session_id), event)
+    except Exception as e:
+        # Clients that miss the event still see the score on their next fetch
+        logger.warning(f"Could not notify session {argument.session_id} of analysed argument: {str(e)}")
+
+
+def retry_pending_analyses() -> int:
+    """Re-run analyses left pending too long (e.g. the process that owned them exited)"""
+    retry_after = settings.DEBATE_SETTINGS['DEFERRED_ANALYSIS_RETRY_AFTER']
+    stale = Argument.objects.filter(
+        analysis_status='pending', timestamp__lt=timezone.now() - timedelta(seconds=retry_after)
+    ).values_list('id', 'content')
+    retried = 0
+    for argument_id, content in stale:
+        # The original text isn't kept; the stored (possibly translated) content is analysed instead
+        retried += run_deferred_analysis(argument_id, content)
+    if retried:
+        logger.warning(f"Applied {retried} stale pending argument analyses")
+    return retried
@@ -9,8 +9,13 @@ from .api_views import (
     voice_debate_view, 
     validate_audio_upload, 
     text_debate_view, 
+    text_debate_stream_view,
+    multi_agent_debate_view,
+    export_transcripts_view,
     complete_debate_session,
     create_debate_topic,
+    debate_job_status,
+    debate_job_events,
 )
 router = DefaultRouter()
 router.register(r'debate-topics', DebateTopicViewSet, basename='debate-topic')
@@ -23,7 +28,12 @@ urlpatterns = router.urls + sessions_router.urls + [
     path('recent-sessions/', RecentSessionsView.as_view(), name='recent-sessions'),
     path('voice-debate/', voice_debate_view, name='voice-debate'),
     path('text-debate/', text_debate_view, name='text-debate'),
+    path('text-debate/stream/', text_debate_stream_view, name='text-debate-stream'),
+    path('multi-agent-debate/', multi_agent_debate_view, name='multi-agent-debate'),
+    path('export/transcripts/', export_transcripts_view, name='export-transcripts'),
     path('validate-audio/', validate_audio_upload, name='validate-audio'),
     path('complete-session/<int:session_id>/', complete_debate_session, name='complete-session'),
     path('create-topic/', create_debate_topic, name='create-topic'),
+    path('debate-jobs/<uuid:job_id>/', debate_job_status, name='debate-job'),
+    path('debate-jobs/<uuid:job_id>/events/', debate_job_events, name='debate-job-events'),
 ]
@@ -147,15 +147,33 @@ class RecentSessionsView(generics.ListAPIView):
 
 # apps/debates/api_views.py - Add these imports and view
 
-from rest_framework.decorators import api_view, permission_classes, parser_classes
+import contextvars
+import json
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.decorators import api_view, permission_classes, parser_classes, renderer_classes
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
+from apps.sarvam_integration.rate_limit import INTERACTIVE, sarvam_priority
+from apps.sarvam_integration.resilience import sarvam_deadline
 from apps.sarvam_integration.services import SarvamAIService
 from gamification.services import GamificationEngine
-from .models import DebateSession, Argument
+from .models import DebateSession, Argument, DebateTurnJob
+from .services import MultiAgentDebateEngine, calculate_final_score
+from .export import (
+    EXPORT_FORMATS, EXPORT_SOURCES, encode_rows, export_queryset, export_rows, iterate_in_thread,
+    parse_export_filters
+)
+from .idempotency import idempotent
+from .jobs import ajob_event_stream, enqueue_turn, job_event_stream, job_payload, sse_message
+from .turns import TurnAborted, finish_turn, iter_turn_events, run_in_context, text_turn_graph, voice_turn_graph
 from .serializers import ArgumentSerializer
 import logging
 
@@ -163,10 +181,19 @@ logger = logging.getLogger('debates')
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser])
+@idempotent('voice-debate')
+@sarvam_priority(INTERACTIVE)
+@sarvam_deadline()
 def voice_debate_view(request):
     """
     Handle complete voice debate workflow:
     STT → Analysis → AI Response → TTS → Gamification
+
+    Independent Sarvam steps run concurrently; 'timings' reports each stage.
+    With ?async=1 the turn is queued for run_debate_worker and 202 is returned.
+    With ?defer_analysis=1 the argument is saved with a pending score that is
+    pushed to the session's websocket once analysed. Retries that send the
+    same Idempotency-Key get the first response back instead of a new turn.
     """
     try:
         session_id = request.data.get('session_id')
@@ -191,199 +218,28 @@ def voice_debate_view(request):
                 'error': 'Audio file is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Initialize Sarvam AI service
-        sarvam_service = SarvamAIService()
-        
-        # Step 1: Convert speech to text
+        if request.query_params.get('async') == '1':
+            return queued_turn_response(request, enqueue_turn(
+                'voice', request.user, session, audio=audio_file, base_url=request.build_absolute_uri('/'),
+                defer_analysis=analysis_deferred(request)
+            ))
+
+        # STT, analysis, language detection, translation, AI response and TTS,
+        # each starting as soon as its inputs are ready
         logger.info(f"Processing voice input for session {session_id}")
-        stt_result = sarvam_service.speech_to_text(
-            audio_file,
-            language_code=getattr(session, 'language', 'en-IN')
-        )
-        
-        if not stt_result['success']:
-            logger.error(f"STT failed: {stt_result.get('error', 'Unknown error')}")
-            return Response({
-                'success': False,
-                'error': f"Speech recognition failed: {stt_result.get('error', 'Unknown error')}"
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        student_transcript = stt_result['transcript']
-        logger.info(f"Speech transcribed successfully: {len(student_transcript)} characters")
-
-        # Step 2: Detect language of the argument
-        logger.info("Detecting language of the argument")
-        language_detection_result = sarvam_service.detect_language(student_transcript)
-        
-        detected_language = 'en-IN'  # Default fallback
-        if language_detection_result['success']:
-            detected_language = language_detection_result.get('language_code', 'en-IN')
-            logger.info(f"Detected language: {detected_language}")
-        else:
-            logger.warning(f"Language detection failed: {language_detection_result.get('error')}")
-        
-        # Step 2: Analyze argument quality with direct parsing
-        analysis_result = sarvam_service.analyze_argument_quality(student_transcript)
-        quality_score = 5  # Default
-        feedback_text = "Good argument!"
-        logical_fallacies = []
-        
-        if analysis_result['success']:
-            analysis = analysis_result['analysis']
-            
-            # Direct parsing with exception handling - no helper function
-            try:
-                # Extract structure score
-                structure_item = next((item for item in analysis if item["id"] == "structure_score"), None)
-                structure_score = structure_item["response"] if structure_item else 5
-                
-                # Extract evidence quality
-                evidence_item = next((item for item in analysis if item["id"] == "evidence_quality"), None)
-                evidence_quality = evidence_item["response"] if evidence_item else 5
-                
-                # Extract effectiveness (quality score)
-                effectiveness_item = next((item for item in analysis if item["id"] == "effectiveness"), None)
-                quality_score = effectiveness_item["response"] if effectiveness_item else 5
-                
-                # Extract logical issues
-                logical_item = next((item for item in analysis if item["id"] == "logical_issues"), None)
-                logical_issue = logical_item["response"] if logical_item else "No issues detected"
-                
-                # Extract improvement suggestions
-                improvements_item = next((item for item in analysis if item["id"] == "improvements"), None)
-                feedback_text = improvements_item["response"] if improvements_item else "Good argument!"
-                
-                # Handle logical fallacies properly as a list
-                if logical_issue and logical_issue != "No issues detected":
-                    logical_fallacies = [logical_issue]
-                else:
-                    logical_fallacies = []
-                
-                logger.info(f"Analysis completed - Quality: {quality_score}, Structure: {structure_score}, Evidence: {evidence_quality}")
-                
-            except Exception as parse_error:
-                logger.error(f"Error parsing analysis result: {str(parse_error)}")
-                # Use defaults if parsing fails
-                quality_score = 5
-                feedback_text = "Analysis completed - using default values due to parsing error"
-                logical_fallacies = []
-        
-        # Step 3: Save student argument
-        student_transcript_translated = sarvam_service.translate_text(
-            text=student_transcript, 
-            target_language=detected_language
-        ) if not detected_language == 'en-IN' else { 'translated_text' : student_transcript }
-
-        student_argument = Argument.objects.create(
-            session=session,
-            speaker='student',
-            content=student_transcript_translated['translated_text'],
-            argument_type='voice_argument',
-            quality_score=quality_score,
-            feedback=feedback_text,
-            logical_fallacies=logical_fallacies,
-        )
-        
-        # Step 4: Generate AI opponent response
-        ai_response_result = sarvam_service.create_debate_opponent_response(
-            topic=session.topic.title,
-            student_argument=student_transcript_translated['translated_text'],
-            stance="opposing",
-            language=detected_language
-        )
-        
-        if not ai_response_result['success']:
-            logger.error(f"AI response generation failed: {ai_response_result.get('error')}")
-            return Response({
-                'success': False,
-                'error': f"AI response generation failed: {ai_response_result.get('error', 'Unknown error')}"
-            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-        
-        ai_response_text = ai_response_result['response']
-        ai_response_text_translated = sarvam_service.translate_text(
-            text=ai_response_text, 
-            target_language=detected_language
-        ) if not detected_language == 'en-IN' else { 'translated_text' : ai_response_text }
-        # Step 5: Save AI argument
-        ai_argument = Argument.objects.create(
-            session=session,
-            speaker='ai_opponent',
-            content=ai_response_text_translated['translated_text'],
-            argument_type='voice_rebuttal'
-        )
-        
-        # Step 6: Convert AI response to speech
-        tts_result = sarvam_service.text_to_speech(
-            text=ai_response_text_translated['translated_text'],
-            language=detected_language
-        )
-        
-        ai_audio_data = None
-        if tts_result['success']:
-            ai_audio_data = tts_result.get('audio_data')
-            logger.info("AI response converted to speech successfully")
-        
-        # Step 7: Award gamification points with error handling
-        base_points = 20
-        bonus_points = max(0, (quality_score - 5) * 5) if isinstance(quality_score, (int, float)) else 0
-        total_voice_points = base_points + bonus_points
-        
         try:
-            gamification_result = GamificationEngine.award_points(
-                user=request.user,
-                action='voice_debate',
-                points_override=total_voice_points,
-                description=f'Voice argument in "{session.topic.title}" (Quality: {quality_score}/10)',
-                debate_session=session
-            )
-            
-            if not gamification_result or not gamification_result.get('success', True):
-                logger.warning("Gamification points award failed, using defaults")
-                gamification_result = {
-                    'total_points': 0,
-                    'new_level': 'beginner',
-                    'level_up': False,
-                    'new_achievements': []
-                }
-        except Exception as gamification_error:
-            logger.error(f"Gamification error: {str(gamification_error)}")
-            gamification_result = {
-                'total_points': 0,
-                'new_level': 'beginner',
-                'level_up': False,
-                'new_achievements': []
-            }
-        
-        # Step 8: Prepare response data
-        response_data = {
-            'success': True,
-            'student_transcript': student_transcript,
-            'ai_response_text': ai_response_text,
-            'ai_response_audio': ai_audio_data,
-            'feedback': {
-                'text': feedback_text,
-                'score': quality_score,
-                'fallacies': logical_fallacies
-            },
-            'gamification': {
-                'points_breakdown': [
-                    {'action': 'Voice Debate (Base)', 'points': base_points},
-                    {'action': 'Quality Bonus', 'points': bonus_points}
-                ],
-                'user_total_points': gamification_result.get('total_points', 0),
-                'current_level': gamification_result.get('new_level', 'beginner'),
-                'level_up': gamification_result.get('level_up', False),
-                'achievements_unlocked': [
-                    {'name': ach.name, 'description': ach.description} 
-                    for ach in gamification_result.get('new_achievements', [])
-                ]
-            },
-            'arguments': {
-                'student': ArgumentSerializer(student_argument).data,
-                'ai_opponent': ArgumentSerializer(ai_argument).data
-            }
-        }
-        
+            results, timings = voice_turn_graph(
+                SarvamAIService(), audio_file, getattr(session, 'language', 'en-IN'), session.topic.title,
+                analyze=not analysis_deferred(request)
+            ).run()
+        except TurnAborted as e:
+            return Response({'success': False, 'error': e.error}, status=e.status_code)
+
+        # Save arguments, award points and prepare response data
+        response_data = finish_turn(
+            'voice', request.user, session, results['speech_to_text'], results, timings, request.build_absolute_uri
+        )
+
         logger.info(f"Voice debate completed successfully for user {request.user.username}")
         return Response(response_data, status=status.HTTP_200_OK)
         
@@ -442,10 +298,19 @@ def validate_audio_upload(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent('text-debate')
+@sarvam_priority(INTERACTIVE)
+@sarvam_deadline()
 def text_debate_view(request):
     """
     Handle complete text debate workflow:
     Text Input → Analysis → AI Response → TTS → Gamification
+
+    Independent Sarvam steps run concurrently; 'timings' reports each stage.
+    With ?async=1 the turn is queued for run_debate_worker and 202 is returned.
+    With ?defer_analysis=1 the argument is saved with a pending score that is
+    pushed to the session's websocket once analysed. Retries that send the
+    same Idempotency-Key get the first response back instead of a new turn.
     """
     try:
         session_id = request.data.get('session_id')
@@ -470,185 +335,28 @@ def text_debate_view(request):
             user=request.user
         )
         
-        # Initialize Sarvam AI service
-        sarvam_service = SarvamAIService()
-
-        # Language detection 
-        logger.info("Detecting language of the argument")
-        language_detection_result = sarvam_service.detect_language(argument_text)
-        
-        detected_language = 'en-IN'  # Default fallback
-        if language_detection_result['success']:
-            detected_language = language_detection_result.get('language_code', 'en-IN')
-            logger.info(f"Detected language: {detected_language}")
-        else:
-            logger.warning(f"Language detection failed: {language_detection_result.get('error')}")
+        if request.query_params.get('async') == '1':
+            return queued_turn_response(request, enqueue_turn(
+                'text', request.user, session, argument_text=argument_text, base_url=request.build_absolute_uri('/'),
+                defer_analysis=analysis_deferred(request)
+            ))
 
+        # Analysis, language detection, AI response, translation and TTS, each
+        # starting as soon as its inputs are ready
         logger.info(f"Processing text argument for session {session_id}")
-        
-        # Step 1: Analyze argument quality (same as voice debate)
-        analysis_result = sarvam_service.analyze_argument_quality(argument_text)
-        quality_score = 5  # Default
-        feedback_text = "Good argument!"
-        logical_fallacies = []
-        
-        if analysis_result['success']:
-            analysis = analysis_result['analysis']
-            
-            # Direct parsing with exception handling
-            try:
-                # Extract structure score
-                structure_item = next((item for item in analysis if item["id"] == "structure_score"), None)
-                structure_score = structure_item["response"] if structure_item else 5
-                
-                # Extract evidence quality
-                evidence_item = next((item for item in analysis if item["id"] == "evidence_quality"), None)
-                evidence_quality = evidence_item["response"] if evidence_item else 5
-                
-                # Extract effectiveness (quality score)
-                effectiveness_item = next((item for item in analysis if item["id"] == "effectiveness"), None)
-                quality_score = effectiveness_item["response"] if effectiveness_item else 5
-                
-                # Extract logical issues
-                logical_item = next((item for item in analysis if item["id"] == "logical_issues"), None)
-                logical_issue = logical_item["response"] if logical_item else "No issues detected"
-                
-                # Extract improvement suggestions
-                improvements_item = next((item for item in analysis if item["id"] == "improvements"), None)
-                feedback_text = improvements_item["response"] if improvements_item else "Good argument!"
-                
-                # Handle logical fallacies properly as a list
-                if logical_issue and logical_issue != "No issues detected":
-                    logical_fallacies = [logical_issue]
-                else:
-                    logical_fallacies = []
-                
-                logger.info(f"Text analysis completed - Quality: {quality_score}, Structure: {structure_score}")
-                
-            except Exception as parse_error:
-                logger.error(f"Error parsing analysis result: {str(parse_error)}")
-                # Use defaults if parsing fails
-                quality_score = 5
-                feedback_text = "Analysis completed - using default values due to parsing error"
-                logical_fallacies = []
-        
-        # Step 2: Save student argument
-        argument_translated = sarvam_service.translate_text(
-            text=argument_text, 
-            target_language=detected_language
-        )
-        
-        student_argument = Argument.objects.create(
-            session=session,
-            speaker='student',
-            content=argument_translated['translated_text'],
-            argument_type='text_argument',
-            quality_score=quality_score,
-            feedback=feedback_text,
-            logical_fallacies=logical_fallacies,
-        )
-        
-        # Step 3: Generate AI opponent response
-        ai_response_result = sarvam_service.create_debate_opponent_response(
-            topic=session.topic.title,
-            student_argument=argument_text,
-            stance="opposing",
-            language=getattr(session, 'language', 'en-IN')
-        )
-        
-        if not ai_response_result['success']:
-            logger.error(f"AI response generation failed: {ai_response_result.get('error')}")
-            return Response({
-                'success': False,
-                'error': f"AI response generation failed: {ai_response_result.get('error', 'Unknown error')}"
-            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-        
-        ai_response_text = ai_response_result['response']
-        
-        # Step 4: Save AI argument
-        ai_response_text_translated = sarvam_service.translate_text(
-            text=ai_response_text, 
-            target_language=detected_language
-        )
-        ai_argument = Argument.objects.create(
-            session=session,
-            speaker='ai_opponent',
-            content=ai_response_text_translated['translated_text'],
-            argument_type='text_rebuttal'
-        )
-        
-        # Step 5: Convert AI response to speech
-        tts_result = sarvam_service.text_to_speech(
-            text=ai_response_text_translated['translated_text'],
-            language=getattr(session, 'language', 'en-IN')
-        )
-        
-        ai_audio_data = None
-        if tts_result['success']:
-            ai_audio_data = tts_result.get('audio_data')
-            logger.info("AI response converted to speech successfully")
-        
-        # Step 6: Award gamification points
-        base_points = 15  # Slightly less than voice debate
-        bonus_points = max(0, (quality_score - 5) * 5) if isinstance(quality_score, (int, float)) else 0
-        total_points = base_points + bonus_points
-        
         try:
-            gamification_result = GamificationEngine.award_points(
-                user=request.user,
-                action='argument_submitted',
-                points_override=total_points,
-                description=f'Text argument in "{session.topic.title}" (Quality: {quality_score}/10)',
-                debate_session=session
-            )
-            
-            if not gamification_result or not gamification_result.get('success', True):
-                logger.warning("Gamification points award failed, using defaults")
-                gamification_result = {
-                    'total_points': 0,
-                    'new_level': 'beginner',
-                    'level_up': False,
-                    'new_achievements': []
-                }
-        except Exception as gamification_error:
-            logger.error(f"Gamification error: {str(gamification_error)}")
-            gamification_result = {
-                'total_points': 0,
-                'new_level': 'beginner',
-                'level_up': False,
-                'new_achievements': []
-            }
-        
-        # Step 7: Prepare response data
-        response_data = {
-            'success': True,
-            'student_argument_text': argument_text,
-            'ai_response_text': ai_response_text,
-            'ai_response_audio': ai_audio_data,
-            'feedback': {
-                'text': feedback_text,
-                'score': quality_score,
-                'fallacies': logical_fallacies
-            },
-            'gamification': {
-                'points_breakdown': [
-                    {'action': 'Text Argument (Base)', 'points': base_points},
-                    {'action': 'Quality Bonus', 'points': bonus_points}
-                ],
-                'user_total_points': gamification_result.get('total_points', 0),
-                'current_level': gamification_result.get('new_level', 'beginner'),
-                'level_up': gamification_result.get('level_up', False),
-                'achievements_unlocked': [
-                    {'name': ach.name, 'description': ach.description} 
-                    for ach in gamification_result.get('new_achievements', [])
-                ]
-            },
-            'arguments': {
-                'student': ArgumentSerializer(student_argument).data,
-                'ai_opponent': ArgumentSerializer(ai_argument).data
-            }
-        }
-        
+            results, timings = text_turn_graph(
+                SarvamAIService(), argument_text, getattr(session, 'language', 'en-IN'), session.topic.title,
+                analyze=not analysis_deferred(request)
+            ).run()
+        except TurnAborted as e:
+            return Response({'success': False, 'error': e.error}, status=e.status_code)
+
+        # Save arguments, award points and prepare response data
+        response_data = finish_turn(
+            'text', request.user, session, argument_text, results, timings, request.build_absolute_uri
+        )
+
         logger.info(f"Text debate completed successfully for user {request.user.username}")
         return Response(response_data, status=status.HTTP_200_OK)
         
@@ -696,9 +404,7 @@ def complete_debate_session(request, session_id):
         )['avg_score'] or 0
         
         # Calculate final score (0-100 scale)
-        base_score = min(avg_quality * 10, 100)  # Convert 1-10 scale to 0-100
-        argument_bonus = min(total_arguments * 5, 30)  # Up to 30 bonus points
-        final_score = min(base_score + argument_bonus, 100)
+        final_score = calculate_final_score(avg_quality, total_arguments)
         
         # Mark session as completed
         session.is_completed = True
@@ -892,3 +598,259 @@ def create_debate_topic(request):
             'success': False,
             'error': 'Failed to create topic'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@sarvam_priority(INTERACTIVE)
+@sarvam_deadline()
+def multi_agent_debate_view(request):
+    """
+    Opponent rebuttal, coach analysis and moderator summary for one argument.
+    The opponent and coach run concurrently and the moderator follows the
+    opponent; agents that fail or time out are listed in 'agents' and the
+    rest are still returned ('partial': true).
+    """
+    try:
+        session_id = request.data.get('session_id')
+        argument_text = request.data.get('argument_text', '').strip()
+
+        if not session_id:
+            return Response({
+                'success': False,
+                'error': 'session_id is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not argument_text:
+            return Response({
+                'success': False,
+                'error': 'argument_text is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        session = get_object_or_404(
+            DebateSession.objects.select_related('topic'),
+            id=session_id,
+            user=request.user
+        )
+
+        result = MultiAgentDebateEngine(session).generate_multi_perspective_debate(argument_text)
+        if not result['success']:
+            return Response({
+                'success': False,
+                'error': 'Multi-agent debate failed'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        agent_statuses = ', '.join(f"{name}={agent['status']}" for name, agent in result['agents'].items())
+        logger.info(f"Multi-agent debate for session {session_id} took {result['timings']['wall_ms']}ms ({agent_statuses})")
+        return Response(result, status=status.HTTP_200_OK)
+
+    except Http404:
+        raise
+    except Exception as e:
+        logger.error(f'Unexpected error in multi_agent_debate_view: {str(e)}', exc_info=True)
+        return Response({
+            'success': False,
+            'error': 'Internal server error occurred'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_transcripts_view(request):
+    """
+    Stream debate transcripts with scores as NDJSON (default) or CSV (?output=csv):
+    one row per argument of each text/voice session, or per message of each
+    realtime room with ?source=rooms. Filters: ?session=<id>, ?topic=<id>, ?since=<date>.
+    Staff can export other users with ?user=<username> (repeatable) or
+    everyone with ?all=1; everyone else exports their own transcripts.
+    """
+    source = request.query_params.get('source', 'sessions')
+    export_format = request.query_params.get('output', 'ndjson')
+    if source not in EXPORT_SOURCES or export_format not in EXPORT_FORMATS:
+        return Response({
+            'success': False,
+            'error': f"source must be one of {', '.join(EXPORT_SOURCES)} and output one of {', '.join(EXPORT_FORMATS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    since = request.query_params.get('since')
+    if since:
+        since = parse_datetime(since) or parse_date(since)
+        if since is None:
+            return Response({
+                'success': False,
+                'error': 'since must be an ISO date or datetime'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        session_id, topic_id = parse_export_filters(
+            source, request.query_params.get('session'), request.query_params.get('topic')
+        )
+    except ValueError as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    usernames = [request.user.username]
+    if request.user.is_staff:
+        if request.query_params.get('all') == '1':
+            usernames = None
+        elif request.query_params.getlist('user'):
+            usernames = request.query_params.getlist('user')
+
+    queryset = export_queryset(source, usernames, session_id, topic_id, since or None)
+    chunks = encode_rows(export_rows(queryset, source), source, export_format)
+    if isinstance(request._request, ASGIRequest):
+        chunks = iterate_in_thread(chunks)
+
+    logger.info(f"Exporting {source} transcripts as {export_format} for user {request.user.username}")
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="debate-{source}.{export_format}"'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the export
+    return response
+
+
+def analysis_deferred(request) -> bool:
+    """Whether a turn should skip inline analysis and have it scored in the background"""
+    value = request.query_params.get('defer_analysis')
+    if value is None:
+        return settings.DEBATE_SETTINGS['DEFER_ANALYSIS']
+    return value == '1'
+
+
+def queued_turn_response(request, job):
+    """202 for a turn submitted with ?async=1: where to follow it"""
+    return Response({
+        'success': True,
+        'job_id': str(job.id),
+        'status': job.status,
+        'status_url': request.build_absolute_uri(reverse('debate-job', args=[job.id])),
+        'events_url': request.build_absolute_uri(reverse('debate-job-events', args=[job.id])),
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets SSE clients through content negotiation; errors are sent as a single 'error' event"""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return f"event: error\ndata: {json.dumps(data)}\n\n".encode()
+
+
+def event_stream_response(request, events, async_events=None) -> StreamingHttpResponse:
+    """SSE response that streams under ASGI as well as WSGI.
+
+    Under ASGI, Django reads a sync iterator to the end before sending
+    anything, so there the events are sent from async_events, or from
+    events advanced one at a time in a worker thread.
+    """
+    if isinstance(request._request, ASGIRequest):
+        events = async_events if async_events is not None else iterate_in_thread(events)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def debate_job_status(request, job_id):
+    """Status, finished stages and (once done) result of a queued debate turn"""
+    job = get_object_or_404(DebateTurnJob, id=job_id, user=request.user)
+    return Response(job_payload(job), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([EventStreamRenderer, JSONRenderer])
+def debate_job_events(request, job_id):
+    """
+    Stream a queued debate turn's progress as Server-Sent Events.
+    Authenticates with the Authorization header, so read it with fetch()
+    rather than EventSource; send Last-Event-ID to resume after a reconnect.
+    """
+    job = get_object_or_404(DebateTurnJob, id=job_id, user=request.user)
+    try:
+        sent = int(request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id') or 0)
+    except ValueError:
+        sent = 0
+
+    return event_stream_response(request, job_event_stream(job.id, sent), ajob_event_stream(job.id, sent))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+@sarvam_priority(INTERACTIVE)
+@sarvam_deadline()
+def text_debate_stream_view(request):
+    """
+    Text debate turn as Server-Sent Events, so the rebuttal shows from its first token:
+    'rebuttal_delta' events as the AI response is generated, a 'stage' event
+    as each step finishes (analysis, translations, audio), then 'gamification'
+    and 'completed' with the same data text_debate_view returns.
+    Takes ?defer_analysis=1 like text_debate_view.
+    """
+    try:
+        session_id = request.data.get('session_id')
+        argument_text = request.data.get('argument_text', '').strip()
+
+        if not session_id:
+            return Response({
+                'success': False,
+                'error': 'session_id is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not argument_text:
+            return Response({
+                'success': False,
+                'error': 'argument_text is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        session = get_object_or_404(
+            DebateSession,
+            id=session_id,
+            user=request.user
+        )
+        logger.info(f"Streaming text argument for session {session_id}")
+
+        # The stream is read after this view returns; keep its Sarvam priority and deadline
+        events = run_in_context(text_turn_events(request, session, argument_text), contextvars.copy_context())
+        return event_stream_response(request, events)
+
+    except Http404:
+        raise
+    except Exception as e:
+        logger.error(f'Unexpected error in text_debate_stream_view: {str(e)}', exc_info=True)
+        return Response({
+            'success': False,
+            'error': 'Internal server error occurred'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def text_turn_events(request, session, argument_text):
+    """SSE messages for text_debate_stream_view"""
+    language = getattr(session, 'language', 'en-IN')
+    analyze = not analysis_deferred(request)
+    try:
+        for kind, payload in iter_turn_events(
+            lambda on_delta: text_turn_graph(
+                SarvamAIService(), argument_text, language, session.topic.title, on_delta=on_delta, analyze=analyze
+            ),
+            request.build_absolute_uri
+        ):
+            if kind == 'done':
+                results, timings = payload
+            else:
+                yield sse_message(kind, payload)
+
+        response_data = finish_turn(
+            'text', request.user, session, argument_text, results, timings, request.build_absolute_uri
+        )
+        yield sse_message('gamification', response_data['gamification'])
+        yield sse_message('completed', response_data)
+        logger.info(f"Streamed text debate completed successfully for user {request.user.username}")
+
+    except TurnAborted as e:
+        yield sse_message('failed', {'success': False, 'error': e.error, 'status_code': e.status_code})
+    except Exception as e:
+        logger.error(f'Unexpected error in streamed text debate: {str(e)}', exc_info=True)
+        yield sse_message('failed', {'success': False, 'error': 'Internal server error occurred', 'status_code': 500})
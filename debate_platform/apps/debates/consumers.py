@@ -0,0 +1,39 @@
+# apps/debates/consumers.py
+import json
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
+from .analysis import session_group_name
+from .models import DebateSession
+import logging
+
+logger = logging.getLogger('debates')
+
+
+class DebateSessionConsumer(AsyncWebsocketConsumer):
+    """Pushes late-bound argument scores (deferred analysis) to a debate session's owner"""
+
+    async def connect(self):
+        self.session_id = self.scope['url_route']['kwargs']['session_id']
+        self.user = self.scope['user']
+
+        if not self.user.is_authenticated:
+            await self.close(code=4001)
+            return
+        if not await self.owns_session():
+            await self.close(code=4003)
+            return
+
+        self.group_name = session_group_name(self.session_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if getattr(self, 'group_name', None):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def argument_analyzed(self, event):
+        await self.send(text_data=json.dumps(event, default=str))
+
+    @database_sync_to_async
+    def owns_session(self):
+        return DebateSession.objects.filter(id=self.session_id, user_id=self.user.id).exists()
@@ -0,0 +1,153 @@
+import csv
+import json
+import uuid
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from realtime_debate.models import RealtimeDebateRoom
+from .models import DebateSession
+
+# Export column -> values() lookup. One row per argument (or message); sessions
+# and rooms with none still get a row, with the argument columns empty.
+SESSION_COLUMNS = {
+    'session_id': 'id',
+    'username': 'user__username',
+    'topic': 'topic__title',
+    'session_type': 'session_type',
+    'language': 'language',
+    'started_at': 'started_at',
+    'completed_at': 'completed_at',
+    'is_completed': 'is_completed',
+    'final_score': 'final_score',
+    'argument_id': 'arguments__id',
+    'speaker': 'arguments__speaker',
+    'argument_type': 'arguments__argument_type',
+    'content': 'arguments__content',
+    'quality_score': 'arguments__quality_score',
+    'analysis_status': 'arguments__analysis_status',
+    'feedback': 'arguments__feedback',
+    'logical_fallacies': 'arguments__logical_fallacies',
+    'timestamp': 'arguments__timestamp',
+}
+
+ROOM_COLUMNS = {
+    'room_id': 'id',
+    'username': 'user__username',
+    'topic': 'topic__title',
+    'status': 'status',
+    'language': 'language',
+    'user_stance': 'user_stance',
+    'started_at': 'started_at',
+    'ended_at': 'ended_at',
+    'message_id': 'messages__id',
+    'turn_number': 'messages__turn_number',
+    'speaker': 'messages__speaker',
+    'message_type': 'messages__message_type',
+    'text_content': 'messages__text_content',
+    'argument_quality': 'messages__argument_quality',
+    'confidence_score': 'messages__confidence_score',
+    'timestamp': 'messages__timestamp',
+}
+
+EXPORT_SOURCES = {
+    'sessions': (DebateSession, SESSION_COLUMNS, ('id', 'arguments__timestamp', 'arguments__id')),
+    'rooms': (RealtimeDebateRoom, ROOM_COLUMNS, ('created_at', 'id', 'messages__timestamp', 'messages__id')),
+}
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def parse_export_filters(source: str, session_id: Optional[str],
+                         topic_id: Optional[str]) -> Tuple[Optional[Any], Optional[int]]:
+    """session (an int id, or a UUID for rooms) and topic filters parsed up front;
+    ValueError says which one is malformed"""
+    if session_id:
+        try:
+            session_id = uuid.UUID(str(session_id)) if source == 'rooms' else int(session_id)
+        except ValueError:
+            raise ValueError(f"session must be a {'room UUID' if source == 'rooms' else 'numeric session id'}")
+    if topic_id:
+        try:
+            topic_id = int(topic_id)
+        except ValueError:
+            raise ValueError('topic must be a numeric topic id')
+    return session_id or None, topic_id or None
+
+
+def export_queryset(source: str, usernames: Optional[List[str]] = None, session_id=None,
+                    topic_id: Optional[int] = None, since=None) -> QuerySet:
+    """values() rows for an export; usernames=None exports every user.
+    session_id and topic_id should come from parse_export_filters"""
+    model, columns, ordering = EXPORT_SOURCES[source]
+    queryset = model.objects.all()
+    if usernames is not None:
+        queryset = queryset.filter(user__username__in=usernames)
+    if session_id:
+        queryset = queryset.filter(id=session_id)
+    if topic_id:
+        queryset = queryset.filter(topic_id=topic_id)
+    if since is not None:
+        queryset = queryset.filter(**{'started_at__gte' if source == 'sessions' else 'created_at__gte': since})
+    return queryset.order_by(*ordering).values_list(*columns.values())
+
+
+def export_rows(queryset: QuerySet, source: str, chunk_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Rows as dicts keyed by export column, fetched chunk_size at a time"""
+    names = list(EXPORT_SOURCES[source][1])
+    for values in queryset.iterator(chunk_size=chunk_size or settings.DEBATE_SETTINGS['EXPORT_CHUNK_SIZE']):
+        yield dict(zip(names, values))
+
+
+class _LineBuffer:
+    """File-like object for csv.writer that hands back each written line"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def encode_rows(rows: Iterable[Dict[str, Any]], source: str, export_format: str,
+                rows_per_chunk: int = 500) -> Iterator[str]:
+    """NDJSON or CSV text for rows, yielded a few hundred rows at a time"""
+    writer = csv.writer(_LineBuffer())
+    if export_format == 'csv':
+        yield writer.writerow(list(EXPORT_SOURCES[source][1]))
+
+    lines = []
+    for row in rows:
+        if export_format == 'csv':
+            lines.append(writer.writerow([
+                json.dumps(value) if isinstance(value, (list, dict)) else ('' if value is None else value)
+                for value in row.values()
+            ]))
+        else:
+            lines.append(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+        if len(lines) >= rows_per_chunk:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+async def iterate_in_thread(iterator: Iterator[Any]) -> AsyncIterator[Any]:
+    """Async iteration over a sync iterator, one item at a time.
+
+    Under ASGI, StreamingHttpResponse reads a sync iterator to the end before
+    sending anything; this keeps an export streaming (and its memory flat).
+    The iterator always advances on the same thread, which its DB cursor needs.
+    """
+    sentinel = object()
+    advance = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            item = await advance(iterator, sentinel)
+            if item is sentinel:
+                return
+            yield item
+    finally:
+        if hasattr(iterator, 'close'):
+            await sync_to_async(iterator.close, thread_sensitive=True)()
@@ -0,0 +1,146 @@
+import functools
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+import redis
+from rest_framework import status
+from rest_framework.response import Response
+from apps.sarvam_integration.clients import get_redis_client
+import logging
+
+logger = logging.getLogger('debates')
+
+
+def request_fingerprint(request) -> str:
+    """Hash of the request body, so a key reused for a different request is caught"""
+    digest = hashlib.sha256(request.get_full_path().encode('utf-8'))
+    for name in sorted(request.data.keys()):
+        if name in request.FILES:
+            continue
+        digest.update(f'\x00{name}={request.data.get(name)}'.encode('utf-8'))
+    for name in sorted(request.FILES.keys()):
+        upload = request.FILES[name]
+        digest.update(f'\x00{name}:{upload.size}:'.encode('utf-8'))
+        for chunk in upload.chunks():
+            digest.update(chunk)
+        upload.seek(0)
+    return digest.hexdigest()
+
+
+def _replay(record: Dict[str, Any]) -> Response:
+    response = Response(json.loads(record['data']), status=record['status'])
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _conflict(error: str, status_code: int) -> Response:
+    return Response({'success': False, 'error': error}, status=status_code)
+
+
+def idempotent(scope: str, redis_client_factory: Callable[[], Any] = get_redis_client):
+    """Make a POST view safe to retry with an Idempotency-Key header.
+
+    The first request with a key claims it in Redis and runs the view; its
+    response is stored for DEBATE_IDEMPOTENCY_SETTINGS['RETENTION'] seconds
+    and replayed (with Idempotent-Replayed: true) for repeats of that key.
+    A repeat that arrives while the first is still running waits for its
+    response. 5xx responses aren't stored, so those can be retried for real.
+    Keys are per user; reusing one for a different request body returns 422.
+    Without the header, or if Redis is unavailable, the view just runs.
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            config = settings.DEBATE_IDEMPOTENCY_SETTINGS
+            key = request.headers.get('Idempotency-Key')
+            if not config['ENABLED'] or not key:
+                return view_func(request, *args, **kwargs)
+            if len(key) > 255:
+                return _conflict('Idempotency-Key must be at most 255 characters', status.HTTP_400_BAD_REQUEST)
+
+            redis_key = f'idempotency:{scope}:{request.user.pk}:{key}'
+            fingerprint = request_fingerprint(request)
+            token = uuid.uuid4().hex
+            try:
+                record = _claim_or_wait(redis_client_factory(), redis_key, fingerprint, token, config)
+            except redis.RedisError as e:
+                logger.warning(f"Idempotency store unavailable, running {scope} without it: {str(e)}")
+                return view_func(request, *args, **kwargs)
+
+            if record is not None:
+                if record['fingerprint'] != fingerprint:
+                    return _conflict('Idempotency-Key was already used for a different request',
+                                     status.HTTP_422_UNPROCESSABLE_ENTITY)
+                if record['state'] == 'completed':
+                    logger.info(f"Replaying {scope} response for Idempotency-Key {key}")
+                    return _replay(record)
+                return _conflict('A request with this Idempotency-Key is still being processed',
+                                 status.HTTP_409_CONFLICT)
+
+            response = None
+            try:
+                response = view_func(request, *args, **kwargs)
+                return response
+            finally:
+                _store(redis_client_factory(), redis_key, fingerprint, token, response, config)
+
+        return wrapper
+    return decorator
+
+
+def _claim_or_wait(redis_client, redis_key: str, fingerprint: str, token: str,
+                   config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """None once this request holds the key; otherwise the stored record
+    (completed, or still in progress when the wait timed out)"""
+    in_progress = json.dumps({'state': 'in_progress', 'fingerprint': fingerprint, 'token': token})
+    deadline = time.monotonic() + config['WAIT_TIMEOUT']
+    while True:
+        if redis_client.set(redis_key, in_progress, nx=True, ex=config['LOCK_TTL']):
+            return None
+        raw = redis_client.get(redis_key)
+        record = json.loads(raw) if raw is not None else None
+        if record is not None and (record['state'] == 'completed' or record['fingerprint'] != fingerprint):
+            return record
+        if time.monotonic() >= deadline:
+            # A key that keeps vanishing (e.g. the store is evicting it) is reported as still in progress
+            return record or {'state': 'in_progress', 'fingerprint': fingerprint}
+        # An in-progress claim, or one just released by a failed request; retry the claim after a pause
+        time.sleep(config['POLL_INTERVAL'])
+
+
+def _store(redis_client, redis_key: str, fingerprint: str, token: str,
+           response: Optional[Response], config: Dict[str, Any]) -> None:
+    """Keep a finished response for replay, or release the key after a failure"""
+    try:
+        if response is None or response.status_code >= 500 or not isinstance(response, Response):
+            raise ValueError('response is not replayable')
+        record = json.dumps({
+            'state': 'completed',
+            'fingerprint': fingerprint,
+            'status': response.status_code,
+            'data': json.dumps(response.data, cls=DjangoJSONEncoder),
+        })
+    except (TypeError, ValueError):
+        record = None
+
+    def store(pipe):
+        # WATCH makes the token check and the write one step: if the claim expires and
+        # another request takes the key in between, EXEC fails and the check runs again
+        raw = pipe.get(redis_key)
+        if raw is None or json.loads(raw).get('token') != token:
+            pipe.unwatch()
+            return  # our claim expired and the key now belongs to another request
+        pipe.multi()
+        if record is None:
+            pipe.delete(redis_key)
+        else:
+            pipe.set(redis_key, record, ex=config['RETENTION'])
+
+    try:
+        redis_client.transaction(store, redis_key)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to store idempotent response under {redis_key}: {str(e)}")
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import time
+from datetime import timedelta
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+from urllib.parse import urljoin
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from apps.sarvam_integration.rate_limit import INTERACTIVE, sarvam_priority
+from apps.sarvam_integration.resilience import sarvam_deadline
+from apps.sarvam_integration.services import SarvamAIService
+from .models import DebateTurnJob
+from .turns import TurnAborted, finish_turn, stage_progress, text_turn_graph, voice_turn_graph
+import logging
+
+logger = logging.getLogger('debates')
+
+
+def enqueue_turn(kind: str, user, session, argument_text: str = '', audio=None, base_url: str = '',
+                 defer_analysis: bool = False) -> DebateTurnJob:
+    """Queue a turn for run_debate_worker; the upload is saved so the worker can read it"""
+    job = DebateTurnJob(kind=kind, user=user, session=session, argument_text=argument_text, base_url=base_url,
+                        defer_analysis=defer_analysis)
+    if audio is not None:
+        job.audio.save(audio.name or 'audio.wav', audio, save=False)
+    job.save()
+    logger.info(f"Queued {kind} turn {job.id} for session {session.id}")
+    return job
+
+
+def job_payload(job: DebateTurnJob) -> Dict[str, Any]:
+    payload = {
+        'success': job.status != 'failed',
+        'job_id': str(job.id),
+        'kind': job.kind,
+        'status': job.status,
+        'events': job.events,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
+    if job.status == 'completed':
+        payload['result'] = job.result
+    elif job.status == 'failed':
+        payload['error'] = job.error
+    return payload
+
+
+def requeue_stale_jobs() -> int:
+    """Put back jobs whose worker died mid-turn, or fail them once they've used up their attempts"""
+    config = settings.DEBATE_JOB_SETTINGS
+    stale = DebateTurnJob.objects.filter(
+        status='running', started_at__lt=timezone.now() - timedelta(seconds=config['STALE_AFTER'])
+    )
+    failed = stale.filter(attempts__gte=config['MAX_ATTEMPTS']).update(
+        status='failed', error='Turn did not finish', error_status=500, finished_at=timezone.now()
+    )
+    requeued = stale.update(status='queued', events=[])  # the retry re-runs every stage
+    if failed or requeued:
+        logger.warning(f"Stale debate turn jobs: {requeued} requeued, {failed} failed")
+    return requeued
+
+
+def claim_next_job() -> Optional[DebateTurnJob]:
+    """Oldest queued job, claimed with a conditional update so concurrent workers never share one"""
+    for job_id in DebateTurnJob.objects.filter(status='queued').values_list('id', flat=True)[:10]:
+        claimed = DebateTurnJob.objects.filter(id=job_id, status='queued').update(
+            status='running', started_at=timezone.now(), attempts=F('attempts') + 1
+        )
+        if claimed:
+            return DebateTurnJob.objects.select_related('session__topic', 'user').get(id=job_id)
+    return None
+
+
+@sarvam_priority(INTERACTIVE)
+@sarvam_deadline()
+def run_job(job: DebateTurnJob) -> None:
+    """Run a claimed turn, recording each finished stage on the job as it happens"""
+    def absolute_uri(url: str) -> str:
+        return urljoin(job.base_url, url) if job.base_url else url
+
+    def on_stage(name, result, timing):
+        job.events.append({'stage': name, 'ms': timing['duration_ms'], 'data': stage_progress(name, result, absolute_uri)})
+        DebateTurnJob.objects.filter(id=job.id).update(events=job.events)
+
+    session = job.session
+    language = getattr(session, 'language', 'en-IN')
+    sarvam_service = SarvamAIService()
+    try:
+        if job.kind == 'voice':
+            with job.audio.open('rb') as audio_file:
+                results, timings = voice_turn_graph(
+                    sarvam_service, audio_file, language, session.topic.title, analyze=not job.defer_analysis
+                ).run(on_stage=on_stage)
+            student_text = results['speech_to_text']
+        else:
+            results, timings = text_turn_graph(
+                sarvam_service, job.argument_text, language, session.topic.title, analyze=not job.defer_analysis
+            ).run(on_stage=on_stage)
+            student_text = job.argument_text
+
+        # The turn's arguments and points commit together with the job's result, so a worker
+        # that dies in between leaves nothing behind for the retry to duplicate
+        with transaction.atomic():
+            result = finish_turn(job.kind, job.user, session, student_text, results, timings, absolute_uri)
+            if not finish_job(job, 'completed', result=result):
+                transaction.set_rollback(True)
+                return
+        logger.info(f"{job.kind.title()} turn {job.id} completed for user {job.user.username}")
+    except TurnAborted as e:
+        finish_job(job, 'failed', error=e.error, error_status=e.status_code)
+    except Exception as e:
+        logger.error(f"Unexpected error in debate turn job {job.id}: {str(e)}", exc_info=True)
+        finish_job(job, 'failed', error='Internal server error occurred', error_status=500)
+
+
+def finish_job(job: DebateTurnJob, status: str, result: Optional[Dict[str, Any]] = None,
+               error: str = '', error_status: Optional[int] = None) -> bool:
+    """Record a claimed job's outcome; False if it was requeued meanwhile and is now another attempt's"""
+    job.status, job.result, job.error, job.error_status = status, result, error, error_status
+    job.finished_at = timezone.now()
+    finished = DebateTurnJob.objects.filter(id=job.id, status='running', attempts=job.attempts).update(
+        status=status, result=result, error=error, error_status=error_status, finished_at=job.finished_at
+    )
+    if not finished:
+        logger.warning(f"Debate turn job {job.id} was taken over by another attempt; discarding this one")
+        return False
+    if job.audio:
+        # The upload is only kept until the turn has run
+        audio = job.audio
+        transaction.on_commit(lambda: audio.delete(save=False))
+        DebateTurnJob.objects.filter(id=job.id).update(audio='')
+    return True
+
+
+def run_next_job() -> bool:
+    """Claim and run one job; False when the queue is empty"""
+    close_old_connections()
+    job = claim_next_job()
+    if job is None:
+        return False
+    run_job(job)
+    return True
+
+
+def sse_message(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, cls=DjangoJSONEncoder)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+# Yielded by _job_event_steps when there is nothing to send until the next poll
+POLL_WAIT = object()
+
+
+def _job_event_steps(job_id, sent: int) -> Iterator[Any]:
+    """SSE messages for a job, with POLL_WAIT between polls (the caller sleeps)"""
+    config = settings.DEBATE_JOB_SETTINGS
+    started = last_message = time.monotonic()
+    while True:
+        job = DebateTurnJob.objects.only('status', 'events', 'result', 'error', 'error_status').get(id=job_id)
+        for event_id, event in enumerate(job.events[sent:], start=sent + 1):
+            yield sse_message('stage', event, event_id)
+            last_message = time.monotonic()
+        sent = max(sent, len(job.events))
+
+        if job.status == 'completed':
+            yield sse_message('completed', job.result)
+            return
+        if job.status == 'failed':
+            yield sse_message('failed', {'success': False, 'error': job.error, 'status_code': job.error_status})
+            return
+        if time.monotonic() - started > config['STREAM_TIMEOUT']:
+            yield sse_message('timeout', {'success': False, 'status': job.status})
+            return
+        if time.monotonic() - last_message > config['HEARTBEAT_INTERVAL']:
+            yield ': keep-alive\n\n'
+            last_message = time.monotonic()
+        yield POLL_WAIT
+
+
+def job_event_stream(job_id, sent: int = 0) -> Iterator[str]:
+    """Server-Sent Events for a job: a 'stage' event per finished stage (id = its position),
+    then 'completed' with the turn's response or 'failed' with the error.
+
+    sent: stages the client already has (its Last-Event-ID), which are skipped.
+    """
+    for message in _job_event_steps(job_id, sent):
+        if message is POLL_WAIT:
+            time.sleep(settings.DEBATE_JOB_SETTINGS['STREAM_POLL_INTERVAL'])
+        else:
+            yield message
+
+
+async def ajob_event_stream(job_id, sent: int = 0) -> AsyncIterator[str]:
+    """job_event_stream for ASGI: each poll runs in a thread, the waits between them don't hold one"""
+    steps = _job_event_steps(job_id, sent)
+    advance = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            message = await advance(steps, None)
+            if message is None:
+                return
+            if message is POLL_WAIT:
+                await asyncio.sleep(settings.DEBATE_JOB_SETTINGS['STREAM_POLL_INTERVAL'])
+            else:
+                yield message
+    finally:
+        await sync_to_async(steps.close, thread_sensitive=True)()
@@ -0,0 +1,83 @@
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.conf import settings
+from apps.sarvam_integration.fakes import FakeSarvamAIService, LatencyModel
+from debates.services import MultiAgentDebateEngine
+
+ARGUMENT = 'Homework should be banned because it takes time away from sleep, play and family.'
+
+
+def sequential_agents(engine: MultiAgentDebateEngine, student_argument: str) -> int:
+    """The engine's previous call order: opponent, then coach, then moderator. Returns agents answered."""
+    service, topic = engine.sarvam_service, engine.session.topic.title
+    opponent = service.create_debate_opponent_response(topic, student_argument, stance="opposing")
+    coach = service.analyze_argument_quality(student_argument)
+    moderator = service.create_debate_opponent_response(
+        "Debate Moderation", f"Student argument: {student_argument}\nAI opponent response: {opponent.get('response')}",
+        stance="neutral"
+    )
+    return sum(result['success'] for result in (opponent, coach, moderator))
+
+
+class Command(BaseCommand):
+    help = 'Compare sequential and concurrent MultiAgentDebateEngine agents against the fake Sarvam backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20, help='Debates per scenario')
+        parser.add_argument('--llm-latency', type=float, default=None, help='Fake LLM latency (ms)')
+        parser.add_argument('--analytics-latency', type=float, default=None, help='Fake Text Analytics latency (ms)')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        def ms(value):
+            return value / 1000.0 if value is not None else None
+
+        latency = LatencyModel(seed=options['seed'], llm=ms(options['llm_latency']),
+                               analytics=ms(options['analytics_latency']))
+        session = SimpleNamespace(topic=SimpleNamespace(title='Homework should be banned'), language='en-IN')
+        engine = MultiAgentDebateEngine(session, sarvam_service=FakeSarvamAIService(latency))
+
+        # A coach that overruns its timeout, to show partial results
+        slow_coach = round(latency.latencies['analytics'] * 3, 3)
+        slow_engine = MultiAgentDebateEngine(session, sarvam_service=FakeSarvamAIService(
+            LatencyModel(seed=options['seed'], llm=latency.latencies['llm'], analytics=slow_coach)
+        ))
+        slow_timeouts = dict(settings.DEBATE_SETTINGS['AGENT_TIMEOUTS'], coach=round(slow_coach / 2, 3))
+
+        scenarios = [
+            ('sequential', lambda: sequential_agents(engine, ARGUMENT), {}),
+            ('task graph', lambda: self.graph_agents(engine), {}),
+            ('task graph, coach timed out', lambda: self.graph_agents(slow_engine),
+             {'DEBATE_SETTINGS': dict(settings.DEBATE_SETTINGS, AGENT_TIMEOUTS=slow_timeouts)}),
+        ]
+
+        self.stdout.write(
+            f"{options['rounds']} debates per scenario; fake latency llm={latency.latencies['llm'] * 1000:.0f}ms "
+            f"analytics={latency.latencies['analytics'] * 1000:.0f}ms"
+        )
+        self.stdout.write(f"{'scenario':30} {'mean':>8} {'p50':>8} {'p95':>8} {'agents':>7}")
+        baseline = None
+        for name, run, overrides in scenarios:
+            durations, answered = [], []
+            with override_settings(**overrides):
+                for _ in range(options['rounds']):
+                    started = time.perf_counter()
+                    answered.append(run())
+                    durations.append((time.perf_counter() - started) * 1000)
+            durations.sort()
+            mean = statistics.mean(durations)
+            baseline = baseline or mean
+            self.stdout.write(
+                f"{name:30} {mean:7.0f}ms {durations[len(durations) // 2]:7.0f}ms "
+                f"{durations[int(len(durations) * 0.95) - 1]:7.0f}ms {statistics.mean(answered):5.1f}/3"
+                + (f"  ({baseline / mean:.2f}x)" if mean != baseline else '')
+            )
+
+    @staticmethod
+    def graph_agents(engine: MultiAgentDebateEngine) -> int:
+        responses, agents, timings = asyncio.run(engine._run_agents(ARGUMENT))
+        return len(responses)
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date, parse_datetime
+from debates.export import (
+    EXPORT_FORMATS, EXPORT_SOURCES, encode_rows, export_queryset, export_rows, parse_export_filters
+)
+
+
+class Command(BaseCommand):
+    help = 'Stream debate session or realtime room transcripts with scores as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=list(EXPORT_SOURCES), default='sessions',
+                            help='Text/voice debate sessions, or realtime rooms')
+        parser.add_argument('--format', dest='export_format', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--user', action='append', default=[],
+                            help='Username to export (repeatable, e.g. a class roster); default: everyone')
+        parser.add_argument('--session', help='A single session (or room) id')
+        parser.add_argument('--topic', type=int, help='Only sessions on this debate topic (e.g. a class assignment)')
+        parser.add_argument('--since', help='Only sessions started on or after this ISO date/datetime')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows fetched per query round-trip')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        since = options['since']
+        if since:
+            since = parse_datetime(since) or parse_date(since)
+            if since is None:
+                raise CommandError('--since must be an ISO date or datetime')
+
+        try:
+            session_id, topic_id = parse_export_filters(options['source'], options['session'], options['topic'])
+        except ValueError as e:
+            raise CommandError(f'--{e}')
+
+        queryset = export_queryset(options['source'], options['user'] or None, session_id, topic_id, since or None)
+        rows = export_rows(queryset, options['source'], options['chunk_size'])
+
+        chunks = encode_rows(rows, options['source'], options['export_format'])
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(options['output'], 'w', newline='', encoding='utf-8') as stream:
+            for chunk in chunks:
+                stream.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {options['source']} export to {options['output']}"))
@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from debates.models import Argument, DebateSession
+from debates.services import calculate_final_score, grade_from_analysis
+from apps.sarvam_integration.rate_limit import BACKGROUND, sarvam_priority
+from apps.sarvam_integration.services import SarvamAIService
+import logging
+
+logger = logging.getLogger('debates')
+
+
+class Command(BaseCommand):
+    help = 'Re-grade student arguments in bulk with batched Text Analytics calls'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', type=int, action='append', default=[],
+                            help='Debate session id (repeatable)')
+        parser.add_argument('--topic', type=int, help='Every session on this debate topic (e.g. a class assignment)')
+        parser.add_argument('--user', action='append', default=[],
+                            help='Username whose sessions to re-grade (repeatable, e.g. a class roster)')
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Arguments analysed and saved per round')
+        parser.add_argument('--use-cache', action='store_true',
+                            help='Reuse cached analyses instead of asking for fresh ones')
+        parser.add_argument('--dry-run', action='store_true', help='Analyse but do not save')
+
+    def handle(self, *args, **options):
+        if not (options['session'] or options['topic'] or options['user']):
+            raise CommandError('Give at least one of --session, --topic or --user')
+
+        sessions = DebateSession.objects.all()
+        if options['session']:
+            sessions = sessions.filter(id__in=options['session'])
+        if options['topic']:
+            sessions = sessions.filter(topic_id=options['topic'])
+        if options['user']:
+            sessions = sessions.filter(user__username__in=options['user'])
+
+        arguments = list(
+            Argument.objects.filter(session__in=sessions, speaker='student').order_by('id').only('id', 'session_id', 'content')
+        )
+        self.stdout.write(f"Re-grading {len(arguments)} arguments from {sessions.count()} sessions")
+
+        service = SarvamAIService()
+        regraded, failed, session_ids = 0, 0, set()
+        chunk_size = options['chunk_size']
+        for start in range(0, len(arguments), chunk_size):
+            chunk = arguments[start:start + chunk_size]
+            # Background priority: a bulk re-grade must not take quota from live debates
+            with sarvam_priority(BACKGROUND):
+                results = service.analyze_arguments([argument.content for argument in chunk],
+                                                    use_cache=options['use_cache'])
+
+            updated = []
+            for argument, result in zip(chunk, results):
+                if not result['success']:
+                    failed += 1
+                    logger.warning(f"Could not re-grade argument {argument.id}: {result.get('error')}")
+                    continue
+                for field, value in grade_from_analysis(result['analysis']).items():
+                    setattr(argument, field, value)
+                # A pending argument is scored now; its deferred analysis must not overwrite this
+                argument.analysis_status = 'completed'
+                updated.append(argument)
+                session_ids.add(argument.session_id)
+
+            if not options['dry_run']:
+                Argument.objects.bulk_update(updated, ['quality_score', 'feedback', 'logical_fallacies',
+                                                       'analysis_status'])
+            regraded += len(updated)
+            self.stdout.write(f"  {start + len(chunk)}/{len(arguments)} analysed")
+
+        if not options['dry_run']:
+            self._rescore_sessions(session_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-graded {regraded} arguments ({failed} failed){' [dry run]' if options['dry_run'] else ''}"
+        ))
+
+    def _rescore_sessions(self, session_ids):
+        """Recompute final scores of completed sessions whose arguments changed"""
+        completed = DebateSession.objects.filter(id__in=session_ids, is_completed=True).annotate(
+            avg_quality=models.Avg('arguments__quality_score', filter=models.Q(arguments__speaker='student')),
+            total_arguments=models.Count('arguments', filter=models.Q(arguments__speaker='student')),
+        )
+        with transaction.atomic():
+            for session in completed:
+                session.final_score = calculate_final_score(session.avg_quality or 0, session.total_arguments)
+                session.save(update_fields=['final_score'])
+        self.stdout.write(f"Updated final scores of {len(completed)} completed sessions")
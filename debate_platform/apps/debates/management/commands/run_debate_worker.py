@@ -0,0 +1,68 @@
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from debates.analysis import retry_pending_analyses
+from debates.jobs import requeue_stale_jobs, run_next_job
+import logging
+
+logger = logging.getLogger('debates')
+
+
+class Command(BaseCommand):
+    help = 'Run voice/text debate turns queued with ?async=1 and re-score stale deferred analyses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Turns run at once by this worker (several workers can share the queue)')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float,
+                            default=settings.DEBATE_JOB_SETTINGS['WORKER_POLL_INTERVAL'],
+                            help='Seconds an idle worker waits before checking the queue again')
+
+    def handle(self, *args, **options):
+        requeue_stale_jobs()
+        stop = threading.Event()
+        counts = {'completed': 0}
+        lock = threading.Lock()
+
+        def work():
+            try:
+                while not stop.is_set():
+                    try:
+                        ran = run_next_job()
+                    except Exception as e:
+                        logger.error(f"Debate worker error: {str(e)}", exc_info=True)
+                        ran = False
+                    if ran:
+                        with lock:
+                            counts['completed'] += 1
+                    elif options['once']:
+                        return
+                    else:
+                        stop.wait(options['poll_interval'])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work, name=f'debate-worker-{n}', daemon=True)
+                   for n in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Debate worker running {options['concurrency']} turns at a time")
+
+        next_sweep = time.monotonic() + 60
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(min(options['poll_interval'], 1.0))
+                if time.monotonic() > next_sweep:
+                    requeue_stale_jobs()  # jobs left running by a worker that died
+                    retry_pending_analyses()  # deferred scores lost with the process that owned them
+                    next_sweep = time.monotonic() + 60
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping after the turns in progress...')
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(self.style.SUCCESS(f"Debate worker ran {counts['completed']} turns"))
@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -56,6 +57,12 @@ class Argument(models.Model):
         ('counter_rebuttal', 'Counter Rebuttal'),
         ('closing', 'Closing Statement')
     ]
+
+    ANALYSIS_STATUSES = [
+        ('pending', 'Pending'),  # saved before its analysis; scored in the background
+        ('completed', 'Completed'),
+        ('failed', 'Failed')  # analysis unavailable; default scores were used
+    ]
     
     session = models.ForeignKey(DebateSession, on_delete=models.CASCADE, related_name='arguments')
     speaker = models.CharField(max_length=20, choices=SPEAKER_CHOICES)
@@ -65,9 +72,53 @@ class Argument(models.Model):
     quality_score = models.IntegerField(default=5, null=True, blank=True)
     feedback = models.TextField(blank=True)
     logical_fallacies = models.JSONField(default=list, blank=True)
+    analysis_status = models.CharField(max_length=20, choices=ANALYSIS_STATUSES, default='completed')
     
     class Meta:
         ordering = ['timestamp']
     
     def __str__(self):
         return f"{self.speaker} - {self.argument_type} ({self.session.id})"
+
+
+class DebateTurnJob(models.Model):
+    """A voice or text turn submitted with ?async=1, run by the run_debate_worker command"""
+    KIND_CHOICES = [
+        ('voice', 'Voice'),
+        ('text', 'Text')
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed')
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    session = models.ForeignKey(DebateSession, on_delete=models.CASCADE, related_name='turn_jobs')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', db_index=True)
+    argument_text = models.TextField(blank=True)
+    audio = models.FileField(upload_to='debate_turn_jobs/', null=True, blank=True)
+    base_url = models.CharField(max_length=500, blank=True)  # for absolute audio URLs built outside a request
+    defer_analysis = models.BooleanField(default=False)  # score the argument after the turn (see finish_turn)
+    events = models.JSONField(default=list, blank=True)  # finished stages, in order
+    result = models.JSONField(null=True, blank=True)  # the response the synchronous view would have sent
+    error = models.TextField(blank=True)
+    error_status = models.IntegerField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+    def __str__(self):
+        return f"{self.kind} turn {self.id} ({self.status})"
@@ -0,0 +1,7 @@
+# apps/debates/routing.py
+from django.urls import re_path
+from . import consumers
+
+websocket_urlpatterns = [
+    re_path(r'ws/debate-session/(?P<session_id>\d+)/$', consumers.DebateSessionConsumer.as_asgi()),
+]
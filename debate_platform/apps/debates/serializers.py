@@ -16,4 +16,4 @@ class ArgumentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Argument
         fields = '__all__'
-        read_only_fields = ('session', 'speaker')
+        read_only_fields = ('session', 'speaker', 'analysis_status')
@@ -1,15 +1,81 @@
+import asyncio
+import contextvars
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from django.conf import settings
+from apps.sarvam_integration.resilience import sarvam_deadline
 from apps.sarvam_integration.services import SarvamAIService
+from gamification.services import GamificationEngine
 from .models import DebateSession, Argument
 import logging
 
 logger = logging.getLogger('debates')
 
+DEFAULT_GAMIFICATION_RESULT = {
+    'total_points': 0,
+    'new_level': 'beginner',
+    'level_up': False,
+    'new_achievements': []
+}
+
+
+def grade_from_analysis(analysis: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Argument fields from Text Analytics answers, with the same defaults the debate views use"""
+    answers = {item['id']: item['response'] for item in analysis}
+    logical_issue = answers.get('logical_issues', 'No issues detected')
+    return {
+        'quality_score': answers.get('effectiveness', 5),
+        'feedback': answers.get('improvements', 'Good argument!'),
+        'logical_fallacies': [logical_issue] if logical_issue and logical_issue != 'No issues detected' else [],
+    }
+
+
+def calculate_final_score(avg_quality: float, total_arguments: int) -> float:
+    """Session score out of 100: average argument quality plus a bonus for participation"""
+    base_score = min(avg_quality * 10, 100)  # Convert 1-10 scale to 0-100
+    argument_bonus = min(total_arguments * 5, 30)  # Up to 30 bonus points
+    return min(base_score + argument_bonus, 100)
+
+
+def quality_bonus_points(quality_score) -> int:
+    """Points on top of a turn's base points for an argument scored above average"""
+    return max(0, (quality_score - 5) * 5) if isinstance(quality_score, (int, float)) else 0
+
+
+def award_turn_points(user, action: str, points: int, description: str, session) -> Dict[str, Any]:
+    """Award a turn's points, falling back to neutral defaults if gamification fails"""
+    try:
+        result = GamificationEngine.award_points(
+            user=user,
+            action=action,
+            points_override=points,
+            description=description,
+            debate_session=session
+        )
+        if not result or not result.get('success', True):
+            logger.warning("Gamification points award failed, using defaults")
+            return dict(DEFAULT_GAMIFICATION_RESULT)
+        return result
+    except Exception as gamification_error:
+        logger.error(f"Gamification error: {str(gamification_error)}")
+        return dict(DEFAULT_GAMIFICATION_RESULT)
+
+
 class MultiAgentDebateEngine:
-    """Advanced debate engine with multiple AI perspectives"""
+    """Advanced debate engine with multiple AI perspectives.
+
+    The agents run as an asyncio task graph: the opponent and the coach start
+    together and the moderator follows the opponent, whose rebuttal it
+    summarises (it is skipped when the opponent has nothing to summarise).
+    Each agent has its own timeout (DEBATE_SETTINGS['AGENT_TIMEOUTS']), which
+    is also the deadline for its Sarvam calls; an agent that fails or times out is reported in 'agents' and left out of
+    'responses', and the others still return. An agent that answered with
+    the canned fallback rebuttal is reported as 'fallback'.
+    """
     
-    def __init__(self, session: DebateSession):
+    def __init__(self, session: DebateSession, sarvam_service: Optional[SarvamAIService] = None):
         self.session = session
-        self.sarvam_service = SarvamAIService()
+        self.sarvam_service = sarvam_service or SarvamAIService()
         self.debate_agents = {
             'pro': 'AI agent arguing FOR the topic',
             'con': 'AI agent arguing AGAINST the topic', 
@@ -20,51 +86,101 @@ class MultiAgentDebateEngine:
     def generate_multi_perspective_debate(self, student_argument: str) -> dict:
         """Generate responses from multiple AI agents"""
         try:
-            responses = {}
+            responses, agents, timings = asyncio.run(self._run_agents(student_argument))
             
-            # Generate opposing argument
-            con_response = self.sarvam_service.create_debate_opponent_response(
-                self.session.topic.title,
-                student_argument,
-                stance="opposing",
-                language=self.session.language
-            )
-            
-            if con_response['success']:
-                responses['opponent'] = con_response['response']
-                
+            if 'opponent' in responses:
                 # Save AI opponent argument
                 Argument.objects.create(
                     session=self.session,
                     speaker='ai_opponent',
-                    content=con_response['response'],
+                    content=responses['opponent'],
                     argument_type='multi_agent_rebuttal'
                 )
             
-            # Generate coaching feedback
-            coach_feedback = self.sarvam_service.analyze_argument_quality(student_argument)
-            if coach_feedback['success']:
-                responses['coach'] = coach_feedback['analysis']
+            return {
+                'success': True,
+                'responses': responses,
+                'partial': any(agent['status'] != 'completed' for agent in agents.values()),
+                'agents': agents,
+                'timings': timings
+            }
             
-            # Generate moderator summary
+        except Exception as e:
+            logger.error(f"Multi-agent debate error: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    async def _run_agents(self, student_argument: str) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], Dict[str, float]]:
+        """(responses, per-agent status and timing, wall/sum time) for one student argument"""
+        from .turns import get_turn_executor  # turns imports this module
+        
+        loop = asyncio.get_running_loop()
+        timeouts = settings.DEBATE_SETTINGS['AGENT_TIMEOUTS']
+        started = time.perf_counter()
+        responses, agents = {}, {}
+        
+        async def agent(name: str, call: Callable[[], Dict[str, Any]], result_key: str) -> None:
+            agent_started = time.perf_counter()
+            # The same budget bounds the agent's Sarvam calls, so one that times out gives up its
+            # executor slot instead of running on after wait_for has stopped waiting for it
+            with sarvam_deadline(timeouts[name]):
+                context = contextvars.copy_context()
+            try:
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(get_turn_executor(), context.run, call),
+                    timeouts[name]
+                )
+                if result['success']:
+                    responses[name] = result[result_key]
+                    # A canned rebuttal served because the LLM was unavailable counts as a partial result
+                    agents[name] = {'status': 'fallback' if result.get('fallback') else 'completed'}
+                else:
+                    agents[name] = {'status': 'failed', 'error': result.get('error', 'Unknown error')}
+            except asyncio.TimeoutError:
+                logger.warning(f"Multi-agent {name} timed out after {timeouts[name]}s")
+                agents[name] = {'status': 'timed_out', 'error': f'No response within {timeouts[name]}s'}
+            except Exception as e:
+                logger.error(f"Multi-agent {name} error: {str(e)}")
+                agents[name] = {'status': 'failed', 'error': str(e)}
+            agents[name]['duration_ms'] = round((time.perf_counter() - agent_started) * 1000, 1)
+        
+        # Generate opposing argument
+        def opponent():
+            return self.sarvam_service.create_debate_opponent_response(
+                self.session.topic.title,
+                student_argument,
+                stance="opposing",
+                language=self.session.language
+            )
+        
+        # Generate moderator summary
+        async def moderator():
+            await opponent_task
+            if 'opponent' not in responses:
+                agents['moderator'] = {'status': 'skipped', 'error': 'No opponent response to summarise',
+                                       'duration_ms': 0.0}
+                return
             moderator_prompt = f"""As a debate moderator, provide a brief summary of this exchange:
             
 Student argument: {student_argument}
-AI opponent response: {responses.get('opponent', 'No response')}
+AI opponent response: {responses['opponent']}
 
 Provide neutral observations about argument quality and suggest next steps."""
             
-            moderator_response = self.sarvam_service.create_debate_opponent_response(
+            await agent('moderator', lambda: self.sarvam_service.create_debate_opponent_response(
                 "Debate Moderation",
                 moderator_prompt,
                 stance="neutral"
-            )
-            
-            if moderator_response['success']:
-                responses['moderator'] = moderator_response['response']
-            
-            return {'success': True, 'responses': responses}
-            
-        except Exception as e:
-            logger.error(f"Multi-agent debate error: {str(e)}")
-            return {'success': False, 'error': str(e)}
+            ), 'response')
+        
+        opponent_task = asyncio.create_task(agent('opponent', opponent, 'response'))
+        # Generate coaching feedback
+        coach_task = asyncio.create_task(agent(
+            'coach', lambda: self.sarvam_service.analyze_argument_quality(student_argument), 'analysis'
+        ))
+        await asyncio.gather(opponent_task, coach_task, moderator())
+        
+        timings = {
+            'wall_ms': round((time.perf_counter() - started) * 1000, 1),
+            'sum_ms': round(sum(agent['duration_ms'] for agent in agents.values()), 1)
+        }
+        return responses, agents, timings
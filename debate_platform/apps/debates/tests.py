@@ -1,3 +1,434 @@
-from django.test import TestCase
+import asyncio
+import concurrent.futures
+import csv
+import io
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+import fakeredis
+from django.conf import settings
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from debates.analysis import apply_analysis, session_group_name
+from debates.api_views import export_transcripts_view
+from debates.export import SESSION_COLUMNS, encode_rows, iterate_in_thread, parse_export_filters
+from debates.idempotency import idempotent
+from debates.jobs import claim_next_job, enqueue_turn, requeue_stale_jobs, run_job, run_next_job
+from gamification.models import PointsHistory
+from debates.models import Argument, DebateSession, DebateTopic, DebateTurnJob
+from debates.services import MultiAgentDebateEngine
+from debates.turns import StageGraph, TurnAborted
+from apps.sarvam_integration.rate_limit import BACKGROUND, current_priority
+from apps.sarvam_integration.resilience import call_timeout
 
-# Create your tests here.
+IDEMPOTENCY = {'ENABLED': True, 'RETENTION': 60, 'LOCK_TTL': 5, 'WAIT_TIMEOUT': 0.2, 'POLL_INTERVAL': 0.01}
+
+
+class StageGraphTests(SimpleTestCase):
+    def setUp(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(4)
+
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+
+    def test_stages_run_after_their_dependencies(self):
+        def stt(inputs):
+            time.sleep(0.05)
+            return 'transcript'
+
+        def analysis(inputs):
+            time.sleep(0.01)
+            return len(inputs['translate'])
+
+        graph = (StageGraph()
+                 .add('stt', stt)
+                 .add('language', lambda inputs: 'en-IN')
+                 .add('translate', lambda inputs: f"{inputs['stt']} ({inputs['language']})", after=['stt', 'language'])
+                 .add('analysis', analysis, after=['translate']))
+        finished = []
+        results, timings = graph.run(self.executor, on_stage=lambda name, result, timing: finished.append(name))
+
+        self.assertEqual(results['translate'], 'transcript (en-IN)')
+        self.assertEqual(results['analysis'], len('transcript (en-IN)'))
+        self.assertEqual(finished, ['language', 'stt', 'translate', 'analysis'])
+        self.assertEqual(timings['critical_path'], ['stt', 'translate', 'analysis'])
+        stages = timings['stages']
+        self.assertGreaterEqual(stages['translate']['start_ms'], stages['stt']['end_ms'])
+        self.assertEqual(stages['translate']['after'], ['stt', 'language'])
+
+    def test_independent_stages_overlap(self):
+        barrier = threading.Barrier(2, timeout=2)
+        graph = StageGraph().add('opponent', lambda inputs: barrier.wait()).add('coach', lambda inputs: barrier.wait())
+        results, timings = graph.run(self.executor)  # would raise BrokenBarrierError if run one after the other
+        self.assertEqual(set(results), {'opponent', 'coach'})
+        self.assertLess(timings['wall_ms'], timings['sum_ms'] + 1)
+
+    def test_abort_cancels_queued_stages_and_stops_the_graph(self):
+        executor = concurrent.futures.ThreadPoolExecutor(1)
+        ran = []
+
+        def abort(inputs):
+            raise TurnAborted('Speech recognition failed', 500)
+
+        graph = (StageGraph()
+                 .add('stt', abort)
+                 .add('recommendations', lambda inputs: ran.append('recommendations'))
+                 .add('analysis', lambda inputs: ran.append('analysis'), after=['stt']))
+        with self.assertRaises(TurnAborted) as aborted:
+            graph.run(executor)
+        executor.shutdown(wait=True)
+
+        self.assertEqual(aborted.exception.status_code, 500)
+        self.assertEqual(ran, [])  # queued behind the failed stage, so cancelled; its dependent never submitted
+
+    def test_unmet_dependencies_are_an_error(self):
+        graph = StageGraph().add('analysis', lambda inputs: None, after=['missing'])
+        with self.assertRaises(ValueError):
+            graph.run(self.executor)
+
+
+@override_settings(DEBATE_IDEMPOTENCY_SETTINGS=IDEMPOTENCY)
+class IdempotencyTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        self.user = User(pk=1, username='student')
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+        @api_view(['POST'])
+        @idempotent('text-debate', redis_client_factory=lambda: self.redis)
+        def view(request):
+            self.calls.append(request.data['argument'])
+            self.release.wait(2)
+            if request.data.get('fail'):
+                return Response({'success': False, 'error': 'upstream down'}, status=503)
+            return Response({'success': True, 'turn': len(self.calls)})
+
+        self.view = view
+
+    def post(self, data, key='turn-1'):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        request = APIRequestFactory().post('/api/text-debate/', data, format='json', **headers)
+        force_authenticate(request, user=self.user)
+        return self.view(request)
+
+    def test_repeat_replays_the_stored_response(self):
+        first = self.post({'argument': 'Homework helps'})
+        repeat = self.post({'argument': 'Homework helps'})
+
+        self.assertEqual(self.calls, ['Homework helps'])
+        self.assertEqual(repeat.status_code, 200)
+        self.assertEqual(repeat.data, first.data)
+        self.assertEqual(repeat['Idempotent-Replayed'], 'true')
+
+    def test_key_reused_for_a_different_request_is_rejected(self):
+        self.post({'argument': 'Homework helps'})
+        response = self.post({'argument': 'Homework hurts'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.calls, ['Homework helps'])
+
+    def test_repeat_during_the_first_request_gets_409(self):
+        self.release.clear()
+        first = threading.Thread(target=self.post, args=({'argument': 'Homework helps'},))
+        first.start()
+        while not self.calls:
+            time.sleep(0.01)
+
+        response = self.post({'argument': 'Homework helps'})  # waits WAIT_TIMEOUT, then gives up
+        self.release.set()
+        first.join(2)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_server_errors_are_not_stored(self):
+        self.assertEqual(self.post({'argument': 'Homework helps', 'fail': True}).status_code, 503)
+        self.assertEqual(self.post({'argument': 'Homework helps', 'fail': True}).status_code, 503)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_expired_claim_does_not_overwrite_the_new_owner(self):
+        self.release.clear()
+        first = threading.Thread(target=self.post, args=({'argument': 'Homework helps'},))
+        first.start()
+        while not self.calls:
+            time.sleep(0.01)
+
+        # The first claim expires and another request takes the key before the first one finishes
+        redis_key = 'idempotency:text-debate:1:turn-1'
+        owner = json.dumps({'state': 'in_progress', 'fingerprint': 'other', 'token': 'other-token'})
+        self.redis.set(redis_key, owner)
+        self.release.set()
+        first.join(2)
+        self.assertEqual(self.redis.get(redis_key).decode(), owner)
+
+    def test_without_a_key_every_request_runs(self):
+        self.post({'argument': 'Homework helps'}, key=None)
+        self.post({'argument': 'Homework helps'}, key=None)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.post({'argument': 'Homework helps'}, key='k' * 256).status_code, 400)
+
+
+def session_row(**values):
+    return dict(dict.fromkeys(SESSION_COLUMNS), **values)
+
+
+class ExportEncodingTests(SimpleTestCase):
+    def setUp(self):
+        self.rows = [
+            session_row(session_id=1, username='student', content='Homework, "mostly", helps\nat home',
+                        logical_fallacies=['ad hominem'], timestamp=datetime(2026, 5, 1, 9, 30, tzinfo=timezone.utc)),
+            session_row(session_id=2, username='student'),  # a session without arguments
+        ]
+
+    def test_ndjson_is_one_json_object_per_row(self):
+        lines = ''.join(encode_rows(self.rows, 'sessions', 'ndjson')).splitlines()
+        self.assertEqual(len(lines), 2)
+        first = json.loads(lines[0])
+        self.assertEqual(list(first), list(SESSION_COLUMNS))
+        self.assertEqual(first['logical_fallacies'], ['ad hominem'])
+        self.assertEqual(first['timestamp'], '2026-05-01T09:30:00Z')
+        self.assertIsNone(json.loads(lines[1])['content'])
+
+    def test_csv_has_a_header_and_quotes_text(self):
+        records = list(csv.reader(io.StringIO(''.join(encode_rows(self.rows, 'sessions', 'csv')))))
+        self.assertEqual(records[0], list(SESSION_COLUMNS))
+        first = dict(zip(records[0], records[1]))
+        self.assertEqual(first['content'], 'Homework, "mostly", helps\nat home')
+        self.assertEqual(first['logical_fallacies'], '["ad hominem"]')
+        self.assertEqual(first['analysis_status'], '')
+        self.assertEqual(len(records), 3)
+
+    def test_rows_are_yielded_in_chunks(self):
+        rows = [session_row(session_id=index) for index in range(5)]
+        chunks = list(encode_rows(rows, 'sessions', 'ndjson', rows_per_chunk=2))
+        self.assertEqual([chunk.count('\n') for chunk in chunks], [2, 2, 1])
+
+    def test_async_iteration_yields_every_chunk(self):
+        async def collect():
+            return [chunk async for chunk in iterate_in_thread(encode_rows(self.rows, 'sessions', 'csv'))]
+
+        self.assertEqual(asyncio.run(collect()), list(encode_rows(self.rows, 'sessions', 'csv')))
+
+    def test_filters_are_validated(self):
+        room_id = uuid.uuid4()
+        self.assertEqual(parse_export_filters('sessions', '12', '3'), (12, 3))
+        self.assertEqual(parse_export_filters('rooms', str(room_id), None), (room_id, None))
+        for source, session_id, topic_id in [('sessions', 'abc', None), ('rooms', '12', None), ('sessions', None, 'x')]:
+            with self.assertRaises(ValueError):
+                parse_export_filters(source, session_id, topic_id)
+
+    def test_bad_filter_is_a_400(self):
+        request = APIRequestFactory().get('/api/export/transcripts/', {'source': 'rooms', 'session': '12'})
+        force_authenticate(request, user=User(pk=1, username='student'))
+        response = export_transcripts_view(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'session must be a room UUID')
+
+
+def fake_text_turn_graph(sarvam_service, argument_text, session_language, topic, analyze=True):
+    """The text turn's stages with canned results instead of Sarvam calls"""
+    graph = (StageGraph()
+             .add('opponent_response', lambda inputs: 'Homework builds discipline.')
+             .add('translate_argument', lambda inputs: argument_text)
+             .add('translate_response', lambda inputs: inputs['opponent_response'], after=['opponent_response'])
+             .add('text_to_speech', lambda inputs: {'success': False}, after=['opponent_response']))
+    if analyze:
+        graph.add('analysis', lambda inputs: {'quality_score': 8, 'feedback': 'Clear', 'logical_fallacies': [],
+                                              'analysis_status': 'completed'})
+    return graph
+
+
+@mock.patch('debates.jobs.SarvamAIService', mock.Mock)
+@mock.patch('debates.jobs.text_turn_graph', fake_text_turn_graph)
+class TurnJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student')
+        topic = DebateTopic.objects.create(title='Homework', description='Should homework be banned?',
+                                           difficulty_level='beginner', age_group='10-12')
+        self.session = DebateSession.objects.create(user=self.user, topic=topic)
+
+    def enqueue(self, text='Homework is stressful', defer_analysis=False):
+        return enqueue_turn('text', self.user, self.session, argument_text=text, defer_analysis=defer_analysis)
+
+    def test_claims_the_oldest_job_once(self):
+        first, second = self.enqueue(), self.enqueue()
+
+        claimed = claim_next_job()
+        self.assertEqual((claimed.id, claimed.status, claimed.attempts), (first.id, 'running', 1))
+        self.assertEqual(claim_next_job().id, second.id)
+        self.assertIsNone(claim_next_job())
+
+    def test_worker_runs_a_turn_and_records_its_stages(self):
+        job = self.enqueue()
+        self.assertTrue(run_next_job())
+        self.assertFalse(run_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.result['feedback']['score'], 8)
+        self.assertEqual({event['stage'] for event in job.events},
+                         {'opponent_response', 'translate_argument', 'translate_response', 'text_to_speech', 'analysis'})
+        self.assertEqual(Argument.objects.filter(session=self.session).count(), 2)
+
+    def test_stale_jobs_are_requeued_without_their_old_events(self):
+        retry, exhausted = self.enqueue(), self.enqueue()
+        DebateTurnJob.objects.filter(id=retry.id).update(attempts=1)
+        DebateTurnJob.objects.filter(id=exhausted.id).update(attempts=2)
+        DebateTurnJob.objects.update(status='running', events=[{'stage': 'opponent_response'}],
+                                     started_at=datetime.now(timezone.utc) - timedelta(hours=1))
+
+        with self.assertLogs('debates', 'WARNING'):
+            self.assertEqual(requeue_stale_jobs(), 1)
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((retry.status, retry.events), ('queued', []))
+        self.assertEqual((exhausted.status, exhausted.error_status), ('failed', 500))
+
+    def test_attempt_taken_over_by_a_retry_saves_nothing(self):
+        self.enqueue()
+        job = claim_next_job()
+        # A stale requeue handed the job to another worker while this attempt was still running
+        DebateTurnJob.objects.filter(id=job.id).update(attempts=2)
+
+        with self.assertLogs('debates', 'WARNING'):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'running')
+        self.assertFalse(Argument.objects.filter(session=self.session).exists())
+
+    def test_a_failing_turn_leaves_no_arguments_behind(self):
+        self.enqueue()
+        job = claim_next_job()
+        with mock.patch('debates.turns.award_turn_points', side_effect=RuntimeError('database went away')), \
+                self.assertLogs('debates', 'ERROR'):
+            run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error_status), ('failed', 500))
+        self.assertFalse(Argument.objects.filter(session=self.session).exists())
+
+
+class SlowSarvamService:
+    """Records the time each agent's Sarvam call would be allowed; the opponent stalls past its timeout"""
+    def __init__(self):
+        self.budgets = {}
+        self.finished = threading.Event()
+
+    def create_debate_opponent_response(self, topic, student_argument, stance='opposing', language='en-IN'):
+        time.sleep(0.3)
+        self.budgets['opponent'] = call_timeout('llm')  # what a retry after the stall would get
+        self.finished.set()
+        return {'success': True, 'response': 'Homework builds discipline.'}
+
+    def analyze_argument_quality(self, argument_text):
+        self.budgets['coach'] = call_timeout('llm')
+        return {'success': True, 'analysis': []}
+
+
+@override_settings(DEBATE_SETTINGS=dict(settings.DEBATE_SETTINGS,
+                                        AGENT_TIMEOUTS={'opponent': 0.1, 'coach': 5, 'moderator': 5}))
+class MultiAgentDeadlineTests(SimpleTestCase):
+    def test_agent_calls_run_under_the_agents_timeout(self):
+        service = SlowSarvamService()
+        session = DebateSession(topic=DebateTopic(title='Homework'), language='en-IN')
+        with self.assertLogs('debates', 'WARNING'):
+            responses, agents, _ = asyncio.run(MultiAgentDebateEngine(session, service)._run_agents('Homework is stressful'))
+
+        self.assertEqual(agents['opponent']['status'], 'timed_out')
+        self.assertEqual(agents['moderator']['status'], 'skipped')
+        self.assertLessEqual(service.budgets['coach'], 5)
+        self.assertTrue(service.finished.wait(2))
+        self.assertLessEqual(service.budgets['opponent'], 0)  # its deadline had passed, so further calls stop
+
+
+@mock.patch('debates.jobs.SarvamAIService', mock.Mock)
+@mock.patch('debates.jobs.text_turn_graph', fake_text_turn_graph)
+class DeferredAnalysisTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student')
+        topic = DebateTopic.objects.create(title='Homework', description='Should homework be banned?',
+                                           difficulty_level='beginner', age_group='10-12')
+        self.session = DebateSession.objects.create(user=self.user, topic=topic)
+        self.layer = InMemoryChannelLayer()
+        self.channel = async_to_sync(self.layer.new_channel)()
+        async_to_sync(self.layer.group_add)(session_group_name(self.session.id), self.channel)
+
+    def run_deferred_turn(self):
+        enqueue_turn('text', self.user, self.session, argument_text='Homework is stressful', defer_analysis=True)
+        with mock.patch('debates.turns.defer_analysis') as defer, self.captureOnCommitCallbacks(execute=True):
+            run_next_job()
+        argument = Argument.objects.get(session=self.session, speaker='student')
+        defer.assert_called_once_with(argument.id, 'Homework is stressful')
+        return argument
+
+    def test_queued_turn_honours_defer_analysis(self):
+        argument = self.run_deferred_turn()
+        job = DebateTurnJob.objects.get()
+        self.assertEqual((argument.analysis_status, argument.quality_score), ('pending', None))
+        self.assertEqual(job.result['feedback']['status'], 'pending')
+        self.assertNotIn('analysis', {event['stage'] for event in job.events})
+
+    def test_quality_bonus_is_awarded_once(self):
+        argument = self.run_deferred_turn()
+        grade = {'quality_score': 9, 'feedback': 'Well supported', 'logical_fallacies': [], 'analysis_status': 'completed'}
+        with mock.patch('debates.analysis.get_channel_layer', return_value=self.layer):
+            self.assertTrue(apply_analysis(argument.id, grade))
+            with self.assertLogs('debates', 'INFO'):
+                self.assertFalse(apply_analysis(argument.id, dict(grade, quality_score=10)))
+
+        argument.refresh_from_db()
+        self.assertEqual((argument.analysis_status, argument.quality_score), ('completed', 9))
+        self.assertEqual(PointsHistory.objects.filter(user=self.user, action='high_quality_argument').count(), 1)
+
+        event = async_to_sync(self.layer.receive)(self.channel)
+        self.assertEqual(event['type'], 'argument_analyzed')
+        self.assertEqual(event['argument']['id'], argument.id)
+        self.assertEqual(event['feedback']['score'], 9)
+        self.assertGreater(event['quality_bonus'], 0)
+        self.user.userprofile.refresh_from_db()
+        self.assertEqual(event['user_total_points'], self.user.userprofile.total_points)
+
+
+class RegradeSarvamService:
+    """Scores every argument 8, remembering the priority each batch ran at"""
+    priorities = []
+
+    def analyze_arguments(self, argument_texts, use_cache=None):
+        self.priorities.append(current_priority())
+        return [{'success': True, 'analysis': [{'id': 'effectiveness', 'response': 8}]} for _ in argument_texts]
+
+
+@mock.patch('debates.management.commands.regrade_arguments.SarvamAIService', RegradeSarvamService)
+class RegradeArgumentsTests(TestCase):
+    def setUp(self):
+        RegradeSarvamService.priorities = []
+        user = User.objects.create_user('student')
+        topic = DebateTopic.objects.create(title='Homework', description='Should homework be banned?',
+                                           difficulty_level='beginner', age_group='10-12')
+        self.session = DebateSession.objects.create(user=user, topic=topic)
+        self.pending = Argument.objects.create(session=self.session, speaker='student', content='Homework hurts',
+                                               argument_type='opening', quality_score=None, analysis_status='pending')
+        Argument.objects.create(session=self.session, speaker='student', content='Homework helps',
+                                argument_type='rebuttal', quality_score=3)
+
+    def test_regrade_runs_in_the_background_and_settles_pending_arguments(self):
+        call_command('regrade_arguments', session=[self.session.id], chunk_size=1, stdout=io.StringIO())
+
+        self.assertEqual(RegradeSarvamService.priorities, [BACKGROUND, BACKGROUND])
+        self.assertEqual(set(Argument.objects.values_list('quality_score', 'analysis_status')), {(8, 'completed')})
+
+        # The argument's own deferred analysis arriving later no longer overwrites the re-grade
+        with self.assertLogs('debates', 'INFO'):
+            self.assertFalse(apply_analysis(self.pending.id, {'quality_score': 2, 'feedback': '', 'logical_fallacies': [],
+                                                              'analysis_status': 'completed'}))
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.quality_score, 8)
@@ -0,0 +1,410 @@
+import concurrent.futures
+import contextvars
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from django.conf import settings
+from django.db import transaction
+from apps.sarvam_integration.services import SarvamAIService
+from .analysis import defer_analysis, grade_argument
+from .models import Argument
+from .serializers import ArgumentSerializer
+from .services import award_turn_points, quality_bonus_points
+import logging
+
+logger = logging.getLogger('debates')
+
+# Per-kind differences in how a finished turn is saved, scored and reported
+TURN_TYPES = {
+    'voice': {
+        'argument_type': 'voice_argument',
+        'rebuttal_type': 'voice_rebuttal',
+        'action': 'voice_debate',
+        'base_points': 20,
+        'label': 'Voice',
+        'points_label': 'Voice Debate (Base)',
+        'student_text_key': 'student_transcript',
+    },
+    'text': {
+        'argument_type': 'text_argument',
+        'rebuttal_type': 'text_rebuttal',
+        'action': 'argument_submitted',
+        'base_points': 15,  # Slightly less than voice debate
+        'label': 'Text',
+        'points_label': 'Text Argument (Base)',
+        'student_text_key': 'student_argument_text',
+    },
+}
+
+# What a deferred-analysis argument is saved with until its score lands
+PENDING_GRADE = {'quality_score': None, 'feedback': '', 'logical_fallacies': [], 'analysis_status': 'pending'}
+
+class TurnAborted(Exception):
+    """A stage failed in a way that ends the turn; carries the error response to send"""
+
+    def __init__(self, error: str, status_code: int):
+        self.error = error
+        self.status_code = status_code
+        super().__init__(error)
+
+
+class StageGraph:
+    """Stages of a debate turn, run as a dependency graph on a bounded thread pool.
+
+    Each stage starts as soon as the stages it depends on have finished, so the
+    turn takes as long as its critical path rather than the sum of its stages.
+    Stages run in a copy of the caller's context (Sarvam priority, deadline and
+    metrics breakdown) and must not use the ORM: rows are saved afterwards, in
+    turn order, by the caller.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name: str, func: Callable[[Dict[str, Any]], Any], after: Iterable[str] = ()) -> 'StageGraph':
+        """func receives the results of the stages it runs after, by name"""
+        self.stages[name] = (tuple(after), func)
+        return self
+
+    def run(self, executor: concurrent.futures.Executor = None,
+            on_stage: Callable[[str, Any, Dict[str, Any]], None] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """on_stage(name, result, timing) is called in this thread as each stage finishes"""
+        executor = executor or get_turn_executor()
+        results, stages, pending, running = {}, {}, dict(self.stages), {}
+        started = time.perf_counter()
+
+        def elapsed_ms() -> float:
+            return round((time.perf_counter() - started) * 1000, 1)
+
+        def submit_ready() -> None:
+            for name, (after, func) in list(pending.items()):
+                if all(dependency in results for dependency in after):
+                    del pending[name]
+                    stages[name] = {'after': list(after), 'start_ms': elapsed_ms()}
+                    inputs = {dependency: results[dependency] for dependency in after}
+                    running[executor.submit(contextvars.copy_context().run, func, inputs)] = name
+
+        submit_ready()
+        try:
+            while running:
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    stages[name]['end_ms'] = elapsed_ms()
+                    stages[name]['duration_ms'] = round(stages[name]['end_ms'] - stages[name]['start_ms'], 1)
+                    results[name] = future.result()  # TurnAborted and other errors end the turn here
+                    if on_stage:
+                        on_stage(name, results[name], stages[name])
+                submit_ready()
+        except BaseException:
+            # Nothing further is submitted; stages still queued behind other turns are dropped
+            # (those already running can't be interrupted and finish unobserved)
+            for future in running:
+                future.cancel()
+            raise
+        if pending:
+            raise ValueError(f"Stages with unmet dependencies: {sorted(pending)}")
+
+        return results, {
+            'wall_ms': elapsed_ms(),
+            'sum_ms': round(sum(stage['duration_ms'] for stage in stages.values()), 1),
+            'critical_path': critical_path(stages),
+            'stages': stages,
+        }
+
+
+def critical_path(stages: Dict[str, Dict[str, Any]]) -> list:
+    """The chain of stages that determined the wall time (last to finish, back through its latest dependency)"""
+    if not stages:
+        return []
+    path = [max(stages, key=lambda name: stages[name]['end_ms'])]
+    while stages[path[-1]]['after']:
+        path.append(max(stages[path[-1]]['after'], key=lambda name: stages[name]['end_ms']))
+    return path[::-1]
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_turn_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Process-wide pool bounding how many turn stages run at once"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=settings.DEBATE_SETTINGS['TURN_STAGE_WORKERS'], thread_name_prefix='debate-turn'
+                )
+    return _executor
+
+
+# Work shared by the voice and text turns
+def detect_argument_language(sarvam_service: SarvamAIService, text: str, session_language: str) -> str:
+    logger.info("Detecting language of the argument")
+    result = sarvam_service.detect_language(text, expected_language=session_language)
+    if result['success']:
+        logger.info(f"Detected language: {result.get('language_code', 'en-IN')}")
+        return result.get('language_code', 'en-IN')
+    logger.warning(f"Language detection failed: {result.get('error')}")
+    return 'en-IN'  # Default fallback
+
+
+def opponent_failed(result: Dict[str, Any]) -> TurnAborted:
+    logger.error(f"AI response generation failed: {result.get('error')}")
+    return TurnAborted(f"AI response generation failed: {result.get('error', 'Unknown error')}", 503)
+
+
+def voice_turn_graph(sarvam_service: SarvamAIService, audio_file, session_language: str, topic: str,
+                     analyze: bool = True) -> StageGraph:
+    """STT, then analysis alongside detect -> translate -> opponent -> translate -> TTS.
+
+    Translation is skipped for English, and the opponent answers the
+    translated transcript in the detected language. Without analyze the
+    analysis stage is left out (see finish_turn).
+    """
+    def speech_to_text(inputs):
+        result = sarvam_service.speech_to_text(audio_file, language_code=session_language)
+        if not result['success']:
+            logger.error(f"STT failed: {result.get('error', 'Unknown error')}")
+            raise TurnAborted(f"Speech recognition failed: {result.get('error', 'Unknown error')}", 400)
+        logger.info(f"Speech transcribed successfully: {len(result['transcript'])} characters")
+        return result['transcript']
+
+    def translate(source: str):
+        def stage(inputs):
+            if inputs['detect_language'] == 'en-IN':
+                return inputs[source]
+            return sarvam_service.translate_text(
+                text=inputs[source], target_language=inputs['detect_language']
+            )['translated_text']
+        return stage
+
+    def opponent(inputs):
+        result = sarvam_service.create_debate_opponent_response(
+            topic=topic,
+            student_argument=inputs['translate_argument'],
+            stance="opposing",
+            language=inputs['detect_language']
+        )
+        if not result['success']:
+            raise opponent_failed(result)
+        return result['response']
+
+    def text_to_speech(inputs):
+        return sarvam_service.text_to_speech(text=inputs['translate_response'], language=inputs['detect_language'])
+
+    graph = (
+        StageGraph()
+        .add('speech_to_text', speech_to_text)
+        .add('detect_language', lambda inputs: detect_argument_language(
+            sarvam_service, inputs['speech_to_text'], session_language), after=['speech_to_text'])
+        .add('translate_argument', translate('speech_to_text'), after=['speech_to_text', 'detect_language'])
+        .add('opponent_response', opponent, after=['translate_argument', 'detect_language'])
+        .add('translate_response', translate('opponent_response'), after=['opponent_response', 'detect_language'])
+        .add('text_to_speech', text_to_speech, after=['translate_response', 'detect_language'])
+    )
+    if analyze:
+        graph.add('analysis', lambda inputs: grade_argument(sarvam_service, inputs['speech_to_text']),
+                  after=['speech_to_text'])
+    return graph
+
+
+def text_turn_graph(sarvam_service: SarvamAIService, argument_text: str, session_language: str, topic: str,
+                    on_delta: Optional[Callable[[str], None]] = None, analyze: bool = True) -> StageGraph:
+    """Analysis, language detection and the opponent response all start at once.
+
+    The opponent answers the original text in the session's language; both
+    texts are then translated to the detected language, and the reply is
+    voiced in the session's language. With on_delta, the opponent response
+    is streamed and each piece is passed to on_delta as it arrives. Without
+    analyze the analysis stage is left out (see finish_turn).
+    """
+    def translate(source: str):
+        def stage(inputs):
+            text = argument_text if source == 'argument' else inputs[source]
+            return sarvam_service.translate_text(text=text, target_language=inputs['detect_language'])['translated_text']
+        return stage
+
+    def opponent(inputs):
+        if on_delta is not None:
+            parts = []
+            for delta in sarvam_service.stream_debate_opponent_response(
+                topic=topic,
+                student_argument=argument_text,
+                stance="opposing",
+                language=session_language
+            ):
+                parts.append(delta)
+                on_delta(delta)
+            return ''.join(parts)
+
+        result = sarvam_service.create_debate_opponent_response(
+            topic=topic,
+            student_argument=argument_text,
+            stance="opposing",
+            language=session_language
+        )
+        if not result['success']:
+            raise opponent_failed(result)
+        return result['response']
+
+    def text_to_speech(inputs):
+        return sarvam_service.text_to_speech(text=inputs['translate_response'], language=session_language)
+
+    graph = (
+        StageGraph()
+        .add('detect_language', lambda inputs: detect_argument_language(sarvam_service, argument_text, session_language))
+        .add('opponent_response', opponent)
+        .add('translate_argument', translate('argument'), after=['detect_language'])
+        .add('translate_response', translate('opponent_response'), after=['opponent_response', 'detect_language'])
+        .add('text_to_speech', text_to_speech, after=['translate_response'])
+    )
+    if analyze:
+        graph.add('analysis', lambda inputs: grade_argument(sarvam_service, argument_text))
+    return graph
+
+
+def finish_turn(kind: str, user, session, student_text: str, results: Dict[str, Any], timings: Dict[str, Any],
+                absolute_uri: Callable[[str], str]) -> Dict[str, Any]:
+    """Save both arguments in turn order, award points and build the turn's response data.
+
+    When the graph ran without its analysis stage the student's argument is
+    saved with a pending score and analysed once the turn has been committed;
+    the quality bonus is then awarded by analysis.apply_analysis.
+    """
+    turn_type = TURN_TYPES[kind]
+    deferred = 'analysis' not in results
+    grade = PENDING_GRADE if deferred else results['analysis']
+    quality_score = grade['quality_score']
+
+    student_argument = Argument.objects.create(
+        session=session,
+        speaker='student',
+        content=results['translate_argument'],
+        argument_type=turn_type['argument_type'],
+        quality_score=quality_score,
+        feedback=grade['feedback'],
+        logical_fallacies=grade['logical_fallacies'],
+        analysis_status=grade['analysis_status'],
+    )
+    if deferred:
+        transaction.on_commit(lambda: defer_analysis(student_argument.id, student_text))
+    ai_argument = Argument.objects.create(
+        session=session,
+        speaker='ai_opponent',
+        content=results['translate_response'],
+        argument_type=turn_type['rebuttal_type']
+    )
+
+    ai_audio_url = None
+    if results['text_to_speech']['success']:
+        ai_audio_url = absolute_uri(results['text_to_speech']['audio_url'])
+        logger.info("AI response converted to speech successfully")
+
+    base_points = turn_type['base_points']
+    bonus_points = quality_bonus_points(quality_score)
+    gamification_result = award_turn_points(
+        user, turn_type['action'], base_points + bonus_points,
+        f'{turn_type["label"]} argument in "{session.topic.title}"'
+        + ('' if deferred else f' (Quality: {quality_score}/10)'), session
+    )
+
+    return {
+        'success': True,
+        turn_type['student_text_key']: student_text,
+        'ai_response_text': results['opponent_response'],
+        'ai_response_audio_url': ai_audio_url,
+        'feedback': {
+            'text': grade['feedback'],
+            'score': quality_score,
+            'fallacies': grade['logical_fallacies'],
+            'status': grade['analysis_status']
+        },
+        'gamification': {
+            'points_breakdown': [
+                {'action': turn_type['points_label'], 'points': base_points},
+                {'action': 'Quality Bonus', 'points': 'pending' if deferred else bonus_points}
+            ],
+            'user_total_points': gamification_result.get('total_points', 0),
+            'current_level': gamification_result.get('new_level', 'beginner'),
+            'level_up': gamification_result.get('level_up', False),
+            'achievements_unlocked': [
+                {'name': ach.name, 'description': ach.description}
+                for ach in gamification_result.get('new_achievements', [])
+            ]
+        },
+        'arguments': {
+            'student': ArgumentSerializer(student_argument).data,
+            'ai_opponent': ArgumentSerializer(ai_argument).data
+        },
+        'timings': timings
+    }
+
+
+def stage_progress(name: str, result: Any, absolute_uri: Callable[[str], str]) -> Dict[str, Any]:
+    """The client-facing part of a finished stage's result, for progress events"""
+    if name == 'speech_to_text':
+        return {'transcript': result}
+    if name == 'detect_language':
+        return {'language': result}
+    if name == 'analysis':
+        return {'feedback': {
+            'text': result['feedback'], 'score': result['quality_score'], 'fallacies': result['logical_fallacies']
+        }}
+    if name == 'opponent_response':
+        return {'ai_response_text': result}
+    if name == 'text_to_speech':
+        return {'ai_response_audio_url': absolute_uri(result['audio_url']) if result['success'] else None}
+    return {}
+
+
+def iter_turn_events(build_graph: Callable[[Callable[[str], None]], StageGraph],
+                     absolute_uri: Callable[[str], str]) -> Iterator[Tuple[str, Any]]:
+    """Run a turn's graph in the background and yield its progress as it happens.
+
+    build_graph(on_delta) returns the graph. Yields ('rebuttal_delta', {'text'})
+    for each streamed piece of the rebuttal and ('stage', {...}) for each
+    finished stage, then ('done', (results, timings)); stage errors are re-raised.
+    """
+    events = queue.Queue()
+
+    def on_delta(text):
+        events.put(('rebuttal_delta', {'text': text}))
+
+    def on_stage(name, result, timing):
+        events.put(('stage', {'stage': name, 'ms': timing['duration_ms'], 'data': stage_progress(name, result, absolute_uri)}))
+
+    def run():
+        try:
+            events.put(('done', build_graph(on_delta).run(on_stage=on_stage)))
+        except Exception as e:
+            events.put(('error', e))
+
+    threading.Thread(target=contextvars.copy_context().run, args=(run,), name='debate-turn-stream', daemon=True).start()
+    while True:
+        kind, payload = events.get()
+        if kind == 'error':
+            raise payload
+        yield kind, payload
+        if kind == 'done':
+            return
+
+
+def run_in_context(iterator: Iterator[Any], context: contextvars.Context) -> Iterator[Any]:
+    """Advance an iterator inside a context captured earlier.
+
+    A streamed response is read after its view has returned, so the view's
+    Sarvam priority and deadline would otherwise no longer apply.
+    """
+    try:
+        while True:
+            try:
+                item = context.run(next, iterator)
+            except StopIteration:
+                return
+            yield item
+    finally:
+        if hasattr(iterator, 'close'):
+            context.run(iterator.close)
@@ -3,6 +3,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.db import transaction
 from django.utils import timezone
+from apps.sarvam_integration.rate_limit import BACKGROUND, sarvam_priority
 from apps.sarvam_integration.services import SarvamAIService
 from gamification.services import GamificationEngine
 from .models import (
@@ -139,8 +140,9 @@ class AILearningEngine:
                 }
             ]
             
-            # Try to get AI recommendations
-            ai_response = self.sarvam_service.text_analytics(context, questions)
+            # Background priority: shed under quota pressure (fallbacks below) rather than slow live debates
+            with sarvam_priority(BACKGROUND):
+                ai_response = self.sarvam_service.text_analytics(context, questions)
             
             if ai_response['success']:
                 # Parse AI response into structured recommendations
@@ -3,6 +3,8 @@ from django.urls import path
 from .api_views import (
     create_debate_room,
     get_debate_room,
+    get_message_audio,
+    list_room_messages,
     list_user_debate_rooms,
     test_streaming_tts
 )
@@ -10,6 +12,8 @@ from .api_views import (
 urlpatterns = [
     path('create-room/', create_debate_room, name='create-realtime-debate-room'),
     path('room/<uuid:room_id>/', get_debate_room, name='get-realtime-debate-room'),
+    path('room/<uuid:room_id>/messages/', list_room_messages, name='list-realtime-debate-messages'),
+    path('room/<uuid:room_id>/audio/<int:message_id>/', get_message_audio, name='get-realtime-message-audio'),
     path('rooms/', list_user_debate_rooms, name='list-realtime-debate-rooms'),
     path('test-streaming/', test_streaming_tts, name='test-streaming-tts'),
 ]
@@ -3,15 +3,42 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.db.models import Q
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
+from django.urls import reverse
 from .models import RealtimeDebateRoom, RealtimeDebateMessage
 from .services import StreamingDebateManager
+from .archive import RoomAudioArchive, CONTENT_TYPES
 from debates.models import DebateTopic
+import base64
 import uuid
 import logging
 
 logger = logging.getLogger('realtime_debate')
 
+MESSAGE_PAGE_SIZE = 20
+MAX_MESSAGE_PAGE_SIZE = 100
+
+
+def encode_message_cursor(message) -> str:
+    """Opaque keyset cursor for a message's (timestamp, id) position"""
+    raw = f'{message.timestamp.isoformat()}|{message.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_message_cursor(cursor: str):
+    """Inverse of encode_message_cursor; raises ValueError on malformed input"""
+    try:
+        timestamp, _, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition('|')
+        parsed = parse_datetime(timestamp)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if parsed is None or not message_id.isdigit():
+        raise ValueError('Invalid cursor')
+    return parsed, int(message_id)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_debate_room(request):
@@ -102,11 +129,6 @@ def get_debate_room(request, room_id):
     try:
         room = get_object_or_404(RealtimeDebateRoom, id=room_id, user=request.user)
         
-        # Get recent messages with streaming info
-        recent_messages = RealtimeDebateMessage.objects.filter(
-            room=room
-        ).order_by('-timestamp')[:10]
-        
         # Get streaming manager for session data
         streaming_manager = StreamingDebateManager()
         session_data = streaming_manager.get_session_data(str(room.id))
@@ -140,7 +162,56 @@ def get_debate_room(request, room_id):
                 'streaming_enabled': True
             },
             'session_data': session_data,
-            'recent_messages': [
+            'messages_url': reverse('list-realtime-debate-messages', args=[room.id])
+        })
+        
+    except Exception as e:
+        logger.error(f'Error getting debate room: {str(e)}')
+        return Response({
+            'success': False,
+            'error': 'Failed to get debate room'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_room_messages(request, room_id):
+    """Page backwards through a room's messages using a (timestamp, id) keyset cursor"""
+    try:
+        room = get_object_or_404(RealtimeDebateRoom.objects.only('id', 'user_id'), id=room_id, user=request.user)
+        
+        try:
+            limit = min(max(int(request.GET.get('limit', MESSAGE_PAGE_SIZE)), 1), MAX_MESSAGE_PAGE_SIZE)
+        except ValueError:
+            limit = MESSAGE_PAGE_SIZE
+        
+        messages = RealtimeDebateMessage.objects.filter(room_id=room.id).only(
+            'id', 'speaker', 'text_content', 'timestamp', 'turn_number', 'is_streamed',
+            'streaming_completed', 'stream_chunk_count', 'processing_time'
+        ).order_by('-timestamp', '-id')
+        
+        before = request.GET.get('before')
+        if before:
+            try:
+                before_timestamp, before_id = decode_message_cursor(before)
+            except ValueError:
+                return Response({
+                    'success': False,
+                    'error': 'Invalid cursor'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            messages = messages.filter(
+                Q(timestamp__lt=before_timestamp) | Q(timestamp=before_timestamp, id__lt=before_id)
+            )
+        
+        # One extra row tells us whether an older page exists
+        page = list(messages[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        
+        archived_message_ids = RoomAudioArchive(room.id).message_ids() if page else set()
+        
+        return Response({
+            'success': True,
+            'messages': [
                 {
                     'id': msg.id,
                     'speaker': msg.speaker,
@@ -150,16 +221,85 @@ def get_debate_room(request, room_id):
                     'is_streamed': msg.is_streamed,
                     'streaming_completed': msg.streaming_completed,
                     'stream_chunk_count': msg.stream_chunk_count,
-                    'processing_time': msg.processing_time
-                } for msg in reversed(recent_messages)
-            ]
+                    'processing_time': msg.processing_time,
+                    'audio_url': reverse(
+                        'get-realtime-message-audio', args=[room.id, msg.id]
+                    ) if msg.id in archived_message_ids else None
+                } for msg in reversed(page)
+            ],
+            'has_more': has_more,
+            'next_cursor': encode_message_cursor(page[-1]) if has_more else None
         })
         
+    except Http404:
+        raise
     except Exception as e:
-        logger.error(f'Error getting debate room: {str(e)}')
+        logger.error(f'Error listing debate room messages: {str(e)}')
         return Response({
             'success': False,
-            'error': 'Failed to get debate room'
+            'error': 'Failed to get debate room messages'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_message_audio(request, room_id, message_id):
+    """Serve archived audio for a debate message, honouring HTTP Range requests"""
+    try:
+        room = get_object_or_404(RealtimeDebateRoom, id=room_id, user=request.user)
+        archive = RoomAudioArchive(room.id)
+        record = archive.lookup(message_id)
+        
+        if not record:
+            return Response({
+                'success': False,
+                'error': 'No archived audio for this message'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        length = record[3]
+        content_type = CONTENT_TYPES[record[4]]
+        range_header = request.headers.get('Range', '')
+        
+        if not range_header.startswith('bytes='):
+            response = HttpResponse(archive.read(record), content_type=content_type)
+            response['Accept-Ranges'] = 'bytes'
+            response['Content-Length'] = length
+            return response
+        
+        # Single byte range: "bytes=start-end", "bytes=start-" or "bytes=-suffix"
+        try:
+            first, _, last = range_header[len('bytes='):].split(',')[0].strip().partition('-')
+            if first:
+                start = int(first)
+                end = int(last) if last else length - 1
+            else:
+                start = max(0, length - int(last))
+                end = length - 1
+        except ValueError:
+            start, end = length, length - 1
+        
+        if start >= length or start > end:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{length}'
+            return response
+        
+        end = min(end, length - 1)
+        response = HttpResponse(
+            archive.read(record, start, end),
+            content_type=content_type,
+            status=status.HTTP_206_PARTIAL_CONTENT
+        )
+        response['Accept-Ranges'] = 'bytes'
+        response['Content-Range'] = f'bytes {start}-{end}/{length}'
+        response['Content-Length'] = end - start + 1
+        return response
+        
+    except Http404:
+        raise
+    except Exception as e:
+        logger.error(f'Error serving message audio: {str(e)}')
+        return Response({
+            'success': False,
+            'error': 'Failed to get message audio'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
@@ -0,0 +1,181 @@
+# apps/realtime_debate/archive.py
+import mmap
+import queue
+import struct
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+from django.conf import settings
+import logging
+
+logger = logging.getLogger('realtime_debate')
+
+# One fixed-size index record per archived blob: message_id, segment, offset, length, codec
+INDEX_RECORD = struct.Struct('<qIQIB')
+
+CODEC_UNKNOWN = 0
+CODEC_WAV = 1
+CODEC_WEBM = 2
+CODEC_MPEG = 3
+CODEC_OGG = 4
+
+CONTENT_TYPES = {
+    CODEC_UNKNOWN: 'application/octet-stream',
+    CODEC_WAV: 'audio/wav',
+    CODEC_WEBM: 'audio/webm',
+    CODEC_MPEG: 'audio/mpeg',
+    CODEC_OGG: 'audio/ogg',
+}
+
+
+def sniff_codec(audio: bytes) -> int:
+    """Identify the container from its magic bytes"""
+    if audio[:4] == b'RIFF' and audio[8:12] == b'WAVE':
+        return CODEC_WAV
+    if audio[:4] == b'\x1aE\xdf\xa3':
+        return CODEC_WEBM
+    if audio[:4] == b'OggS':
+        return CODEC_OGG
+    if audio[:3] == b'ID3' or audio[:2] in (b'\xff\xfb', b'\xff\xf3', b'\xff\xf2'):
+        return CODEC_MPEG
+    return CODEC_UNKNOWN
+
+
+def merge_audio_chunks(chunks: List[bytes]) -> bytes:
+    """Join streamed TTS chunks; WAV chunks are merged into a single WAV file"""
+    if not chunks:
+        return b''
+    if not all(sniff_codec(chunk) == CODEC_WAV for chunk in chunks):
+        return b''.join(chunks)
+
+    first = chunks[0]
+    data_pos = first.find(b'data')
+    header = first[:data_pos]
+    frames = [first[data_pos + 8:]]
+    for chunk in chunks[1:]:
+        chunk_data_pos = chunk.find(b'data')
+        frames.append(chunk[chunk_data_pos + 8:])
+    data = b''.join(frames)
+    header = header[:4] + struct.pack('<I', len(header) + len(data)) + header[8:]
+    return header + b'data' + struct.pack('<I', len(data)) + data
+
+
+class RoomAudioArchive:
+    """Append-only audio archive for one realtime room.
+
+    Audio blobs are appended to size-capped segment files and located through a
+    compact binary index of (message_id, segment, offset, length, codec) records.
+    """
+
+    def __init__(self, room_id: str, root: Optional[Path] = None):
+        root = Path(root or settings.REALTIME_DEBATE_SETTINGS['AUDIO_ARCHIVE_ROOT'])
+        self.room_id = str(room_id)
+        self.directory = root / self.room_id
+        self.index_path = self.directory / 'index.bin'
+        self.segment_size = settings.REALTIME_DEBATE_SETTINGS['AUDIO_ARCHIVE_SEGMENT_SIZE']
+
+    def segment_path(self, segment: int) -> Path:
+        return self.directory / f'segment-{segment:06d}.bin'
+
+    def _current_segment(self) -> Tuple[int, int]:
+        segments = sorted(self.directory.glob('segment-*.bin'))
+        if not segments:
+            return 0, 0
+        latest = segments[-1]
+        return int(latest.stem.split('-')[1]), latest.stat().st_size
+
+    def append(self, message_id: int, audio: bytes) -> None:
+        """Write one blob and its index record (called from the writer thread only)"""
+        if not audio:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        segment, size = self._current_segment()
+        if size and size + len(audio) > self.segment_size:
+            segment, size = segment + 1, 0
+
+        with open(self.segment_path(segment), 'ab') as f:
+            f.write(audio)
+
+        # The index record is written after the data so readers never see a dangling range
+        with open(self.index_path, 'ab') as f:
+            f.write(INDEX_RECORD.pack(message_id, segment, size, len(audio), sniff_codec(audio)))
+
+    def records(self) -> List[Tuple[int, int, int, int, int]]:
+        """All complete index records, in write order"""
+        try:
+            data = self.index_path.read_bytes()
+        except FileNotFoundError:
+            return []
+        usable = len(data) - len(data) % INDEX_RECORD.size
+        return list(INDEX_RECORD.iter_unpack(data[:usable]))
+
+    def message_ids(self) -> set:
+        return {record[0] for record in self.records()}
+
+    def lookup(self, message_id: int) -> Optional[Tuple[int, int, int, int, int]]:
+        """Latest index record for a message"""
+        matches = [record for record in self.records() if record[0] == message_id]
+        return matches[-1] if matches else None
+
+    def read(self, record, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Read bytes [start, end] (inclusive) of an archived blob through a memory map"""
+        _, segment, offset, length, _ = record
+        end = length - 1 if end is None else min(end, length - 1)
+        if start > end:
+            return b''
+        with open(self.segment_path(segment), 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[offset + start:offset + end + 1]
+
+
+class AudioArchiveWriter:
+    """Background thread that persists archived audio off the event loop"""
+
+    def __init__(self, max_queue: int):
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name='audio-archive-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, room_id: str, message_id: int, audio: bytes) -> bool:
+        """Queue audio for archiving; never blocks the caller"""
+        try:
+            self._queue.put_nowait((str(room_id), message_id, audio))
+            return True
+        except queue.Full:
+            logger.warning(f"Audio archive queue full, dropping audio for message {message_id}")
+            return False
+
+    def flush(self) -> None:
+        """Block until everything queued so far has been written"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            room_id, message_id, audio = self._queue.get()
+            try:
+                RoomAudioArchive(room_id).append(message_id, audio)
+            except Exception as e:
+                logger.error(f"Error archiving audio for message {message_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_archive_writer() -> AudioArchiveWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AudioArchiveWriter(settings.REALTIME_DEBATE_SETTINGS['AUDIO_ARCHIVE_QUEUE_SIZE'])
+    return _writer
+
+
+def archive_audio(room_id: str, message_id: int, audio: bytes) -> bool:
+    """Archive a message's audio asynchronously"""
+    if not settings.REALTIME_DEBATE_SETTINGS.get('AUDIO_ARCHIVE_ENABLED', True) or not audio:
+        return False
+    return get_archive_writer().submit(room_id, message_id, audio)
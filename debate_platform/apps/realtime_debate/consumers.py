@@ -2,12 +2,14 @@
 import json
 import asyncio
 import base64
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.consumer import get_handler_name
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import User
 from django.utils import timezone
 from .models import RealtimeDebateRoom, RealtimeDebateMessage, RealtimeSessionManager
-from .services import StreamingDebateManager
+from .services import StreamingDebateManager, parse_seq
 import logging
 
 logger = logging.getLogger('realtime_debate')
@@ -15,13 +17,17 @@ logger = logging.getLogger('realtime_debate')
 class DebateRoomConsumer(AsyncWebsocketConsumer):
     """WebSocket consumer for real-time debate rooms with streaming TTS"""
     
+    # Swappable so load tests can run the consumer against fake backends
+    streaming_manager_factory = StreamingDebateManager
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.room_id = None
         self.room_group_name = None
         self.user = None
-        self.streaming_manager = StreamingDebateManager()
+        self.streaming_manager = self.streaming_manager_factory()
         self.is_recording = False
+        self.audio_format = None  # declared by start_recording; None means a container format (webm, ...)
         self.heartbeat_task = None
         
     async def connect(self):
@@ -39,7 +45,7 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
             
             # Verify user has access to this room
             room = await self.get_room()
-            if not room or room.user != self.user:
+            if not room or room.user_id != self.user.id:
                 await self.close(code=4003)
                 return
             
@@ -64,12 +70,18 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
                 'room_id': self.room_id,
                 'user_id': self.user.id,
                 'message': 'Connected to debate room',
-                'streaming_enabled': True
+                'streaming_enabled': True,
+                'last_seq': await self.streaming_manager.get_room_seq(self.room_id)
             }))
             
             # Send current room status
             await self.send_room_status()
             
+            # Reconnecting clients pass the last seq they saw to receive only the gap
+            last_seq = parse_seq(parse_qs(self.scope.get('query_string', b'').decode()).get('last_seq', [''])[0])
+            if last_seq is not None:
+                await self.replay_events(last_seq)
+            
             logger.info(f"User {self.user.username} connected to debate room {self.room_id}")
             
         except Exception as e:
@@ -123,7 +135,7 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
             message_type = data.get('type')
             
             if message_type == 'start_recording':
-                await self.start_recording()
+                await self.start_recording(data.get('audio_format'))
             elif message_type == 'stop_recording':
                 await self.stop_recording()
             elif message_type == 'start_debate':
@@ -135,6 +147,12 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
                     'type': 'pong',
                     'timestamp': timezone.now().isoformat()
                 }))
+            elif message_type == 'resume':
+                last_seq = parse_seq(data.get('last_seq', 0))
+                if last_seq is None:
+                    await self.send_error("last_seq must be a non-negative integer")
+                else:
+                    await self.replay_events(last_seq)
             elif message_type == 'get_room_status':
                 await self.send_room_status()
             elif message_type == 'stop_ai_stream':
@@ -161,7 +179,8 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
             result = await self.streaming_manager.process_audio_chunk(
                 self.room_id, 
                 bytes_data, 
-                chunk_id
+                chunk_id,
+                audio_format=self.audio_format
             )
             
             if result['success']:
@@ -175,13 +194,13 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
                     }))
                 elif result.get('streaming_audio'):
                     # Processing complete, AI will start streaming response
-                    await self.send(text_data=json.dumps({
+                    await self.send_event({
                         'type': 'processing_complete',
                         'user_message': result['user_message'],
                         'ai_message': result['ai_message'],
                         'streaming_audio': True,
                         'stream_id': result['stream_id']
-                    }))
+                    })
             else:
                 await self.send_error(result.get('error', 'Processing failed'))
                 
@@ -189,8 +208,13 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
             logger.error(f"Error handling audio data: {str(e)}")
             await self.send_error("Failed to process audio")
     
-    async def start_recording(self):
-        """Start audio recording session"""
+    async def start_recording(self, audio_format=None):
+        """Start audio recording session.
+
+        audio_format: 'pcm_s16le' for headerless 16-bit PCM at
+        REALTIME_DEBATE_SETTINGS['AUDIO_SAMPLE_RATE']; omit for container
+        formats such as MediaRecorder's webm/opus.
+        """
         try:
             if self.is_recording:
                 return
@@ -207,6 +231,7 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
                 return
             
             self.is_recording = True
+            self.audio_format = audio_format
             
             # Update Redis session
             self.streaming_manager.update_session_data(self.room_id, {
@@ -215,13 +240,10 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
             })
             
             # Notify room
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'recording_started',
-                    'user_id': self.user.id
-                }
-            )
+            await self.broadcast({
+                'type': 'recording_started',
+                'user_id': self.user.id
+            })
             
             logger.info(f"Started recording for user {self.user.username} in room {self.room_id}")
             
@@ -274,14 +296,11 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
             })
             
             # Notify room
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'debate_started',
-                    'room_id': self.room_id,
-                    'current_turn': 'user'
-                }
-            )
+            await self.broadcast({
+                'type': 'debate_started',
+                'room_id': self.room_id,
+                'current_turn': 'user'
+            })
             
             logger.info(f"Debate started in room {self.room_id}")
             
@@ -292,21 +311,18 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
     async def end_debate(self):
         """End the debate session"""
         try:
-            # End session in Redis and database
-            result = self.streaming_manager.end_debate_session(self.room_id)
+            # End session in Redis and database (flushes room counters)
+            result = await database_sync_to_async(self.streaming_manager.end_debate_session)(self.room_id)
             
             # Update room status in database
             await self.update_room_status('completed')
             
             # Notify room
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'debate_ended',
-                    'room_id': self.room_id,
-                    'result': result
-                }
-            )
+            await self.broadcast({
+                'type': 'debate_ended',
+                'room_id': self.room_id,
+                'result': result
+            })
             
             logger.info(f"Debate ended in room {self.room_id}")
             
@@ -352,6 +368,50 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
         except Exception as e:
             logger.error(f"Error sending room status: {str(e)}")
     
+    async def broadcast(self, event):
+        """Send a sequence-stamped, replayable event to everyone in the room"""
+        event = await self.streaming_manager.record_room_event(self.room_id, event)
+        await self.channel_layer.group_send(self.room_group_name, event)
+    
+    async def send_event(self, message):
+        """Send a sequence-stamped, replayable message to this connection only"""
+        event = await self.streaming_manager.record_room_event(self.room_id, {
+            'type': 'room_event',
+            'message': message
+        })
+        await self.room_event(event)
+    
+    async def replay_events(self, last_seq):
+        """Resend logged room events newer than last_seq after a reconnect"""
+        try:
+            events, complete = await self.streaming_manager.get_room_events_since(self.room_id, last_seq)
+            if not complete:
+                # Part of the gap was trimmed; tell the client where the replay resumes so it
+                # accepts the jump and resyncs the rest from room status
+                resume_from = events[0]['seq'] if events else (await self.streaming_manager.get_room_seq(self.room_id)) + 1
+                await self.send(text_data=json.dumps({
+                    'type': 'replay_start',
+                    'complete': False,
+                    'resume_from': resume_from
+                }))
+            for event in events:
+                handler = getattr(self, get_handler_name(event), None)
+                if handler:
+                    await handler(event)
+            
+            await self.send(text_data=json.dumps({
+                'type': 'replay_complete',
+                'replayed': len(events),
+                'last_seq': events[-1]['seq'] if events else last_seq,
+                'complete': complete
+            }))
+            
+            logger.info(f"Replayed {len(events)} events after seq {last_seq} in room {self.room_id}")
+            
+        except Exception as e:
+            logger.error(f"Error replaying events: {str(e)}")
+            await self.send_error("Failed to resume session")
+    
     async def send_error(self, error_message):
         """Send error message to client"""
         await self.send(text_data=json.dumps({
@@ -374,12 +434,17 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
         except Exception as e:
             logger.error(f"Heartbeat error: {str(e)}")
     
-    # Group message handlers for streaming
+    # Group message handlers for streaming (events carry the seq stamped by record_room_event)
+    async def room_event(self, event):
+        """Deliver a logged direct message"""
+        await self.send(text_data=json.dumps(dict(event['message'], seq=event.get('seq'))))
+    
     async def recording_started(self, event):
         """Handle recording started notification"""
         await self.send(text_data=json.dumps({
             'type': 'recording_started',
-            'user_id': event['user_id']
+            'user_id': event['user_id'],
+            'seq': event.get('seq')
         }))
     
     async def ai_audio_stream_start(self, event):
@@ -389,7 +454,8 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
             'stream_id': event['data']['stream_id'],
             'text': event['data']['text'],
             'estimated_duration': event['data']['estimated_duration'],
-            'speaker': event['data']['speaker']
+            'speaker': event['data']['speaker'],
+            'seq': event.get('seq')
         }))
     
     async def ai_audio_chunk(self, event):
@@ -402,7 +468,8 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
             'chunk_size': event['data'].get('chunk_size', 0),
             'is_final': event['data']['is_final'],
             'total_chunks': event['data'].get('total_chunks', 0),
-            'timestamp': event['data'].get('timestamp')
+            'timestamp': event['data'].get('timestamp'),
+            'seq': event.get('seq')
         }))
     
     async def ai_audio_stream_error(self, event):
@@ -410,7 +477,8 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps({
             'type': 'ai_audio_stream_error',
             'stream_id': event['data']['stream_id'],
-            'error': event['data']['error']
+            'error': event['data']['error'],
+            'seq': event.get('seq')
         }))
     
     async def debate_started(self, event):
@@ -418,7 +486,8 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps({
             'type': 'debate_started',
             'room_id': event['room_id'],
-            'current_turn': event['current_turn']
+            'current_turn': event['current_turn'],
+            'seq': event.get('seq')
         }))
     
     async def debate_ended(self, event):
@@ -426,7 +495,8 @@ class DebateRoomConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps({
             'type': 'debate_ended',
             'room_id': event['room_id'],
-            'result': event['result']
+            'result': event['result'],
+            'seq': event.get('seq')
         }))
     
     # Database helpers
@@ -0,0 +1,31 @@
+# apps/realtime_debate/management/commands/flush_room_counters.py
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.realtime_debate.services import StreamingDebateManager
+import logging
+
+logger = logging.getLogger('realtime_debate')
+
+
+class Command(BaseCommand):
+    help = 'Flush write-behind realtime room counters from Redis to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, flushing every --interval seconds')
+        parser.add_argument('--interval', type=float,
+                            default=settings.REALTIME_DEBATE_SETTINGS.get('ROOM_COUNTER_FLUSH_INTERVAL', 30),
+                            help='Seconds between flushes when looping')
+
+    def handle(self, *args, **options):
+        manager = StreamingDebateManager()
+
+        while True:
+            flushed = manager.flush_dirty_room_counters()
+            if flushed:
+                logger.info(f"Flushed counters for {flushed} realtime rooms")
+            if not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Flushed counters for {flushed} rooms'))
+                return
+            time.sleep(options['interval'])
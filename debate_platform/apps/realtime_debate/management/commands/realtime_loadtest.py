@@ -0,0 +1,400 @@
+# apps/realtime_debate/management/commands/realtime_loadtest.py
+import asyncio
+import json
+import math
+import tempfile
+import time
+import tracemalloc
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from apps.sarvam_integration.fakes import LatencyModel, build_fake_async_service
+from apps.sarvam_integration.metrics import UPSTREAM, get_metrics
+
+FRAME_DURATION = 0.1  # the streaming manager assumes 100ms per chunk
+SAMPLE_RATE = 16000
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def summarize(values, scale=1000.0):
+    """p50/p90/p99/max in milliseconds"""
+    return {
+        'count': len(values),
+        'p50': round(percentile(values, 50) * scale, 1) if values else None,
+        'p90': round(percentile(values, 90) * scale, 1) if values else None,
+        'p99': round(percentile(values, 99) * scale, 1) if values else None,
+        'max': round(max(values) * scale, 1) if values else None,
+    }
+
+
+def synthetic_utterance(speech_seconds: float) -> list:
+    """16 kHz 16-bit PCM frames: a voiced tone followed by one silent frame"""
+    import struct
+    frame_samples = int(SAMPLE_RATE * FRAME_DURATION)
+    frames = []
+    for index in range(int(speech_seconds / FRAME_DURATION)):
+        offset = index * frame_samples
+        samples = [
+            int(9000 * math.sin(2 * math.pi * 220 * (offset + n) / SAMPLE_RATE))
+            for n in range(frame_samples)
+        ]
+        frames.append(struct.pack(f'<{frame_samples}h', *samples))
+    frames.append(b'\x00\x00' * frame_samples)
+    return frames
+
+
+def recorded_utterance(path: str) -> list:
+    """Split a raw 16 kHz 16-bit mono PCM recording into 100ms frames"""
+    frame_bytes = int(SAMPLE_RATE * FRAME_DURATION) * 2
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] == b'RIFF':
+        data = data[data.find(b'data') + 8:]
+    return [data[i:i + frame_bytes] for i in range(0, len(data), frame_bytes)]
+
+
+class SyntheticClient:
+    """One simulated student streaming audio into a debate room"""
+
+    def __init__(self, application, room_id, session_key, frames, turns, turn_timeout):
+        self.application = application
+        self.room_id = room_id
+        self.session_key = session_key
+        self.frames = frames
+        self.turns = turns
+        self.turn_timeout = turn_timeout
+        self.events = asyncio.Queue()
+        self.turn_latencies = []
+        self.first_audio_latencies = []
+        self.stream_latencies = []
+        self.chunks_sent = 0
+        self.chunks_acked = 0
+        self.errors = []
+        self.ai_chunks_expected = 0
+        self.ai_chunks_received = 0
+
+    async def _reader(self, communicator):
+        while True:
+            try:
+                message = await communicator.receive_from(timeout=3600)
+            except Exception:
+                return
+            await self.events.put((time.perf_counter(), json.loads(message)))
+
+    async def _wait_for(self, event_type, timeout):
+        deadline = time.perf_counter() + timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(event_type)
+            received_at, event = await asyncio.wait_for(self.events.get(), remaining)
+            self._account(event)
+            if event['type'] == event_type:
+                return received_at, event
+
+    def _account(self, event):
+        if event['type'] in ('audio_buffering', 'processing_complete'):
+            self.chunks_acked += 1
+        elif event['type'] == 'error':
+            self.errors.append(event.get('message'))
+        elif event['type'] == 'ai_audio_chunk':
+            if event.get('is_final'):
+                self.ai_chunks_expected += event.get('total_chunks', 0)
+            else:
+                self.ai_chunks_received += 1
+
+    async def run(self):
+        from channels.testing import WebsocketCommunicator
+        from realtime_debate.services import PCM_AUDIO_FORMAT
+
+        communicator = WebsocketCommunicator(
+            self.application,
+            f'/ws/debate/{self.room_id}/',
+            headers=[
+                (b'cookie', f'sessionid={self.session_key}'.encode()),
+                (b'origin', b'http://localhost'),
+                (b'host', b'localhost'),
+            ],
+        )
+        connected, _ = await communicator.connect(timeout=10)
+        if not connected:
+            self.errors.append('connect rejected')
+            return
+        reader = asyncio.create_task(self._reader(communicator))
+        try:
+            await self._wait_for('room_status', 10)
+            await communicator.send_to(text_data=json.dumps({'type': 'start_debate'}))
+            await self._wait_for('debate_started', 10)
+
+            for _ in range(self.turns):
+                await communicator.send_to(text_data=json.dumps({'type': 'start_recording', 'audio_format': PCM_AUDIO_FORMAT}))
+                await self._wait_for('recording_started', 10)
+
+                # Stream at real-time pace, as a microphone would
+                started = time.perf_counter()
+                last_sent = started
+                for index, frame in enumerate(self.frames):
+                    target = started + index * FRAME_DURATION
+                    delay = target - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    await communicator.send_to(bytes_data=frame)
+                    self.chunks_sent += 1
+                    last_sent = time.perf_counter()
+
+                received_at, _ = await self._wait_for('processing_complete', self.turn_timeout)
+                self.turn_latencies.append(received_at - last_sent)
+                received_at, _ = await self._wait_for('ai_audio_chunk', self.turn_timeout)
+                self.first_audio_latencies.append(received_at - last_sent)
+                while True:
+                    received_at, event = await self._wait_for('ai_audio_chunk', self.turn_timeout)
+                    if event.get('is_final'):
+                        self.stream_latencies.append(received_at - last_sent)
+                        break
+
+                await communicator.send_to(text_data=json.dumps({'type': 'stop_recording'}))
+                await self._wait_for('recording_stopped', 10)
+
+            await communicator.send_to(text_data=json.dumps({'type': 'end_debate'}))
+            await self._wait_for('debate_ended', 10)
+        except asyncio.TimeoutError as e:
+            self.errors.append(f'timed out waiting for {e}')
+        finally:
+            # Count whatever arrived after the last wait
+            while not self.events.empty():
+                self._account(self.events.get_nowait()[1])
+            await communicator.disconnect()
+            reader.cancel()
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up a periodic timer"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+
+class Command(BaseCommand):
+    help = 'Load-test DebateRoomConsumer with in-process WebSocket clients and a fake Sarvam backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=10, help='Concurrent rooms (one client each)')
+        parser.add_argument('--turns', type=int, default=2, help='Utterances per client')
+        parser.add_argument('--speech-seconds', type=float, default=2.0,
+                            help='Length of the synthetic utterance (ignored with --pcm)')
+        parser.add_argument('--pcm', help='Raw 16 kHz 16-bit mono PCM (or WAV) recording to stream')
+        parser.add_argument('--ramp', type=float, default=0.0, help='Seconds over which to stagger client start')
+        parser.add_argument('--stt-latency', type=float, help='Fake STT latency in seconds')
+        parser.add_argument('--llm-latency', type=float, help='Fake LLM latency in seconds')
+        parser.add_argument('--tts-latency', type=float, help='Fake streaming TTS connect latency in seconds')
+        parser.add_argument('--tts-chunk-latency', type=float, help='Fake delay between TTS audio chunks')
+        parser.add_argument('--jitter', type=float, default=0.2, help='Uniform latency jitter as a fraction')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--turn-timeout', type=float, default=60.0)
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            import fakeredis
+            from channels.testing import WebsocketCommunicator  # noqa: F401 (needs daphne)
+        except ImportError as e:
+            raise CommandError(f'Load test dependencies missing ({e}): pip install -r requirements-dev.txt daphne')
+
+        frames = recorded_utterance(options['pcm']) if options['pcm'] else synthetic_utterance(options['speech_seconds'])
+        if not frames:
+            raise CommandError('No audio frames to stream')
+
+        latency = LatencyModel(
+            jitter=options['jitter'],
+            seed=options['seed'],
+            stt=options['stt_latency'],
+            llm=options['llm_latency'],
+            tts=options['tts_latency'],
+            tts_chunk=options['tts_chunk_latency'],
+        )
+
+        archive_dir = tempfile.TemporaryDirectory(prefix='realtime_loadtest_')
+        overrides = {
+            'CHANNEL_LAYERS': {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+            'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.cache',
+            'REALTIME_DEBATE_SETTINGS': dict(settings.REALTIME_DEBATE_SETTINGS, AUDIO_ARCHIVE_ROOT=archive_dir.name),
+        }
+        with override_settings(**overrides), archive_dir:
+            old_db_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                report = self._run(fakeredis.FakeRedis(), latency, frames, options)
+            finally:
+                connection.creation.destroy_test_db(old_db_name, verbosity=0)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print_report(report)
+
+    def _run(self, redis_client, latency, frames, options):
+        from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+        from django.contrib.auth.models import User
+        from django.contrib.sessions.backends.cache import SessionStore
+        from debates.models import DebateTopic
+        from realtime_debate.consumers import DebateRoomConsumer
+        from realtime_debate.models import RealtimeDebateRoom
+        from realtime_debate.services import StreamingDebateManager
+        from config.asgi import application
+
+        sarvam_service = build_fake_async_service(latency)
+
+        def manager_factory():
+            return StreamingDebateManager(redis_client=redis_client, sarvam_service=sarvam_service)
+
+        # Fixtures: one user, session and room per client
+        seeds = []
+        for index in range(options['rooms']):
+            user = User.objects.create_user(username=f'loadtest_{index}', password='loadtest')
+            topic = DebateTopic.objects.create(
+                title='Should homework be banned?', description='Load test topic',
+                difficulty_level='beginner', age_group='13-15', created_by=user
+            )
+            room = RealtimeDebateRoom.objects.create(
+                user=user, topic=topic, user_stance='for', ai_stance='against'
+            )
+            manager_factory().create_debate_session(str(room.id), user.id)
+
+            session = SessionStore()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            seeds.append((str(room.id), session.session_key))
+
+        original_factory = DebateRoomConsumer.streaming_manager_factory
+        DebateRoomConsumer.streaming_manager_factory = staticmethod(manager_factory)
+        try:
+            return asyncio.run(self._drive(application, seeds, frames, options, sarvam_service))
+        finally:
+            DebateRoomConsumer.streaming_manager_factory = original_factory
+
+    async def _drive(self, application, seeds, frames, options, sarvam_service):
+        clients = [
+            SyntheticClient(application, room_id, session_key, frames, options['turns'], options['turn_timeout'])
+            for room_id, session_key in seeds
+        ]
+        monitor = LoopLagMonitor()
+        monitor.start()
+
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        stagger = options['ramp'] / len(clients) if clients else 0
+
+        async def launch(index, client):
+            if stagger:
+                await asyncio.sleep(index * stagger)
+            await client.run()
+
+        await asyncio.gather(*(launch(i, c) for i, c in enumerate(clients)))
+        elapsed = time.perf_counter() - started
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        monitor.stop()
+
+        rooms = len(clients)
+        chunks_sent = sum(c.chunks_sent for c in clients)
+        chunks_acked = sum(c.chunks_acked for c in clients)
+        ai_expected = sum(c.ai_chunks_expected for c in clients)
+        ai_received = sum(c.ai_chunks_received for c in clients)
+        errors = [e for c in clients for e in c.errors]
+
+        return {
+            'rooms': rooms,
+            'turns_per_room': options['turns'],
+            'frames_per_turn': len(frames),
+            'elapsed_seconds': round(elapsed, 2),
+            'turn_latency_ms': summarize([v for c in clients for v in c.turn_latencies]),
+            'first_ai_audio_ms': summarize([v for c in clients for v in c.first_audio_latencies]),
+            'ai_stream_complete_ms': summarize([v for c in clients for v in c.stream_latencies]),
+            'event_loop_lag_ms': summarize(monitor.samples),
+            'memory': {
+                'peak_per_room_kb': round((peak - baseline) / rooms / 1024, 1) if rooms else 0,
+                'retained_per_room_kb': round((current - baseline) / rooms / 1024, 1) if rooms else 0,
+            },
+            'dropped': {
+                'audio_chunks_sent': chunks_sent,
+                'audio_chunks_unacknowledged': chunks_sent - chunks_acked,
+                'ai_audio_chunks_expected': ai_expected,
+                'ai_audio_chunks_missing': ai_expected - ai_received,
+            },
+            'fake_sarvam_calls': dict(
+                sarvam_service.fake_client.calls,
+                tts_streams=sarvam_service.fake_client.text_to_speech_streaming.connections
+            ),
+            'sarvam_concurrency': sarvam_service.stats(),
+            'sarvam_admission': sarvam_service.rate_limiter.stats(),
+            'sarvam_upstream': get_metrics().snapshot()['calls'].get(UPSTREAM, {}),
+            'errors': len(errors),
+            'error_samples': errors[:5],
+        }
+
+    def _print_report(self, report):
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['rooms']} rooms x {report['turns_per_room']} turns "
+            f"({report['frames_per_turn']} frames/turn) in {report['elapsed_seconds']}s"
+        ))
+        for label in ('turn_latency_ms', 'first_ai_audio_ms', 'ai_stream_complete_ms', 'event_loop_lag_ms'):
+            stats = report[label]
+            self.stdout.write(
+                f"{label:24} n={stats['count']:<6} p50={stats['p50']} p90={stats['p90']} "
+                f"p99={stats['p99']} max={stats['max']}"
+            )
+        memory = report['memory']
+        self.stdout.write(
+            f"{'memory_per_room_kb':24} peak={memory['peak_per_room_kb']} retained={memory['retained_per_room_kb']}"
+        )
+        dropped = report['dropped']
+        self.stdout.write(
+            f"{'dropped':24} audio={dropped['audio_chunks_unacknowledged']}/{dropped['audio_chunks_sent']} "
+            f"ai_audio={dropped['ai_audio_chunks_missing']}/{dropped['ai_audio_chunks_expected']}"
+        )
+        self.stdout.write(f"{'fake_sarvam_calls':24} {report['fake_sarvam_calls']}")
+        for endpoint, gauge in report['sarvam_concurrency'].items():
+            if gauge['completed']:
+                self.stdout.write(
+                    f"{'sarvam_' + endpoint:24} limit={gauge['limit']} completed={gauge['completed']} "
+                    f"max_waiting={gauge['max_waiting']}"
+                )
+        for priority, endpoints in report['sarvam_admission'].items():
+            for endpoint, counters in endpoints.items():
+                self.stdout.write(f"{'admission_' + priority + '_' + endpoint:24} {counters}")
+        for endpoint, stats in report['sarvam_upstream'].items():
+            latency = stats['latency']
+            self.stdout.write(
+                f"{'upstream_' + endpoint:24} calls={stats['calls']} mean_s={latency['mean']} "
+                f"p95_s<={latency['p95']} outcomes={stats['outcomes']}"
+            )
+        if report['errors']:
+            self.stdout.write(self.style.WARNING(f"{report['errors']} errors, e.g. {report['error_samples']}"))
@@ -115,6 +115,9 @@ class RealtimeDebateMessage(models.Model):
     
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['room', 'timestamp', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.speaker} - Turn {self.turn_number} ({self.room.id})"
@@ -1,33 +1,62 @@
 # apps/realtime_debate/services.py
-import redis
 import json
 import asyncio
 import base64
-import tempfile
-import os
 import struct
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from django.conf import settings
+from django.db.models import F
 from django.utils import timezone
-from sarvamai import AsyncSarvamAI, AudioOutput
-from apps.sarvam_integration.services import SarvamAIService
+from channels.layers import get_channel_layer
+from sarvamai import AudioOutput
+from apps.sarvam_integration.async_service import get_async_sarvam_service
+from apps.sarvam_integration.audio_preprocessing import WebmStream, get_audio_preprocessor
+from apps.sarvam_integration.rate_limit import INTERACTIVE, sarvam_priority
+from apps.sarvam_integration.resilience import fallback_rebuttal, sarvam_deadline
+from apps.sarvam_integration.clients import get_redis_client
 from gamification.services import GamificationEngine
 from .models import RealtimeDebateRoom, RealtimeDebateMessage, RealtimeSessionManager, AudioStreamChunk
+from .archive import archive_audio, merge_audio_chunks
 import logging
 import time
 
 logger = logging.getLogger('realtime_debate')
 
+ROOM_COUNTERS_KEY = "room_counters:{room_id}"
+DIRTY_ROOM_COUNTERS_KEY = "room_counters:dirty"
+ROOM_SEQ_KEY = "room_seq:{room_id}"
+ROOM_EVENTS_KEY = "room_events:{room_id}"
+
+# audio_format a client declares in start_recording when it streams headerless
+# 16-bit PCM; without it audio is treated as a container format (webm, ...)
+PCM_AUDIO_FORMAT = 'pcm_s16le'
+
+
+def upload_filename(content_type: str) -> str:
+    """STT upload file name whose extension matches the audio actually sent"""
+    extensions = {'audio/wav': 'wav', 'audio/webm': 'webm', 'audio/ogg': 'ogg', 'audio/mpeg': 'mp3',
+                  'audio/mp4': 'm4a', 'audio/flac': 'flac'}
+    return f"speech.{extensions.get(content_type, 'bin')}"
+
+def parse_seq(value: Any) -> Optional[int]:
+    """A client-supplied room event seq (int or digit string), or None if it isn't a non-negative integer"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value if value >= 0 else None
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
 class StreamingDebateManager:
     """Enhanced debate manager with streaming TTS and smart buffering"""
     
-    def __init__(self):
-        self.redis_client = redis.from_url(settings.REDIS_URL)
-        # Use async client for streaming TTS
-        self.sarvam_async_client = AsyncSarvamAI(
-            api_subscription_key=settings.SARVAM_API_KEY
-        )
-        self.sarvam_service = SarvamAIService()  # Sync client for STT
+    def __init__(self, redis_client=None, sarvam_service=None):
+        # Backends can be injected (e.g. fakeredis and fake Sarvam clients for load tests)
+        self.redis_client = redis_client or get_redis_client()
+        # Async-native Sarvam calls, bounded per endpoint (STT, LLM, TTS)
+        self.sarvam_service = sarvam_service or get_async_sarvam_service()
+        self.channel_layer = get_channel_layer()
         
         # Audio processing settings
         self.chunk_duration = 3.0  # Process every 3 seconds
@@ -68,7 +97,8 @@ class StreamingDebateManager:
                 'chunks': [],
                 'last_activity': timezone.now(),
                 'processing': False,
-                'total_duration': 0.0
+                'total_duration': 0.0,
+                'webm': WebmStream()
             }
             
             logger.info(f"Created debate session {room_id} for user {user_id}")
@@ -120,8 +150,12 @@ class StreamingDebateManager:
             logger.error(f"Error updating session data: {str(e)}")
             return False
     
-    async def process_audio_chunk(self, room_id: str, audio_data: bytes, chunk_id: str) -> Dict[str, Any]:
-        """Process incoming audio with smart buffering + streaming response"""
+    async def process_audio_chunk(self, room_id: str, audio_data: bytes, chunk_id: str,
+                                  audio_format: Optional[str] = None) -> Dict[str, Any]:
+        """Process incoming audio with smart buffering + streaming response.
+
+        audio_format: PCM_AUDIO_FORMAT when the client streams headerless PCM.
+        """
         try:
             # Initialize buffer for room if not exists
             if room_id not in self.audio_buffers:
@@ -129,10 +163,12 @@ class StreamingDebateManager:
                     'chunks': [],
                     'last_activity': timezone.now(),
                     'processing': False,
-                    'total_duration': 0.0
+                    'total_duration': 0.0,
+                    'webm': WebmStream()
                 }
             
             buffer = self.audio_buffers[room_id]
+            buffer['audio_format'] = audio_format
             buffer['chunks'].append(audio_data)
             buffer['last_activity'] = timezone.now()
             buffer['total_duration'] += 0.1  # Estimate 100ms per chunk
@@ -141,7 +177,9 @@ class StreamingDebateManager:
             should_process = self._should_process_buffer(room_id, audio_data)
             
             if should_process and not buffer['processing']:
-                return await self._process_complete_utterance(room_id)
+                # One latency budget for the turn's STT + LLM calls; live debates get interactive priority
+                with sarvam_priority(INTERACTIVE), sarvam_deadline():
+                    return await self._process_complete_utterance(room_id)
             
             return {
                 'success': True,
@@ -167,6 +205,9 @@ class StreamingDebateManager:
             
             # Combine audio chunks
             combined_audio = b''.join(buffer['chunks'])
+            if buffer.get('audio_format') != PCM_AUDIO_FORMAT:
+                # MediaRecorder only sends the webm header once; make each utterance playable on its own
+                combined_audio = buffer['webm'].frame(combined_audio)
             chunk_count = len(buffer['chunks'])
             buffer['chunks'] = []  # Clear buffer
             buffer['total_duration'] = 0.0
@@ -177,10 +218,15 @@ class StreamingDebateManager:
                 buffer['processing'] = False
                 return {'success': False, 'error': 'Room not found'}
             
+            # The live turn number lives in Redis; the room row only catches up on counter flushes
+            session_data = self.get_session_data(room_id) or {}
+            room.turn_number = session_data.get('turn_number', room.turn_number)
+            
             # Step 1: Convert speech to text (traditional STT for accuracy)
             logger.info(f"Processing speech to text for room {room_id}")
             start_time = time.time()
-            stt_result = await self._speech_to_text_async(combined_audio, room.language)
+            prepared = await self._prepare_audio(combined_audio, buffer.get('audio_format'))
+            stt_result = await self._speech_to_text_async(prepared, room.language)
             stt_time = time.time() - start_time
             
             if not stt_result['success']:
@@ -194,6 +240,8 @@ class StreamingDebateManager:
             
             # Step 2: Save user message
             user_message = await self._save_user_message(room, user_text, chunk_count, stt_time)
+            # Archive what STT heard: a WAV when pre-processed, otherwise the (re-framed) upload
+            archive_audio(room_id, user_message.id, prepared['audio'])
             
             # Step 3: Generate AI response text
             ai_start_time = time.time()
@@ -213,7 +261,7 @@ class StreamingDebateManager:
             logger.info(f"Starting streaming TTS for room {room_id}")
             stream_id = f"stream_{room_id}_{int(time.time())}"
             
-            # Start streaming in background task
+            # Start streaming in background task (which inherits the interactive Sarvam priority)
             asyncio.create_task(
                 self._stream_ai_response(room_id, ai_text, room.language, room.ai_speaker, stream_id, ai_message.id)
             )
@@ -225,6 +273,16 @@ class StreamingDebateManager:
                 'turn_number': room.turn_number + 1
             })
             
+            # Accumulate analytics in Redis; they reach the room row in batched flushes
+            self.increment_room_counters(
+                room_id,
+                user_speaking_ms=int(chunk_count * 100),  # 100ms per chunk estimate
+                ai_speaking_ms=int(len(ai_text) * 80),  # same 80ms/char estimate as the stream
+                arguments_user=1,
+                arguments_ai=1,
+                turns=1
+            )
+            
             buffer['processing'] = False
             
             return {
@@ -271,76 +329,66 @@ class StreamingDebateManager:
             })
             
             chunk_count = 0
+            archived_chunks = []
             stream_start_time = time.time()
             
-            # Connect to streaming TTS
-            async with self.sarvam_async_client.text_to_speech_streaming.connect(
-                model="bulbul:v2"
-            ) as ws:
-                # Configure for the specified language and speaker
-                await ws.configure(
-                    target_language_code=language,
-                    speaker=speaker
-                )
-                
-                logger.debug(f"TTS configured for {language} with speaker {speaker}")
-                
-                # Send text for conversion
-                await ws.convert(text)
-                await ws.flush()
-                
-                # Stream audio chunks as they arrive
-                async for message in ws:
-                    if isinstance(message, AudioOutput):
-                        chunk_count += 1
-                        audio_chunk = base64.b64decode(message.data.audio)
-                        
-                        # Record chunk in database for analytics
-                        await self._save_audio_chunk(message_id, chunk_count, len(audio_chunk), time.time() - stream_start_time)
-                        
-                        # Publish each audio chunk to room
-                        await self._publish_to_room(room_id, 'ai_audio_chunk', {
-                            'stream_id': stream_id,
-                            'chunk_id': chunk_count,
-                            'audio_data': message.data.audio,  # Base64 encoded
-                            'chunk_size': len(audio_chunk),
-                            'timestamp': time.time(),
-                            'is_final': False
-                        })
-                        
-                        # Update stream tracking
-                        if stream_id in self.active_streams:
-                            self.active_streams[stream_id]['chunks_sent'] = chunk_count
-                        
-                        logger.debug(f"Streamed audio chunk {chunk_count} to room {room_id}")
-                
-                # Send final chunk indicator
-                await self._publish_to_room(room_id, 'ai_audio_chunk', {
-                    'stream_id': stream_id,
-                    'chunk_id': chunk_count + 1,
-                    'audio_data': None,
-                    'is_final': True,
-                    'total_chunks': chunk_count,
-                    'streaming_duration': time.time() - stream_start_time
-                })
-                
-                # Update message as streaming completed
-                await self._update_message_streaming_status(message_id, chunk_count, True)
-                
-                # Update session state
-                self.update_session_data(room_id, {
-                    'is_streaming_tts': False,
-                    'current_stream_id': None,
-                    'current_turn': 'user'  # Switch turn back to user
-                })
-                
-                # Clean up stream tracking
-                if stream_id in self.active_streams:
-                    self.active_streams[stream_id]['total_chunks'] = chunk_count
-                    del self.active_streams[stream_id]
-                
-                logger.info(f"Completed streaming {chunk_count} audio chunks for room {room_id}")
+            # Stream audio chunks as they arrive (the service holds a TTS slot for the whole stream)
+            async for message in self.sarvam_service.stream_tts(text, language, speaker, model="bulbul:v2"):
+                if isinstance(message, AudioOutput):
+                    chunk_count += 1
+                    audio_chunk = base64.b64decode(message.data.audio)
+                    archived_chunks.append(audio_chunk)
+                    
+                    # Record chunk in database for analytics
+                    await self._save_audio_chunk(
+                        room_id, message_id, chunk_count, len(audio_chunk), time.time() - stream_start_time
+                    )
+                    
+                    # Publish each audio chunk to room
+                    await self._publish_to_room(room_id, 'ai_audio_chunk', {
+                        'stream_id': stream_id,
+                        'chunk_id': chunk_count,
+                        'audio_data': message.data.audio,  # Base64 encoded
+                        'chunk_size': len(audio_chunk),
+                        'timestamp': time.time(),
+                        'is_final': False
+                    })
+                    
+                    # Update stream tracking
+                    if stream_id in self.active_streams:
+                        self.active_streams[stream_id]['chunks_sent'] = chunk_count
+                    
+                    logger.debug(f"Streamed audio chunk {chunk_count} to room {room_id}")
+            
+            # Send final chunk indicator
+            await self._publish_to_room(room_id, 'ai_audio_chunk', {
+                'stream_id': stream_id,
+                'chunk_id': chunk_count + 1,
+                'audio_data': None,
+                'is_final': True,
+                'total_chunks': chunk_count,
+                'streaming_duration': time.time() - stream_start_time
+            })
+            
+            # Update message as streaming completed
+            await self._update_message_streaming_status(message_id, chunk_count, True)
+            if message_id:
+                archive_audio(room_id, message_id, merge_audio_chunks(archived_chunks))
+            
+            # Update session state
+            self.update_session_data(room_id, {
+                'is_streaming_tts': False,
+                'current_stream_id': None,
+                'current_turn': 'user'  # Switch turn back to user
+            })
             
+            # Clean up stream tracking
+            if stream_id in self.active_streams:
+                self.active_streams[stream_id]['total_chunks'] = chunk_count
+                del self.active_streams[stream_id]
+            
+            logger.info(f"Completed streaming {chunk_count} audio chunks for room {room_id}")
+        
         except Exception as e:
             logger.error(f"Error streaming AI response: {str(e)}")
             
@@ -360,27 +408,25 @@ class StreamingDebateManager:
                 'current_turn': 'user'
             })
     
-    async def _speech_to_text_async(self, audio_data: bytes, language: str) -> Dict[str, Any]:
-        """Async wrapper for STT processing"""
+    async def _prepare_audio(self, audio_data: bytes, audio_format: Optional[str] = None) -> Dict[str, Any]:
+        """Pre-process buffered audio off the event loop into a compact in-memory upload.
+
+        Only audio the client declared as PCM is decoded as headerless PCM;
+        anything else that isn't a recognised container is kept unchanged.
+        """
+        pcm_sample_rate = None
+        if audio_format == PCM_AUDIO_FORMAT:
+            pcm_sample_rate = settings.REALTIME_DEBATE_SETTINGS['AUDIO_SAMPLE_RATE']
+        return await asyncio.to_thread(
+            get_audio_preprocessor().preprocess, audio_data, pcm_sample_rate=pcm_sample_rate
+        )
+    
+    async def _speech_to_text_async(self, prepared: Dict[str, Any], language: str) -> Dict[str, Any]:
+        """Transcribe audio returned by _prepare_audio"""
         try:
-            # Create temporary file for audio
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-                tmp_file.write(audio_data)
-                tmp_file_path = tmp_file.name
-            
-            try:
-                # Run STT in thread pool to avoid blocking
-                loop = asyncio.get_event_loop()
-                stt_result = await loop.run_in_executor(
-                    None, 
-                    self.sarvam_service.speech_to_text,
-                    tmp_file_path,
-                    language
-                )
-                return stt_result
-            finally:
-                os.unlink(tmp_file_path)
-                
+            return await self.sarvam_service.speech_to_text(
+                (upload_filename(prepared['content_type']), prepared['audio'], prepared['content_type']), language
+            )
         except Exception as e:
             logger.error(f"STT async error: {str(e)}")
             return {'success': False, 'error': str(e)}
@@ -404,17 +450,18 @@ class StreamingDebateManager:
             context += f"\nOpponent's latest argument: {user_argument}\n"
             context += f"Provide a strong counter-argument from the {room.ai_stance} perspective. Keep it concise and compelling."
             
-            # Run AI generation in thread pool
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                self.sarvam_service.create_debate_opponent_response,
+            result = await self.sarvam_service.create_debate_opponent_response(
                 room.topic.title,
                 user_argument,
                 room.ai_stance,
                 room.language
             )
-            return result
+            if result['success']:
+                return result
+            
+            # Fast fallback so the turn still completes during an LLM outage
+            logger.warning(f"Serving fallback rebuttal in room {room.id}: {result.get('error')}")
+            return {'success': True, 'response': fallback_rebuttal(room.topic.title, user_argument), 'fallback': True}
             
         except Exception as e:
             logger.error(f"AI response generation error: {str(e)}")
@@ -472,29 +519,167 @@ class StreamingDebateManager:
             return False  # If analysis fails, don't assume silence
     
     async def _publish_to_room(self, room_id: str, message_type: str, data: Dict[str, Any]) -> None:
-        """Publish message to room via Redis"""
+        """Publish message to the room's channel layer group (handled by DebateRoomConsumer)"""
         try:
-            channel = f"debate_room:{room_id}"
-            message = {
+            event = await self.record_room_event(room_id, {
                 'type': message_type,
                 'data': data,
                 'timestamp': timezone.now().isoformat()
-            }
-            
-            # Use async Redis publish
-            await asyncio.get_event_loop().run_in_executor(
-                None,
-                self.redis_client.publish,
-                channel,
-                json.dumps(message, default=str)
-            )
+            })
+            await self.channel_layer.group_send(f"debate_room_{room_id}", event)
             
         except Exception as e:
             logger.error(f"Error publishing to room {room_id}: {str(e)}")
     
+    async def record_room_event(self, room_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Stamp an outbound room event with the next sequence number and append it to the replay log"""
+        try:
+            seq = await asyncio.to_thread(self._append_room_event, room_id, event)
+            return dict(event, seq=seq)
+        except Exception as e:
+            # Live delivery still works without a seq; only replay is lost
+            logger.error(f"Error recording event for room {room_id}: {str(e)}")
+            return event
+    
+    def _append_room_event(self, room_id: str, event: Dict[str, Any]) -> int:
+        """Assign the next seq and append the event under stream id <seq>-0 in one transaction.
+        
+        Without this two publishers could log seq N+1 ahead of N; the WATCH
+        retries instead, so the log is always in seq order with no holes.
+        """
+        seq_key = ROOM_SEQ_KEY.format(room_id=room_id)
+        events_key = ROOM_EVENTS_KEY.format(room_id=room_id)
+        timeout = settings.REALTIME_DEBATE_SETTINGS['SESSION_TIMEOUT']
+        
+        def append(pipe):
+            seq = int(pipe.get(seq_key) or 0) + 1
+            pipe.multi()
+            pipe.set(seq_key, seq, ex=timeout)
+            pipe.xadd(
+                events_key,
+                {'event': json.dumps(dict(event, seq=seq), default=str)},
+                id=f'{seq}-0',
+                maxlen=settings.REALTIME_DEBATE_SETTINGS['EVENT_REPLAY_MAXLEN'],
+                approximate=True
+            )
+            pipe.expire(events_key, timeout)
+            return seq
+        
+        return self.redis_client.transaction(append, seq_key, value_from_callable=True)
+    
+    async def get_room_seq(self, room_id: str) -> int:
+        """Sequence number of the latest event sent to a room"""
+        seq = await asyncio.to_thread(self.redis_client.get, ROOM_SEQ_KEY.format(room_id=room_id))
+        return int(seq) if seq else 0
+    
+    async def get_room_events_since(self, room_id: str, last_seq: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """Events with seq > last_seq, oldest first.
+        
+        The second value is False when the log has already trimmed part of the
+        gap, in which case the client should resync from room status instead.
+        """
+        return await asyncio.to_thread(self._read_room_events, room_id, last_seq)
+    
+    def _read_room_events(self, room_id: str, last_seq: int) -> Tuple[List[Dict[str, Any]], bool]:
+        events_key = ROOM_EVENTS_KEY.format(room_id=room_id)
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.xrange(events_key, count=1)
+        pipe.xrange(events_key, min=f'{last_seq + 1}-0')
+        pipe.get(ROOM_SEQ_KEY.format(room_id=room_id))
+        oldest, entries, current_seq = pipe.execute()
+        
+        # Stream ids are <seq>-0, so the oldest logged seq is the first id's timestamp part
+        oldest_seq = int(oldest[0][0].split(b'-')[0]) if oldest else None
+        events = [json.loads(fields[b'event']) for _, fields in entries]
+        complete = (
+            (oldest_seq is not None and oldest_seq <= last_seq + 1)
+            or last_seq >= int(current_seq or 0)
+        )
+        return events, complete
+    
+    def increment_room_counters(self, room_id: str, **increments: int) -> None:
+        """Add to a room's write-behind analytics counters (no database write)"""
+        try:
+            pipe = self.redis_client.pipeline()
+            counters_key = ROOM_COUNTERS_KEY.format(room_id=room_id)
+            for field, amount in increments.items():
+                if amount:
+                    pipe.hincrby(counters_key, field, amount)
+            pipe.sadd(DIRTY_ROOM_COUNTERS_KEY, room_id)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error incrementing room counters for {room_id}: {str(e)}")
+    
+    def flush_room_counters(self, room_id: str, final: bool = False) -> Dict[str, int]:
+        """Apply accumulated counters to the room row in a single UPDATE.
+        
+        Speaking time is tracked in milliseconds; sub-second remainders stay in
+        Redis for the next flush unless this is the final flush of the debate.
+        """
+        counters_key = ROOM_COUNTERS_KEY.format(room_id=room_id)
+        
+        # Take the counters atomically so increments racing with the flush are not lost
+        pipe = self.redis_client.pipeline(transaction=True)
+        pipe.hgetall(counters_key)
+        pipe.delete(counters_key)
+        pipe.srem(DIRTY_ROOM_COUNTERS_KEY, room_id)
+        raw_counters = pipe.execute()[0]
+        
+        counters = {
+            (k.decode() if isinstance(k, bytes) else k): int(v)
+            for k, v in raw_counters.items()
+        }
+        if not counters:
+            return {}
+        
+        user_ms = counters.get('user_speaking_ms', 0)
+        ai_ms = counters.get('ai_speaking_ms', 0)
+        if final:
+            user_seconds, user_remainder = round(user_ms / 1000), 0
+            ai_seconds, ai_remainder = round(ai_ms / 1000), 0
+        else:
+            user_seconds, user_remainder = divmod(user_ms, 1000)
+            ai_seconds, ai_remainder = divmod(ai_ms, 1000)
+        
+        try:
+            RealtimeDebateRoom.objects.filter(id=room_id).update(
+                total_user_speaking_time=F('total_user_speaking_time') + user_seconds,
+                total_ai_speaking_time=F('total_ai_speaking_time') + ai_seconds,
+                total_arguments_user=F('total_arguments_user') + counters.get('arguments_user', 0),
+                total_arguments_ai=F('total_arguments_ai') + counters.get('arguments_ai', 0),
+                turn_number=F('turn_number') + counters.get('turns', 0),
+            )
+        except Exception:
+            # Put everything back so the next flush retries it
+            self.increment_room_counters(room_id, **counters)
+            raise
+        
+        if user_remainder or ai_remainder:
+            self.increment_room_counters(
+                room_id, user_speaking_ms=user_remainder, ai_speaking_ms=ai_remainder
+            )
+        
+        logger.debug(f"Flushed room counters for {room_id}: {counters}")
+        return counters
+    
+    def flush_dirty_room_counters(self) -> int:
+        """Flush every room with pending counters; returns the number of rooms flushed"""
+        flushed = 0
+        for room_id in self.redis_client.smembers(DIRTY_ROOM_COUNTERS_KEY):
+            room_id = room_id.decode() if isinstance(room_id, bytes) else room_id
+            try:
+                if self.flush_room_counters(room_id):
+                    flushed += 1
+            except Exception as e:
+                logger.error(f"Error flushing room counters for {room_id}: {str(e)}")
+        return flushed
+    
     def end_debate_session(self, room_id: str) -> Dict[str, Any]:
-        """End debate session and clean up resources"""
+        """End debate session and clean up resources (touches the database)"""
         try:
+            # Persist analytics before the session state goes away
+            self.flush_room_counters(room_id, final=True)
+            
             # Stop any active streams
             active_stream_ids = [sid for sid, stream in self.active_streams.items() if stream['room_id'] == room_id]
             for stream_id in active_stream_ids:
@@ -528,7 +713,7 @@ class StreamingDebateManager:
         @database_sync_to_async
         def get_room_sync():
             try:
-                return RealtimeDebateRoom.objects.get(id=room_id)
+                return RealtimeDebateRoom.objects.select_related('topic').get(id=room_id)
             except RealtimeDebateRoom.DoesNotExist:
                 return None
         
@@ -574,7 +759,8 @@ class StreamingDebateManager:
         
         return await save_message()
     
-    async def _save_audio_chunk(self, message_id: int, chunk_number: int, chunk_size: int, processing_time: float):
+    async def _save_audio_chunk(self, room_id: str, message_id: int, chunk_number: int, chunk_size: int,
+                                processing_time: float):
         """Save audio chunk info for analytics"""
         from channels.db import database_sync_to_async
         
@@ -582,13 +768,14 @@ class StreamingDebateManager:
         def save_chunk():
             try:
                 AudioStreamChunk.objects.create(
+                    room_id=room_id,
                     message_id=message_id,
                     chunk_number=chunk_number,
                     chunk_size=chunk_size,
                     processing_time=processing_time
                 )
             except Exception as e:
-                logger.debug(f"Error saving audio chunk: {str(e)}")
+                logger.warning(f"Error saving audio chunk: {str(e)}")
         
         await save_chunk()
     
@@ -1,3 +1,237 @@
-from django.test import TestCase
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import fakeredis
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from debates.models import DebateTopic
+from realtime_debate.api_views import get_message_audio, list_room_messages
+from realtime_debate.archive import RoomAudioArchive
+from realtime_debate.consumers import DebateRoomConsumer
+from realtime_debate.models import RealtimeDebateMessage, RealtimeDebateRoom
+from realtime_debate.services import ROOM_EVENTS_KEY, StreamingDebateManager, parse_seq
 
-# Create your tests here.
+ROOM_ID = 'room-1'
+
+
+class RoomEventLogTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        self.manager = StreamingDebateManager(redis_client=self.redis, sarvam_service=object())
+
+    def record(self, count):
+        async def run():
+            return [await self.manager.record_room_event(ROOM_ID, {'type': 'room_event', 'message': {'n': n}})
+                    for n in range(count)]
+        return asyncio.run(run())
+
+    def test_events_are_stamped_with_consecutive_seqs(self):
+        events = self.record(3)
+        self.assertEqual([event['seq'] for event in events], [1, 2, 3])
+        self.assertEqual(events[2]['message'], {'n': 2})
+        self.assertEqual(asyncio.run(self.manager.get_room_seq(ROOM_ID)), 3)
+
+    def test_concurrent_publishers_log_in_seq_order(self):
+        def publish():
+            for n in range(20):
+                self.manager._append_room_event(ROOM_ID, {'type': 'room_event', 'message': {'n': n}})
+
+        threads = [threading.Thread(target=publish) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        ids = [entry_id for entry_id, _ in self.redis.xrange(ROOM_EVENTS_KEY.format(room_id=ROOM_ID))]
+        self.assertEqual(ids, [f'{seq}-0'.encode() for seq in range(1, 81)])
+
+    def test_replay_returns_only_the_gap(self):
+        self.record(5)
+        events, complete = asyncio.run(self.manager.get_room_events_since(ROOM_ID, 3))
+        self.assertEqual([event['seq'] for event in events], [4, 5])
+        self.assertTrue(complete)
+
+        events, complete = asyncio.run(self.manager.get_room_events_since(ROOM_ID, 5))
+        self.assertEqual((events, complete), ([], True))
+
+    def test_trimmed_log_is_incomplete(self):
+        self.record(5)
+        self.redis.xtrim(ROOM_EVENTS_KEY.format(room_id=ROOM_ID), maxlen=2, approximate=False)
+
+        events, complete = asyncio.run(self.manager.get_room_events_since(ROOM_ID, 1))
+        self.assertEqual([event['seq'] for event in events], [4, 5])
+        self.assertFalse(complete)
+
+        self.redis.delete(ROOM_EVENTS_KEY.format(room_id=ROOM_ID))  # the whole log expired
+        self.assertEqual(asyncio.run(self.manager.get_room_events_since(ROOM_ID, 1)), ([], False))
+
+    def test_seq_parsing(self):
+        self.assertEqual(parse_seq('12'), 12)
+        self.assertEqual(parse_seq(0), 0)
+        for value in ['-1', '1.5', '', None, -1, 2.0, True, [3]]:
+            self.assertIsNone(parse_seq(value))
+
+
+class ReplayConsumerTests(SimpleTestCase):
+    def setUp(self):
+        redis_client = fakeredis.FakeRedis()
+
+        class Consumer(DebateRoomConsumer):
+            streaming_manager_factory = staticmethod(lambda: StreamingDebateManager(
+                redis_client=redis_client, sarvam_service=object()
+            ))
+
+        self.consumer = Consumer()
+        self.consumer.room_id = ROOM_ID
+        self.redis = redis_client
+        self.sent = []
+
+        async def send(text_data=None, bytes_data=None, close=False):
+            self.sent.append(json.loads(text_data))
+        self.consumer.send = send
+
+    def receive(self, message):
+        asyncio.run(self.consumer.receive(text_data=json.dumps(message)))
+
+    def log_events(self, count):
+        async def run():
+            for n in range(count):
+                await self.consumer.streaming_manager.record_room_event(
+                    ROOM_ID, {'type': 'room_event', 'message': {'type': 'transcription', 'n': n}}
+                )
+        asyncio.run(run())
+
+    def test_resume_replays_missed_events(self):
+        self.log_events(3)
+        self.receive({'type': 'resume', 'last_seq': '1'})
+
+        self.assertEqual([message.get('seq') for message in self.sent[:-1]], [2, 3])
+        self.assertEqual(self.sent[-1], {'type': 'replay_complete', 'replayed': 2, 'last_seq': 3, 'complete': True})
+
+    def test_resume_after_trim_says_where_the_replay_starts(self):
+        self.log_events(5)
+        self.redis.xtrim(ROOM_EVENTS_KEY.format(room_id=ROOM_ID), maxlen=2, approximate=False)
+        self.receive({'type': 'resume', 'last_seq': 1})
+
+        self.assertEqual(self.sent[0], {'type': 'replay_start', 'complete': False, 'resume_from': 4})
+        self.assertEqual([message.get('seq') for message in self.sent[1:-1]], [4, 5])
+        self.assertFalse(self.sent[-1]['complete'])
+
+    def test_invalid_last_seq_is_rejected(self):
+        for last_seq in ['abc', -3, None]:
+            self.receive({'type': 'resume', 'last_seq': last_seq})
+        self.assertEqual([message['type'] for message in self.sent], ['error'] * 3)
+        self.assertEqual(self.sent[0]['message'], 'last_seq must be a non-negative integer')
+
+
+def create_room(username='student'):
+    user = User.objects.create_user(username)
+    topic = DebateTopic.objects.create(title='Homework', description='Should homework be banned?',
+                                       difficulty_level='beginner', age_group='10-12')
+    return RealtimeDebateRoom.objects.create(user=user, topic=topic, user_stance='for', ai_stance='against')
+
+
+class MessagePaginationTests(TestCase):
+    def setUp(self):
+        self.room = create_room()
+        RealtimeDebateMessage.objects.bulk_create([
+            RealtimeDebateMessage(room=self.room, speaker='user', message_type='argument',
+                                  text_content=f'Argument {n}', turn_number=n)
+            for n in range(5)
+        ])
+        # Several messages in the same instant, so pages must break ties on id
+        RealtimeDebateMessage.objects.update(timestamp=timezone.now())
+
+    def get(self, user=None, **params):
+        request = APIRequestFactory().get(f'/api/realtime/rooms/{self.room.id}/messages/', params)
+        force_authenticate(request, user=user or self.room.user)
+        return list_room_messages(request, room_id=self.room.id)
+
+    def test_pages_walk_back_through_every_message_once(self):
+        texts, cursor, pages = [], None, 0
+        while True:
+            response = self.get(limit=2, **({'before': cursor} if cursor else {}))
+            self.assertEqual(response.status_code, 200)
+            texts = [message['text'] for message in response.data['messages']] + texts
+            pages += 1
+            if not response.data['has_more']:
+                self.assertIsNone(response.data['next_cursor'])
+                break
+            cursor = response.data['next_cursor']
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(texts, [f'Argument {n}' for n in range(5)])
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(len(self.get(limit=0).data['messages']), 1)
+        self.assertEqual(len(self.get(limit='many').data['messages']), 5)
+
+    def test_malformed_cursor_is_a_400(self):
+        response = self.get(before='not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Invalid cursor')
+
+    def test_another_users_room_is_a_404(self):
+        self.assertEqual(self.get(user=User.objects.create_user('other')).status_code, 404)
+
+
+class MessageAudioTests(TestCase):
+    def setUp(self):
+        self.archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_root)
+        archive_settings = override_settings(REALTIME_DEBATE_SETTINGS=dict(
+            settings.REALTIME_DEBATE_SETTINGS, AUDIO_ARCHIVE_ROOT=self.archive_root, AUDIO_ARCHIVE_SEGMENT_SIZE=64
+        ))
+        archive_settings.enable()
+        self.addCleanup(archive_settings.disable)
+
+        self.room = create_room()
+        self.audio = b'OggS' + bytes(range(60))
+        archive = RoomAudioArchive(self.room.id)
+        archive.append(1, b'\x00' * 40)  # fills most of the first segment
+        archive.append(2, self.audio)  # so this one starts a new segment
+
+    def get(self, message_id=2, user=None, range_header=None):
+        headers = {'HTTP_RANGE': range_header} if range_header else {}
+        request = APIRequestFactory().get(f'/api/realtime/rooms/{self.room.id}/messages/{message_id}/audio/', **headers)
+        force_authenticate(request, user=user or self.room.user)
+        return get_message_audio(request, room_id=self.room.id, message_id=message_id)
+
+    def test_whole_blob_without_a_range(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.audio)
+        self.assertEqual(response['Content-Type'], 'audio/ogg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_byte_ranges_are_partial_content(self):
+        for range_header, start, end in [('bytes=0-3', 0, 3), ('bytes=10-', 10, 63), ('bytes=-5', 59, 63),
+                                         ('bytes=60-1000', 60, 63), ('bytes=2-4, 8-9', 2, 4)]:
+            with self.subTest(range_header):
+                response = self.get(range_header=range_header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response.content, self.audio[start:end + 1])
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/64')
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+
+    def test_unsatisfiable_ranges_are_a_416(self):
+        for range_header in ['bytes=64-', 'bytes=9-3', 'bytes=abc-']:
+            with self.subTest(range_header):
+                response = self.get(range_header=range_header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'bytes */64')
+
+    def test_reads_come_from_the_right_segment(self):
+        archive = RoomAudioArchive(self.room.id)
+        self.assertEqual([record[1] for record in archive.records()], [0, 1])
+        self.assertEqual(archive.read(archive.lookup(2), 4, 7), self.audio[4:8])
+        self.assertEqual(archive.read(archive.lookup(2), 8, 3), b'')
+
+    def test_missing_audio_and_foreign_rooms_are_404s(self):
+        self.assertEqual(self.get(message_id=3).status_code, 404)
+        self.assertEqual(self.get(user=User.objects.create_user('other')).status_code, 404)
@@ -1,7 +1,7 @@
 from django.urls import path
+from .api_views import get_tts_audio, sarvam_metrics
 
 urlpatterns = [
-    # Add your Sarvam AI API endpoints here when you implement them
-    # Example:
-    # path('some-endpoint/', views.SomeView.as_view(), name='some-endpoint'),
+    path('tts/<str:audio_key>.wav', get_tts_audio, name='sarvam-tts-audio'),
+    path('metrics/', sarvam_metrics, name='sarvam-metrics'),
 ]
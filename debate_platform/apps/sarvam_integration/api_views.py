@@ -0,0 +1,72 @@
+# apps/sarvam_integration/api_views.py
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from django.conf import settings
+from django.http import FileResponse
+from .audio_store import get_audio_store
+# Imported by their apps.* path, the one the services use, so these are the live process-wide instances
+from apps.sarvam_integration.async_service import get_async_sarvam_service
+from apps.sarvam_integration.audio_preprocessing import get_audio_preprocessor
+from apps.sarvam_integration.cache import cache_stats
+from apps.sarvam_integration.language_detection import get_language_detector
+from apps.sarvam_integration.metrics import get_metrics
+from apps.sarvam_integration.singleflight import single_flight_stats
+from apps.sarvam_integration.translation_memory import get_translation_memory
+import logging
+
+logger = logging.getLogger('sarvam_integration')
+
+@api_view(['GET'])
+@permission_classes([AllowAny])  # fetched by <audio> elements, which cannot send the JWT header
+def get_tts_audio(request, audio_key):
+    """Serve synthesized speech from the content-addressed audio store"""
+    try:
+        path = get_audio_store().get(audio_key)
+    except ValueError:
+        path = None
+    
+    if not path:
+        return Response({
+            'success': False,
+            'error': 'Audio not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        response = FileResponse(open(path, 'rb'), content_type='audio/wav')
+    except FileNotFoundError:
+        # Evicted between lookup and open
+        return Response({
+            'success': False,
+            'error': 'Audio not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    # The key is a hash of the content, so the file never changes
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def sarvam_metrics(request):
+    """Sarvam call metrics for this worker process (local requests and staff only)"""
+    if not (request.user.is_staff or request.META.get('REMOTE_ADDR') in settings.SARVAM_METRICS_SETTINGS['ALLOWED_IPS']):
+        return Response({
+            'success': False,
+            'error': 'Metrics are only available locally or to staff'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    service = get_async_sarvam_service()
+    return Response({
+        'success': True,
+        'metrics': get_metrics().snapshot(),
+        'concurrency': service.stats(),
+        'circuit_breakers': service.breaker_stats(),
+        'rate_limit': service.rate_limiter.stats(),
+        'caches': cache_stats(),
+        'single_flight': single_flight_stats(),
+        'translation_memory': get_translation_memory().stats(),
+        'language_detection': get_language_detector().stats(),
+        'audio_preprocessing': get_audio_preprocessor().stats(),
+    })
@@ -0,0 +1,575 @@
+import asyncio
+import concurrent.futures
+import json
+import queue
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+import httpx
+from django.conf import settings
+from sarvamai import AsyncSarvamAI
+from sarvamai.core.api_error import ApiError
+from sarvamai.core.jsonable_encoder import jsonable_encoder
+from .clients import build_async_http_client, get_http_settings, get_sarvam_environment
+from .metrics import UPSTREAM, get_metrics, instrumented, record_http_response
+from .rate_limit import RateLimited, TokenBucketLimiter, current_priority
+from .resilience import CircuitBreaker, call_timeout, is_upstream_failure
+import logging
+
+logger = logging.getLogger('sarvam_integration')
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class SarvamServiceError(Exception):
+    """An upstream call failed; raised where callers need an exception rather than a result dict"""
+
+
+def build_opponent_prompt(topic: str, clean_argument: str, stance: str) -> str:
+    return f"""You are an AI debate opponent. Your task is to argue the {stance} position on the topic: "{topic}".
+
+Rules:
+1. Provide logical counter-arguments to the student's position
+2. Use evidence and examples when possible
+3. Identify any logical fallacies in the student's argument
+4. Keep responses focused and under 200 words
+5. Be respectful but firm in your opposition
+6. If student argument is off topic then point it to him instead of giving counter arguments
+Student's argument: {clean_argument}
+
+Your response:"""
+
+
+class EndpointLimiter:
+    """Concurrency cap for one Sarvam endpoint, with queue-depth gauges"""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.waiting = 0
+        self.in_flight = 0
+        self.max_waiting = 0
+        self.completed = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.semaphore.locked():
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            try:
+                await self.semaphore.acquire()
+            finally:
+                self.waiting -= 1
+        else:
+            await self.semaphore.acquire()
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self.semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'limit': self.limit,
+            'waiting': self.waiting,
+            'in_flight': self.in_flight,
+            'max_waiting': self.max_waiting,
+            'completed': self.completed,
+        }
+
+
+class AsyncSarvamAIService:
+    """Async-native Sarvam client with per-endpoint concurrency limits.
+
+    Every upstream call runs on one dedicated event loop thread, so the
+    endpoint semaphores bound the whole process no matter which thread or
+    event loop the call came from. Coroutines may be awaited from any loop
+    (they are bridged onto the service loop); sync code uses run_sync().
+
+    Before taking a concurrency slot, each call takes a token from the shared
+    quota (see rate_limit.py) at the caller's priority class; calls shed by
+    the limiter return {'success': False, 'rate_limited': True, ...}. Calls
+    are also bounded by the caller's deadline and a per-endpoint circuit
+    breaker (see resilience.py), failing fast with 'timed_out' or
+    'circuit_open' set.
+    """
+
+    def __init__(self, client: Optional[AsyncSarvamAI] = None, http_client: Optional[httpx.AsyncClient] = None,
+                 limits: Optional[Dict[str, int]] = None, rate_limiter: Optional[TokenBucketLimiter] = None):
+        self._client = client
+        self._http_client = http_client
+        self.rate_limiter = rate_limiter or TokenBucketLimiter()
+        self.limits = {k.lower(): v for k, v in (limits or settings.SARVAM_CONCURRENCY_SETTINGS).items()}
+        self.http_settings = get_http_settings()
+        self.base_url = settings.SARVAM_BASE_URL.rstrip('/')
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='sarvam-async', daemon=True)
+        self._thread.start()
+        self.limiters = self.run_sync(self._create_limiters())
+        self.breakers = {endpoint: CircuitBreaker(endpoint) for endpoint in self.limits}
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _create_limiters(self) -> Dict[str, EndpointLimiter]:
+        # Created on the service loop, which is the only loop that ever awaits them
+        return {endpoint: EndpointLimiter(endpoint, limit) for endpoint, limit in self.limits.items()}
+
+    # Clients are created lazily on the service loop, since async HTTP clients bind to their loop
+    @property
+    def client(self) -> AsyncSarvamAI:
+        if self._client is None:
+            self._client = AsyncSarvamAI(
+                api_subscription_key=settings.SARVAM_API_KEY,
+                environment=get_sarvam_environment(),
+                httpx_client=self.http_client,
+            )
+        return self._client
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            self._http_client = build_async_http_client(event_hooks={'response': [record_http_response]})
+        return self._http_client
+
+    # Loop bridging
+    def run_sync(self, coro, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the service loop from synchronous code"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError('run_sync() called from the Sarvam service loop; await the coroutine instead')
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    async def _on_loop(self, coro) -> Any:
+        """Await a coroutine on the service loop from whichever loop we're on"""
+        if asyncio.get_running_loop() is self.loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def slot(self, endpoint: str):
+        return self.limiters[endpoint].slot()
+
+    async def _admit(self, endpoint: str, call) -> Dict[str, Any]:
+        """Run a call within the caller's deadline, behind the circuit breaker and the shared quota"""
+        min_timeout = settings.SARVAM_RESILIENCE_SETTINGS['MIN_CALL_TIMEOUT']
+        budget = call_timeout(endpoint)
+        started = time.monotonic()
+        if budget < min_timeout:
+            return {'success': False, 'error': f"Request budget exhausted before Sarvam {endpoint} call", 'timed_out': True}
+
+        breaker = self.breakers[endpoint]
+        if not breaker.allow():
+            return {'success': False, 'error': f"Sarvam {endpoint} is unavailable (circuit open)", 'circuit_open': True}
+
+        try:
+            await asyncio.wait_for(self.rate_limiter.acquire(endpoint, current_priority()), budget)
+        except (RateLimited, asyncio.TimeoutError) as e:
+            breaker.record_neutral()
+            message = str(e) or f"Sarvam {endpoint} quota wait exceeded the request budget"
+            logger.info(message)
+            return {'success': False, 'error': message, 'rate_limited': True}
+
+        # Quota and slot waits come out of the same budget as the call itself
+        timeout = budget - (time.monotonic() - started)
+        if timeout < min_timeout:
+            breaker.record_neutral()
+            return {'success': False, 'error': f"Request budget exhausted before Sarvam {endpoint} call", 'timed_out': True}
+
+        try:
+            result = await asyncio.wait_for(call(), timeout)
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            logger.warning(f"Sarvam {endpoint} call timed out after {timeout:.1f}s")
+            return {'success': False, 'error': f"Sarvam {endpoint} timed out after {timeout:.1f}s", 'timed_out': True}
+
+        if is_upstream_failure(result):
+            breaker.record_failure()
+        elif result['success']:
+            breaker.record_success()
+        else:
+            breaker.record_neutral()
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {endpoint: limiter.stats() for endpoint, limiter in self.limiters.items()}
+
+    def breaker_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {endpoint: breaker.stats() for endpoint, breaker in self.breakers.items()}
+
+    # Upstream calls
+    async def _post_form(self, path: str, data: Dict[str, str]) -> httpx.Response:
+        """POST a form, retrying 429/5xx responses with jittered exponential backoff"""
+        headers = {'api-subscription-key': settings.SARVAM_API_KEY or ''}
+        retries = self.http_settings['MAX_RETRIES']
+        for attempt in range(retries + 1):
+            response = await self.http_client.post(f'{self.base_url}{path}', data=data, headers=headers)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            delay = self.http_settings['BACKOFF_FACTOR'] * (2 ** attempt)
+            delay += random.uniform(0, self.http_settings['BACKOFF_JITTER'])
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            await asyncio.sleep(delay)
+        return response
+
+    @instrumented('stt')
+    async def speech_to_text(self, audio, language_code: str = 'hi-IN') -> Dict[str, Any]:
+        """audio: bytes, a file object, or an httpx-style (filename, content, content_type) tuple"""
+        async def call():
+            try:
+                async with self.slot('stt'):
+                    response = await self.client.speech_to_text.transcribe(
+                        file=audio,
+                        language_code=language_code,
+                        model="saarika:v2"
+                    )
+                return {
+                    'success': True,
+                    'transcript': response.transcript,
+                    'language_detected': getattr(response, 'language_code', language_code)
+                }
+            except ApiError as e:
+                logger.error(f"Speech-to-text error: {e.status_code} - {e.body}")
+                return {'success': False, 'error': f"Speech recognition failed: {e.status_code}", 'status_code': e.status_code}
+            except Exception as e:
+                logger.error(f"Speech-to-text error: {str(e)}")
+                return {'success': False, 'error': str(e)}
+        return await self._on_loop(self._admit('stt', call))
+
+    @instrumented('stt')
+    async def speech_to_text_translate(self, audio) -> Dict[str, Any]:
+        async def call():
+            try:
+                async with self.slot('stt'):
+                    response = await self.client.speech_to_text.translate(
+                        file=audio,
+                        model="saaras:v2"
+                    )
+                return {
+                    'success': True,
+                    'transcript': response.transcript,
+                    'language': response.language
+                }
+            except ApiError as e:
+                logger.error(f"Speech-to-text-translate error: {e.status_code} - {e.body}")
+                return {'success': False, 'error': f"Speech translation failed: {e.status_code}", 'status_code': e.status_code}
+            except Exception as e:
+                logger.error(f"Speech-to-text-translate error: {str(e)}")
+                return {'success': False, 'error': str(e)}
+        return await self._on_loop(self._admit('stt', call))
+
+    @instrumented('llm')
+    async def chat_completion(self, messages: list) -> Dict[str, Any]:
+        async def call():
+            try:
+                async with self.slot('llm'):
+                    response = await self.client.chat.completions(messages=messages)
+                return {
+                    'success': True,
+                    'response': response.choices[0].message.content,
+                    'usage': jsonable_encoder(getattr(response, 'usage', None)) or {}
+                }
+            except ApiError as e:
+                logger.error(f"Sarvam AI API error: {e.status_code} - {e.body}")
+                return {'success': False, 'error': f"API Error: {e.status_code}", 'status_code': e.status_code}
+            except Exception as e:
+                logger.error(f"Unexpected error: {str(e)}")
+                return {'success': False, 'error': str(e)}
+        return await self._on_loop(self._admit('llm', call))
+
+    async def create_debate_opponent_response(self, topic: str, student_argument: str,
+                                              stance: str = "opposing", language: str = 'en-IN') -> Dict[str, Any]:
+        clean_argument = ' '.join(student_argument.split())
+        result = await self.chat_completion([
+            {"role": "system", "content": "You are an expert debate opponent."},
+            {"role": "user", "content": build_opponent_prompt(topic, clean_argument, stance)}
+        ])
+        if result['success']:
+            logger.info(f"AI opponent response generated for topic: {topic}")
+        return result
+
+    async def _produce_chat_stream(self, messages: list, deliver: Callable[[Any], None], finished: Any) -> None:
+        """Stream a chat completion on the service loop, handing each text delta to deliver().
+
+        Runs behind the same breaker, quota, slot and deadline as chat_completion;
+        the deadline bounds the whole stream. Failures are delivered as
+        SarvamServiceError, and `finished` is always delivered last.
+        """
+        breaker = self.breakers['llm']
+        started, first_token, outcome, usage = time.perf_counter(), None, 'error', None
+        try:
+            budget = call_timeout('llm')
+            if budget < settings.SARVAM_RESILIENCE_SETTINGS['MIN_CALL_TIMEOUT']:
+                outcome = 'timed_out'
+                raise SarvamServiceError("Request budget exhausted before Sarvam llm stream")
+            if not breaker.allow():
+                outcome = 'circuit_open'
+                raise SarvamServiceError("Sarvam llm is unavailable (circuit open)")
+
+            async with asyncio.timeout(budget):
+                await self.rate_limiter.acquire('llm', current_priority())
+                async with self.slot('llm'):
+                    async with self.http_client.stream(
+                        'POST', f'{self.base_url}/v1/chat/completions',
+                        json={'messages': messages, 'stream': True},
+                        headers={'api-subscription-key': settings.SARVAM_API_KEY or ''}
+                    ) as response:
+                        if response.status_code != 200:
+                            await response.aread()
+                            logger.error(f"Sarvam AI API error: {response.status_code} - {response.text}")
+                            if is_upstream_failure({'success': False, 'status_code': response.status_code}):
+                                breaker.record_failure()
+                            else:
+                                breaker.record_neutral()
+                            raise SarvamServiceError(f"API Error: {response.status_code}")
+
+                        async for line in response.aiter_lines():
+                            if not line.startswith('data:'):
+                                continue
+                            data = line[len('data:'):].strip()
+                            if data == '[DONE]':
+                                break
+                            chunk = json.loads(data)
+                            usage = chunk.get('usage') or usage
+                            for choice in chunk.get('choices') or []:
+                                delta = (choice.get('delta') or {}).get('content')
+                                if delta:
+                                    if first_token is None:
+                                        first_token = time.perf_counter() - started
+                                    deliver(delta)
+            breaker.record_success()
+            outcome = 'ok'
+        except RateLimited as e:
+            breaker.record_neutral()
+            outcome = 'rate_limited'
+            logger.info(str(e))
+            deliver(SarvamServiceError(str(e)))
+        except TimeoutError:
+            breaker.record_failure()
+            outcome = 'timed_out'
+            logger.warning("Sarvam llm stream timed out")
+            deliver(SarvamServiceError("Sarvam llm stream timed out"))
+        except asyncio.CancelledError:
+            breaker.record_neutral()
+            outcome = 'cancelled'
+            raise
+        except SarvamServiceError as e:
+            deliver(e)
+        except Exception as e:
+            breaker.record_failure()
+            logger.error(f"Chat completion stream error: {str(e)}")
+            deliver(SarvamServiceError(f"Chat completion stream failed: {str(e)}"))
+        finally:
+            get_metrics().record_call(UPSTREAM, 'llm_stream', time.perf_counter() - started, outcome, usage=usage)
+            if first_token is not None:
+                get_metrics().record_call(UPSTREAM, 'llm_first_token', first_token, 'ok')
+            deliver(finished)
+
+    def iter_chat_completion(self, messages: list) -> Iterator[str]:
+        """Stream a chat completion's text deltas to synchronous code; raises SarvamServiceError on failure"""
+        config = settings.SARVAM_RESILIENCE_SETTINGS
+        items, finished = queue.Queue(), object()
+        producer = asyncio.run_coroutine_threadsafe(
+            self._produce_chat_stream(messages, items.put, finished), self.loop
+        )
+        try:
+            while True:
+                try:
+                    item = items.get(timeout=config['TIMEOUTS']['LLM'] + config['BACKSTOP_GRACE'])
+                except queue.Empty:
+                    raise SarvamServiceError('Sarvam llm stream stalled')
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if not producer.done():
+                producer.cancel()
+
+    def iter_debate_opponent_response(self, topic: str, clean_argument: str, stance: str = "opposing") -> Iterator[str]:
+        return self.iter_chat_completion([
+            {"role": "system", "content": "You are an expert debate opponent."},
+            {"role": "user", "content": build_opponent_prompt(topic, clean_argument, stance)}
+        ])
+
+    @instrumented('analytics', billed_text=lambda self, text, *args, **kwargs: text)
+    async def text_analytics(self, text: str, questions: list) -> Dict[str, Any]:
+        async def call():
+            try:
+                async with self.slot('analytics'):
+                    response = await self._post_form('/text-analytics', {
+                        "text": text,
+                        "questions": json.dumps(questions)
+                    })
+                if response.status_code == 200:
+                    return {'success': True, 'data': response.json()}
+                logger.error(f"Text analytics API error: {response.status_code} - {response.text}")
+                return {'success': False, 'error': f"API error: {response.status_code}", 'status_code': response.status_code}
+            except Exception as e:
+                logger.error(f"Text analytics error: {str(e)}")
+                return {'success': False, 'error': str(e)}
+        return await self._on_loop(self._admit('analytics', call))
+
+    @instrumented('translate', billed_text=lambda self, text, *args, **kwargs: text)
+    async def translate(self, text: str, source_language: str, target_language: str,
+                        mode: str = 'formal') -> Dict[str, Any]:
+        async def call():
+            try:
+                async with self.slot('translate'):
+                    response = await self.client.text.translate(
+                        input=text,
+                        source_language_code=source_language,
+                        target_language_code=target_language,
+                        mode=mode
+                    )
+                return {'success': True, 'translated_text': response.translated_text}
+            except ApiError as e:
+                logger.error(f"Translation error: {e.status_code} - {e.body}")
+                return {'success': False, 'error': f"Translation failed: {e.status_code}", 'status_code': e.status_code}
+            except Exception as e:
+                logger.error(f"Translation error: {str(e)}")
+                return {'success': False, 'error': str(e)}
+        return await self._on_loop(self._admit('translate', call))
+
+    @instrumented('detect_language', billed_text=lambda self, text, *args, **kwargs: text)
+    async def detect_language(self, text: str) -> Dict[str, Any]:
+        async def call():
+            try:
+                async with self.slot('detect_language'):
+                    response = await self.client.text.identify_language(input=text)
+                return {
+                    'success': True,
+                    'language_code': response.language_code,
+                    'confidence': getattr(response, 'confidence', None)
+                }
+            except ApiError as e:
+                logger.error(f"Language detection error: {e.status_code} - {e.body}")
+                return {'success': False, 'error': f"Language detection failed: {e.status_code}", 'status_code': e.status_code}
+            except Exception as e:
+                logger.error(f"Language detection error: {str(e)}")
+                return {'success': False, 'error': str(e)}
+        return await self._on_loop(self._admit('detect_language', call))
+
+    @instrumented('tts', billed_text=lambda self, text, *args, **kwargs: text)
+    async def text_to_speech(self, text: str, language: str, speaker: str,
+                             model: str = 'bulbul:v2', sample_rate: int = 8000) -> Dict[str, Any]:
+        """Returns the SDK response (base64 WAV chunks in .audios) under 'response'"""
+        async def call():
+            try:
+                async with self.slot('tts'):
+                    response = await self.client.text_to_speech.convert(
+                        text=text,
+                        target_language_code=language,
+                        speaker=speaker,
+                        model=model,
+                        speech_sample_rate=sample_rate
+                    )
+                return {'success': True, 'response': response}
+            except ApiError as e:
+                logger.error(f"Text-to-speech error: {e.status_code} - {e.body}")
+                return {'success': False, 'error': f"Speech synthesis failed: {e.status_code}", 'status_code': e.status_code}
+            except Exception as e:
+                logger.error(f"TTS unexpected error: {str(e)}")
+                return {'success': False, 'error': str(e)}
+        return await self._on_loop(self._admit('tts', call))
+
+    async def stream_tts(self, text: str, language: str, speaker: str, model: str = 'bulbul:v2') -> AsyncIterator[Any]:
+        """Yield streaming TTS messages on the caller's loop.
+
+        The websocket lives on the service loop (holding a 'tts' slot for the
+        whole stream); messages are handed across with call_soon_threadsafe.
+        The quota wait and the stream share one budget: the TTS timeout,
+        clipped to the caller's deadline.
+        """
+        caller_loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        finished = object()
+
+        def deliver(item):
+            caller_loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        async def produce():
+            breaker = self.breakers['tts']
+            started, outcome = time.perf_counter(), 'error'
+            try:
+                budget = call_timeout('tts')
+                if budget < settings.SARVAM_RESILIENCE_SETTINGS['MIN_CALL_TIMEOUT']:
+                    outcome = 'timed_out'
+                    raise SarvamServiceError("Request budget exhausted before Sarvam tts stream")
+                if not breaker.allow():
+                    outcome = 'circuit_open'
+                    raise SarvamServiceError("Streaming TTS is unavailable (circuit open)")
+
+                async with asyncio.timeout(budget):
+                    await self.rate_limiter.acquire('tts', current_priority())
+                    async with self.slot('tts'):
+                        async with self.client.text_to_speech_streaming.connect(model=model) as ws:
+                            await ws.configure(target_language_code=language, speaker=speaker)
+                            await ws.convert(text)
+                            await ws.flush()
+                            async for message in ws:
+                                deliver(message)
+                breaker.record_success()
+                outcome = 'ok'
+            except RateLimited as e:
+                breaker.record_neutral()
+                outcome = 'rate_limited'
+                deliver(SarvamServiceError(str(e)))
+            except TimeoutError:
+                breaker.record_failure()
+                outcome = 'timed_out'
+                logger.warning("Sarvam tts stream timed out")
+                deliver(SarvamServiceError("Streaming TTS timed out"))
+            except asyncio.CancelledError:
+                breaker.record_neutral()
+                outcome = 'cancelled'
+                raise
+            except SarvamServiceError as e:
+                deliver(e)
+            except Exception as e:
+                breaker.record_failure()
+                deliver(SarvamServiceError(f"Streaming TTS failed: {str(e)}"))
+            finally:
+                get_metrics().record_call(UPSTREAM, 'tts_stream', time.perf_counter() - started, outcome,
+                                          billed_characters=len(text))
+                deliver(finished)
+
+        producer = asyncio.run_coroutine_threadsafe(produce(), self.loop)
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if not producer.done():
+                producer.cancel()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_async_sarvam_service() -> AsyncSarvamAIService:
+    """Process-wide service (one loop thread, one set of endpoint limits)"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = AsyncSarvamAIService()
+    return _service
@@ -0,0 +1,318 @@
+import io
+import struct
+import threading
+import time
+import wave
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from django.conf import settings
+import logging
+
+logger = logging.getLogger('sarvam_integration')
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+WEBM_MAGIC = b'\x1a\x45\xdf\xa3'
+WEBM_CLUSTER_ID = b'\x1f\x43\xb6\x75'
+WEBM_CLUSTER_TIMECODE_ID = 0xE7
+
+# Compressed containers NumPy can't decode; these go to STT untouched
+CONTAINER_MAGIC = [
+    (WEBM_MAGIC, 'audio/webm'),
+    (b'OggS', 'audio/ogg'),
+    (b'fLaC', 'audio/flac'),
+    (b'ID3', 'audio/mpeg'),
+    (b'\xff\xfb', 'audio/mpeg'),
+    (b'\xff\xf3', 'audio/mpeg'),
+]
+
+
+class UnsupportedAudio(ValueError):
+    """Audio that can't be decoded here and should be sent as-is"""
+
+
+def _ebml_vint_length(first_byte: int) -> int:
+    """Length of an EBML variable-size integer from its first byte (0 if invalid)"""
+    for length in range(1, 9):
+        if first_byte & (0x80 >> (length - 1)):
+            return length
+    return 0
+
+
+class WebmStream:
+    """Cut one MediaRecorder webm stream into independently playable pieces.
+
+    MediaRecorder.start(timeslice) only puts the EBML header and track info
+    in its first fragment; later fragments continue the current cluster.
+    frame() remembers the header and the open cluster's header (its ID, size
+    and timecode) and prepends them to a headerless piece, so every piece is
+    a webm file a decoder can read on its own. Pieces must be passed in
+    stream order; a new header (the recorder restarted) resets the stream.
+    """
+
+    def __init__(self):
+        self.header = None
+        self.cluster_header = b''
+
+    def frame(self, data: bytes) -> bytes:
+        if data.startswith(WEBM_MAGIC):
+            first_cluster = data.find(WEBM_CLUSTER_ID)
+            self.header = data if first_cluster < 0 else data[:first_cluster]
+            self.cluster_header = b''
+            framed = data
+        elif self.header is None:
+            return data  # not a webm stream we've seen the start of
+        elif data.startswith(WEBM_CLUSTER_ID):
+            framed = self.header + data
+        else:
+            framed = self.header + self.cluster_header + data
+
+        last_cluster = framed.rfind(WEBM_CLUSTER_ID, len(self.header))
+        if last_cluster >= 0:
+            self.cluster_header = self._cluster_header(framed[last_cluster:])
+        return framed
+
+    @staticmethod
+    def _cluster_header(cluster: bytes) -> bytes:
+        """Cluster ID, size and Timecode element at the start of cluster (b'' if malformed)"""
+        offset = len(WEBM_CLUSTER_ID)
+        size_length = _ebml_vint_length(cluster[offset]) if len(cluster) > offset else 0
+        offset += size_length
+        if not size_length or len(cluster) <= offset + 1 or cluster[offset] != WEBM_CLUSTER_TIMECODE_ID:
+            return b''
+        value_length = _ebml_vint_length(cluster[offset + 1])
+        if not value_length:
+            return b''
+        value_size = cluster[offset + 1] & (0xFF >> value_length)
+        for byte in cluster[offset + 2:offset + 1 + value_length]:
+            value_size = (value_size << 8) | byte
+        end = offset + 1 + value_length + value_size
+        return cluster[:end] if end <= len(cluster) else b''
+
+
+def sniff_content_type(data: bytes) -> Optional[str]:
+    if data[:4] == b'RIFF' and data[8:12] == b'WAVE':
+        return 'audio/wav'
+    if data[4:8] == b'ftyp':
+        return 'audio/mp4'
+    for magic, content_type in CONTAINER_MAGIC:
+        if data.startswith(magic):
+            return content_type
+    return None
+
+
+def decode_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """(float32 samples shaped [frames, channels] in -1..1, sample rate) from a PCM or float WAV"""
+    if data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        raise UnsupportedAudio('Not a WAV file')
+
+    fmt, payload, offset = None, None, 12
+    while offset + 8 <= len(data):
+        chunk_id, size = struct.unpack('<4sI', data[offset:offset + 8])
+        body = data[offset + 8:offset + 8 + size]
+        if chunk_id == b'fmt ':
+            fmt = body
+        elif chunk_id == b'data':
+            payload = body  # browsers streaming WAV may leave size as 0xFFFFFFFF; slicing copes
+            break
+        offset += 8 + size + (size & 1)
+    if fmt is None or payload is None:
+        raise UnsupportedAudio('WAV file without fmt or data chunk')
+
+    audio_format, channels, sample_rate, _, _, bits = struct.unpack('<HHIIHH', fmt[:16])
+    if audio_format == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        audio_format = struct.unpack('<H', fmt[24:26])[0]
+
+    width = bits // 8
+    if not width or not channels:  # e.g. 4-bit ADPCM
+        raise UnsupportedAudio(f'Unsupported WAV encoding (format {audio_format}, {bits} bits)')
+    payload = payload[:len(payload) - len(payload) % (width * channels)]
+    if audio_format == WAVE_FORMAT_PCM and bits == 8:
+        samples = (np.frombuffer(payload, np.uint8).astype(np.float32) - 128) / 128
+    elif audio_format == WAVE_FORMAT_PCM and bits == 16:
+        samples = np.frombuffer(payload, '<i2').astype(np.float32) / 32768
+    elif audio_format == WAVE_FORMAT_PCM and bits == 24:
+        raw = np.frombuffer(payload, np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = (np.where(ints >= 1 << 23, ints - (1 << 24), ints)).astype(np.float32) / (1 << 23)
+    elif audio_format == WAVE_FORMAT_PCM and bits == 32:
+        samples = np.frombuffer(payload, '<i4').astype(np.float32) / (1 << 31)
+    elif audio_format == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        samples = np.frombuffer(payload, '<f4' if bits == 32 else '<f8').astype(np.float32)
+    else:
+        raise UnsupportedAudio(f'Unsupported WAV encoding (format {audio_format}, {bits} bits)')
+
+    return samples.reshape(-1, channels), sample_rate
+
+
+def decode_pcm(data: bytes, sample_rate: int, channels: int = 1) -> Tuple[np.ndarray, int]:
+    """Headerless signed 16-bit little-endian PCM (realtime clients that declare audio_format 'pcm_s16le')"""
+    data = data[:len(data) - len(data) % (2 * channels)]
+    return (np.frombuffer(data, '<i2').astype(np.float32) / 32768).reshape(-1, channels), sample_rate
+
+
+def to_mono(samples: np.ndarray) -> np.ndarray:
+    return samples.mean(axis=1) if samples.ndim == 2 else samples
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int, taps: int = 63) -> np.ndarray:
+    """Downsample with a windowed-sinc anti-aliasing filter, then linear interpolation.
+
+    Only ever downsamples: STT gains nothing from upsampled audio.
+    """
+    if from_rate <= to_rate or not len(samples):
+        return samples
+    cutoff = 0.5 * to_rate / from_rate  # new Nyquist, in cycles per input sample
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+    filtered = np.convolve(samples, kernel / kernel.sum(), mode='same')
+    positions = np.arange(int(len(samples) * to_rate / from_rate)) * (from_rate / to_rate)
+    return np.interp(positions, np.arange(len(samples)), filtered).astype(np.float32)
+
+
+def speech_bounds(samples: np.ndarray, sample_rate: int) -> Optional[Tuple[int, int]]:
+    """Sample range from the first to the last speech frame (plus padding), or None if all silence.
+
+    Energy VAD: a frame is speech when it is VAD_THRESHOLD_DB above the
+    recording's noise floor (its quietest frames) and above VAD_MIN_DBFS.
+    """
+    config = settings.AUDIO_PREPROCESSING_SETTINGS
+    frame = max(1, int(sample_rate * config['VAD_FRAME_MS'] / 1000))
+    count = len(samples) // frame
+    if not count:
+        return None
+
+    frames = samples[:count * frame].reshape(count, frame)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = max(noise_floor + config['VAD_THRESHOLD_DB'], config['VAD_MIN_DBFS'])
+    speech = np.flatnonzero(energy_db > threshold)
+    if not len(speech):
+        return None
+
+    padding = int(sample_rate * config['VAD_PADDING_MS'] / 1000)
+    return max(0, speech[0] * frame - padding), min(len(samples), (speech[-1] + 1) * frame + padding)
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """16-bit mono PCM WAV"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+class AudioPreprocessor:
+    """Shrink speech audio before it is uploaded to STT.
+
+    WAV (PCM or float, any channel count and rate) and headerless 16-bit PCM
+    (only when the caller says the audio is PCM) are decoded, downmixed to mono, downsampled to TARGET_SAMPLE_RATE,
+    trimmed of leading and trailing silence and re-encoded as 16-bit mono
+    WAV. Compressed uploads (webm/opus from MediaRecorder, ogg, mp3, ...)
+    are already compact and pass through unchanged, as do bytes that aren't
+    recognised, e.g. MediaRecorder fragments without their container header.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            'processed': 0, 'passed_through': 0, 'bytes_in': 0, 'bytes_out': 0,
+            'seconds_in': 0.0, 'seconds_out': 0.0, 'cpu_seconds': 0.0,
+        }
+
+    def preprocess(self, data: bytes, content_type: Optional[str] = None,
+                   pcm_sample_rate: Optional[int] = None) -> Dict[str, Any]:
+        """Returns audio, content_type, processed, and bytes/duration before and after.
+
+        pcm_sample_rate: the data is headerless PCM at this rate (unless it turns out to be
+        a recognised container). Only pass it when the client declared PCM.
+        """
+        config = settings.AUDIO_PREPROCESSING_SETTINGS
+        started = time.perf_counter()
+        sniffed = sniff_content_type(data)
+        result = {
+            'audio': data,
+            'content_type': sniffed or content_type or 'application/octet-stream',
+            'processed': False,
+            'original_bytes': len(data),
+            'bytes': len(data),
+        }
+        if not config['ENABLED']:
+            return result
+
+        try:
+            if sniffed == 'audio/wav':
+                samples, sample_rate = decode_wav(data)
+            elif sniffed is None and pcm_sample_rate:
+                samples, sample_rate = decode_pcm(data, pcm_sample_rate)
+            else:
+                raise UnsupportedAudio(f'{sniffed or content_type or "unknown"} audio is sent as-is')
+
+            mono = to_mono(samples)
+            original_duration = len(mono) / sample_rate
+            target_rate = min(sample_rate, config['TARGET_SAMPLE_RATE'])
+            mono = resample(mono, sample_rate, target_rate)
+
+            bounds = speech_bounds(mono, target_rate)
+            kept = (0, len(mono)) if bounds is None else bounds
+            mono = mono[kept[0]:kept[1]]
+            audio = encode_wav(mono, target_rate)
+        except UnsupportedAudio as e:
+            logger.debug(f"Audio preprocessing skipped: {str(e)}")
+            self._count(len(data), len(data), 0.0, 0.0, time.perf_counter() - started, processed=False)
+            return result
+        except Exception as e:
+            logger.warning(f"Audio preprocessing failed, uploading original: {str(e)}")
+            self._count(len(data), len(data), 0.0, 0.0, time.perf_counter() - started, processed=False)
+            return result
+
+        duration = len(mono) / target_rate
+        self._count(len(data), len(audio), original_duration, duration, time.perf_counter() - started, processed=True)
+        return dict(
+            result,
+            audio=audio,
+            content_type='audio/wav',
+            processed=True,
+            bytes=len(audio),
+            original_duration=round(original_duration, 3),
+            duration=round(duration, 3),
+            speech_detected=bounds is not None,
+            kept_seconds=(round(kept[0] / target_rate, 3), round(kept[1] / target_rate, 3)),
+        )
+
+    def _count(self, bytes_in: int, bytes_out: int, seconds_in: float, seconds_out: float,
+               cpu_seconds: float, processed: bool) -> None:
+        with self._lock:
+            self.counters['processed' if processed else 'passed_through'] += 1
+            self.counters['bytes_in'] += bytes_in
+            self.counters['bytes_out'] += bytes_out
+            self.counters['seconds_in'] += seconds_in
+            self.counters['seconds_out'] += seconds_out
+            self.counters['cpu_seconds'] += cpu_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.counters)
+        stats['bytes_saved_rate'] = round(1 - stats['bytes_out'] / stats['bytes_in'], 3) if stats['bytes_in'] else None
+        for key in ('seconds_in', 'seconds_out', 'cpu_seconds'):
+            stats[key] = round(stats[key], 3)
+        return stats
+
+
+_preprocessor = None
+_preprocessor_lock = threading.Lock()
+
+
+def get_audio_preprocessor() -> AudioPreprocessor:
+    global _preprocessor
+    if _preprocessor is None:
+        with _preprocessor_lock:
+            if _preprocessor is None:
+                _preprocessor = AudioPreprocessor()
+    return _preprocessor
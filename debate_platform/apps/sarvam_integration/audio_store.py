@@ -0,0 +1,120 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+from django.conf import settings
+import logging
+
+logger = logging.getLogger('sarvam_integration')
+
+AUDIO_KEY = re.compile(r'^[0-9a-f]{64}$')
+
+
+class AudioStore:
+    """Content-addressed on-disk store for synthesized speech.
+
+    Files live at <root>/<key[:2]>/<key>.wav. Writes go to a temp file in the
+    same directory and are renamed into place, so readers never see partial
+    audio and concurrent writers of the same key are harmless. A file's mtime
+    is bumped on every hit and the least recently used files are evicted once
+    the store grows past its size budget.
+    """
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: Optional[int] = None):
+        self.root = Path(root or settings.SARVAM_CACHE_SETTINGS['TTS_ROOT'])
+        self.max_bytes = max_bytes or settings.SARVAM_CACHE_SETTINGS['TTS_MAX_BYTES']
+        self._lock = threading.Lock()
+        # Bytes written since the last eviction pass; a full scan only runs every ~5% of the budget
+        self._written_since_scan = self.max_bytes
+
+    @staticmethod
+    def key(text: str, language: str, speaker: str, model: str, sample_rate: int) -> str:
+        digest = hashlib.sha256()
+        for part in (text, language, speaker, model, str(sample_rate)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        if not AUDIO_KEY.match(key):
+            raise ValueError('Invalid audio key')
+        return self.root / key[:2] / f'{key}.wav'
+
+    def get(self, key: str) -> Optional[Path]:
+        """Path of a stored file (marking it recently used), or None"""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, write: Callable[[str], None]) -> Path:
+        """Store a file produced by write(temp_path) under key"""
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            write(temp_path)
+            os.replace(temp_path, path)
+        except Exception:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        self._note_write(path.stat().st_size)
+        return path
+
+    def _note_write(self, size: int) -> None:
+        with self._lock:
+            self._written_since_scan += size
+            if self._written_since_scan < self.max_bytes // 20:
+                return
+            self._written_since_scan = 0
+        self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used files until the store fits its budget; returns bytes freed"""
+        files = []
+        total = 0
+        for path in self.root.glob('*/*.wav'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        freed = 0
+        for _, size, path in sorted(files):
+            if total - freed <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                freed += size
+            except FileNotFoundError:
+                pass
+
+        if freed:
+            logger.info(f"Evicted {freed} bytes from TTS audio store")
+        return freed
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_audio_store() -> AudioStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AudioStore()
+    return _store
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from .clients import get_redis_client
+import logging
+
+logger = logging.getLogger('sarvam_integration')
+
+
+def content_key(*parts: str) -> str:
+    """Stable hash of the inputs that determine an API result"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class TwoTierCache:
+    """In-process LRU in front of Redis, for JSON-serialisable API results.
+
+    The local tier serves repeats within a worker without a network hop; the
+    Redis tier shares results between workers. Both tiers expire entries after
+    `ttl` seconds. Redis errors degrade to local-only caching.
+    """
+
+    def __init__(self, namespace: str, ttl: int, max_entries: int = None, redis_client=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries or settings.SARVAM_CACHE_SETTINGS['LOCAL_MAX_ENTRIES']
+        self._redis_client = redis_client
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'local_hits': 0, 'redis_hits': 0, 'misses': 0, 'redis_errors': 0}
+
+    @property
+    def redis_client(self):
+        if self._redis_client is None:
+            self._redis_client = get_redis_client()
+        return self._redis_client
+
+    def _redis_key(self, key: str) -> str:
+        return f'sarvam_cache:{self.namespace}:{key}'
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+
+    def _get_local(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, raw = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+        # Entries are kept serialised so callers can't mutate the cached copy
+        return json.loads(raw)
+
+    def _set_local(self, key: str, raw: str) -> None:
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl, raw)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._get_local(key)
+        if value is not None:
+            self._count('local_hits')
+            return value
+
+        try:
+            raw = self.redis_client.get(self._redis_key(key))
+        except Exception as e:
+            self._count('redis_errors')
+            logger.warning(f"Cache read failed for {self.namespace}: {str(e)}")
+            raw = None
+
+        if raw is None:
+            self._count('misses')
+            return None
+
+        raw = raw.decode('utf-8') if isinstance(raw, bytes) else raw
+        self._set_local(key, raw)
+        self._count('redis_hits')
+        return json.loads(raw)
+
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """get() for several keys, fetching the local misses from Redis in one MGET"""
+        values = [self._get_local(key) for key in keys]
+        missing = [index for index, value in enumerate(values) if value is None]
+        with self._lock:
+            self.counters['local_hits'] += len(keys) - len(missing)
+        if not missing:
+            return values
+
+        try:
+            raws = self.redis_client.mget([self._redis_key(keys[index]) for index in missing])
+        except Exception as e:
+            self._count('redis_errors')
+            logger.warning(f"Cache read failed for {self.namespace}: {str(e)}")
+            raws = [None] * len(missing)
+
+        for index, raw in zip(missing, raws):
+            if raw is None:
+                self._count('misses')
+                continue
+            raw = raw.decode('utf-8') if isinstance(raw, bytes) else raw
+            self._set_local(keys[index], raw)
+            self._count('redis_hits')
+            values[index] = json.loads(raw)
+        return values
+
+    def set(self, key: str, value: Any) -> None:
+        raw = json.dumps(value)
+        self._set_local(key, raw)
+        try:
+            self.redis_client.setex(self._redis_key(key), self.ttl, raw)
+        except Exception as e:
+            self._count('redis_errors')
+            logger.warning(f"Cache write failed for {self.namespace}: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._local.pop(key, None)
+        try:
+            self.redis_client.delete(self._redis_key(key))
+        except Exception as e:
+            self._count('redis_errors')
+            logger.warning(f"Cache delete failed for {self.namespace}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.counters, local_entries=len(self._local))
+        lookups = stats['local_hits'] + stats['redis_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['local_hits'] + stats['redis_hits']) / lookups, 3) if lookups else None
+        return stats
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace: str, ttl: int) -> TwoTierCache:
+    """Process-wide cache instance per namespace"""
+    if namespace not in _caches:
+        with _caches_lock:
+            if namespace not in _caches:
+                _caches[namespace] = TwoTierCache(namespace, ttl)
+    return _caches[namespace]
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {namespace: cache.stats() for namespace, cache in _caches.items()}
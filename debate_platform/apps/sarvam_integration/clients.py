@@ -0,0 +1,55 @@
+import threading
+from typing import Callable, Dict, List, Optional
+import httpx
+import redis
+from django.conf import settings
+from sarvamai.environment import SarvamAIEnvironment
+import logging
+
+logger = logging.getLogger('sarvam_integration')
+
+# Process-wide clients: building them per request throws away pooled keep-alive connections
+_lock = threading.Lock()
+_redis_client = None
+
+
+def get_http_settings() -> dict:
+    return settings.SARVAM_HTTP_SETTINGS
+
+
+def build_async_http_client(event_hooks: Optional[Dict[str, List[Callable]]] = None) -> httpx.AsyncClient:
+    """httpx.AsyncClient with a sized keep-alive pool that retries connect errors.
+
+    Retries of 429/5xx responses (with jittered backoff) are done by
+    AsyncSarvamAIService._post_form, which owns the one shared instance.
+    """
+    http_settings = get_http_settings()
+    pool_size = http_settings['POOL_MAXSIZE']
+    return httpx.AsyncClient(
+        timeout=http_settings['TIMEOUT'],
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        transport=httpx.AsyncHTTPTransport(retries=http_settings['MAX_RETRIES']),  # connect errors
+        follow_redirects=True,
+        event_hooks=event_hooks,
+    )
+
+
+def get_sarvam_environment() -> SarvamAIEnvironment:
+    """SDK environment pointing at SARVAM_BASE_URL (and SARVAM_WS_URL for streaming)"""
+    base_url = settings.SARVAM_BASE_URL.rstrip('/')
+    ws_url = settings.SARVAM_WS_URL or base_url.replace('https://', 'wss://').replace('http://', 'ws://')
+    return SarvamAIEnvironment(
+        base=base_url,
+        creative=f'{base_url}/dubbing',
+        production=ws_url.rstrip('/'),
+    )
+
+
+def get_redis_client() -> redis.Redis:
+    """Raw (bytes) Redis client sharing one connection pool per process"""
+    global _redis_client
+    if _redis_client is None:
+        with _lock:
+            if _redis_client is None:
+                _redis_client = redis.from_url(settings.REDIS_URL)
+    return _redis_client
@@ -0,0 +1,320 @@
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import random
+import struct
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, Any, Iterator, List
+import httpx
+from django.conf import settings
+from django.urls import reverse
+from sarvamai import AudioOutput, AudioOutputData
+
+from .async_service import AsyncSarvamAIService
+from .audio_store import get_audio_store
+from .rate_limit import TokenBucketLimiter
+from .services import SarvamAIService, batch_arguments
+
+
+class LatencyModel:
+    """Per-endpoint latency (seconds), used by the fake Sarvam clients and the stand-in server.
+
+    `distribution` shapes the spread around each endpoint's base latency:
+    'uniform' adds +/- jitter x base, 'lognormal' treats base as the median
+    with jitter as sigma (a long right tail, like real APIs), and
+    'exponential' treats base as the mean.
+    """
+
+    DEFAULTS = {
+        'stt': 0.3,
+        'llm': 0.8,
+        'llm_first_token': 0.25,  # streamed completions: time to the first chunk...
+        'llm_token': 0.02,  # ...and between chunks after that
+        'analytics': 0.4,
+        'translate': 0.2,
+        'detect_language': 0.1,
+        'tts': 0.5,
+        'tts_chunk': 0.05,
+    }
+    DISTRIBUTIONS = ('uniform', 'lognormal', 'exponential')
+
+    def __init__(self, jitter: float = 0.2, seed: int = None, distribution: str = 'uniform', **overrides):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.latencies = dict(self.DEFAULTS)
+        self.latencies.update({k: v for k, v in overrides.items() if v is not None})
+        self.jitter = jitter
+        self.distribution = distribution
+        self._random = random.Random(seed)
+
+    def sample(self, endpoint: str) -> float:
+        base = self.latencies.get(endpoint, 0.0)
+        if not base:
+            return 0.0
+        if self.distribution == 'lognormal':
+            return base * math.exp(self._random.gauss(0.0, self.jitter))
+        if self.distribution == 'exponential':
+            return self._random.expovariate(1.0 / base)
+        spread = base * self.jitter
+        return max(0.0, base + self._random.uniform(-spread, spread))
+
+    def sleep(self, endpoint: str) -> None:
+        time.sleep(self.sample(endpoint))
+
+    async def asleep(self, endpoint: str) -> None:
+        await asyncio.sleep(self.sample(endpoint))
+
+
+def silent_wav(duration: float, sample_rate: int = 8000) -> bytes:
+    """Build a silent 16-bit mono WAV file of the given duration"""
+    frames = int(duration * sample_rate)
+    data = b'\x00\x00' * frames
+    header = b'RIFF' + struct.pack('<I', 36 + len(data)) + b'WAVE'
+    header += b'fmt ' + struct.pack('<IHHIIHH', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    header += b'data' + struct.pack('<I', len(data))
+    return header + data
+
+
+class FakeSarvamAIService(SarvamAIService):
+    """Drop-in SarvamAIService that never leaves the process.
+
+    Responses are deterministic for a given input; only the latency is random.
+    """
+
+    def __init__(self, latency: LatencyModel = None):
+        self.latency = latency or LatencyModel()
+        self.calls = {}
+
+    def _record(self, endpoint: str) -> None:
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        self.latency.sleep(endpoint)
+
+    def create_debate_opponent_response(self, topic: str, student_argument: str,
+                                     stance: str = "opposing", language: str = 'en-IN') -> Dict[str, Any]:
+        self._record('llm')
+        return {'success': True, 'response': self._fake_rebuttal(topic, student_argument, stance), 'usage': {}}
+
+    def stream_debate_opponent_response(self, topic: str, student_argument: str,
+                                        stance: str = "opposing", language: str = 'en-IN') -> Iterator[str]:
+        self.calls['llm_stream'] = self.calls.get('llm_stream', 0) + 1
+        self.latency.sleep('llm_first_token')
+        for index, word in enumerate(self._fake_rebuttal(topic, student_argument, stance).split(' ')):
+            if index:
+                self.latency.sleep('llm_token')
+            yield word if not index else f' {word}'
+
+    def _fake_rebuttal(self, topic: str, student_argument: str, stance: str) -> str:
+        digest = hashlib.sha256(student_argument.encode('utf-8')).hexdigest()[:8]
+        return (
+            f"Taking the {stance} position on \"{topic}\": that argument overlooks the costs involved "
+            f"and relies on assumptions that the evidence does not support (ref {digest})."
+        )
+
+    def text_analytics(self, text: str, questions: list) -> Dict[str, Any]:
+        self._record('analytics')
+        return {
+            'success': True,
+            'data': {'answers': [{'id': q['id'], 'response': 'No recommendations'} for q in questions]}
+        }
+
+    def analyze_argument_quality(self, argument_text: str, use_cache: bool = None) -> Dict[str, Any]:
+        self._record('analytics')
+        return self._fake_analysis(argument_text)
+
+    def analyze_arguments(self, argument_texts: List[str], use_cache: bool = None) -> List[Dict[str, Any]]:
+        config = settings.SARVAM_ANALYTICS_BATCH_SETTINGS
+        for _ in batch_arguments(argument_texts, config['MAX_ARGUMENTS'], config['MAX_CHARS']):
+            self._record('analytics')
+        return [self._fake_analysis(text) for text in argument_texts]
+
+    def _fake_analysis(self, argument_text: str) -> Dict[str, Any]:
+        score = len(self.preprocess_text(argument_text)) % 10 + 1
+        return {'success': True, 'analysis': [
+            {'id': 'structure_score', 'response': score},
+            {'id': 'evidence_quality', 'response': score},
+            {'id': 'effectiveness', 'response': score},
+            {'id': 'logical_issues', 'response': 'No issues detected'},
+            {'id': 'improvements', 'response': 'Support the claim with a concrete example.'},
+        ]}
+
+    def translate_text(self, text: str, target_language: str = 'hi-IN', source_language: str = 'en-IN',
+                       mode: str = 'formal', use_cache: bool = None) -> Dict[str, Any]:
+        self._record('translate')
+        return {'success': True, 'translated_text': text}
+
+    def detect_language(self, text: str, expected_language: str = None) -> Dict[str, Any]:
+        self._record('detect_language')
+        return {'success': True, 'language_code': 'en-IN', 'confidence': 1.0}
+
+    def text_to_speech(self, text: str, language: str = 'hi-IN', speaker: str = 'anushka',
+                       model: str = 'bulbul:v2', sample_rate: int = 8000) -> Dict[str, Any]:
+        store = get_audio_store()
+        audio_key = store.key(text, language, speaker, model, sample_rate)
+        cached = store.get(audio_key) is not None
+        if not cached:
+            self._record('tts')
+            audio = silent_wav(len(text) * 0.08, sample_rate)
+            store.put(audio_key, lambda temp_path: Path(temp_path).write_bytes(audio))
+        return {
+            'success': True,
+            'audio_key': audio_key,
+            'audio_url': reverse('sarvam-tts-audio', args=[audio_key]),
+            'cached': cached
+        }
+
+    def speech_to_text(self, audio_file, language_code: str = 'hi-IN') -> Dict[str, Any]:
+        self._record('stt')
+        return {
+            'success': True,
+            'transcript': 'Homework builds discipline and reinforces what students learn in class.',
+            'language_detected': language_code
+        }
+
+
+class _FakeTTSStream:
+    """Mimics the socket returned by AsyncSarvamAI.text_to_speech_streaming.connect()"""
+
+    CHARS_PER_CHUNK = 40
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+        self.language = None
+        self.speaker = None
+        self._pending = []
+
+    async def configure(self, target_language_code: str, speaker: str, **kwargs) -> None:
+        self.language = target_language_code
+        self.speaker = speaker
+
+    async def convert(self, text: str) -> None:
+        self._pending.append(text)
+
+    async def flush(self) -> None:
+        pass
+
+    async def __aiter__(self):
+        text = ' '.join(self._pending)
+        self._pending = []
+        chunk_count = max(1, -(-len(text) // self.CHARS_PER_CHUNK))
+        chunk_audio = base64.b64encode(silent_wav(self.CHARS_PER_CHUNK * 0.08)).decode('ascii')
+        for _ in range(chunk_count):
+            await self.latency.asleep('tts_chunk')
+            yield AudioOutput(data=AudioOutputData(content_type='audio/wav', audio=chunk_audio))
+
+
+class _FakeTTSStreamingClient:
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+        self.connections = 0
+
+    def connect(self, model: str = None, **kwargs):
+        return _FakeTTSConnection(self)
+
+
+class _FakeTTSConnection:
+    def __init__(self, client: _FakeTTSStreamingClient):
+        self.client = client
+
+    async def __aenter__(self):
+        self.client.connections += 1
+        await self.client.latency.asleep('tts')
+        return _FakeTTSStream(self.client.latency)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class _FakeNamespace:
+    def __init__(self, owner: 'FakeAsyncSarvamAI'):
+        self.owner = owner
+
+
+class _FakeSpeechToText(_FakeNamespace):
+    async def transcribe(self, file, language_code: str = None, **kwargs):
+        await self.owner._record('stt')
+        return SimpleNamespace(
+            transcript='Homework builds discipline and reinforces what students learn in class.',
+            language_code=language_code
+        )
+
+    async def translate(self, file, **kwargs):
+        await self.owner._record('stt')
+        return SimpleNamespace(
+            transcript='Homework builds discipline and reinforces what students learn in class.',
+            language='en-IN'
+        )
+
+
+class _FakeChat(_FakeNamespace):
+    async def completions(self, messages: list, **kwargs):
+        await self.owner._record('llm')
+        digest = hashlib.sha256(messages[-1]['content'].encode('utf-8')).hexdigest()[:8]
+        content = (
+            "That argument overlooks the costs involved and relies on assumptions "
+            f"that the evidence does not support (ref {digest})."
+        )
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+class _FakeText(_FakeNamespace):
+    async def translate(self, input: str, **kwargs):
+        await self.owner._record('translate')
+        return SimpleNamespace(translated_text=input)
+
+    async def identify_language(self, input: str, **kwargs):
+        await self.owner._record('detect_language')
+        return SimpleNamespace(language_code='en-IN', confidence=1.0)
+
+
+class _FakeTextToSpeech(_FakeNamespace):
+    async def convert(self, text: str, speech_sample_rate: int = 8000, **kwargs):
+        await self.owner._record('tts')
+        audio = base64.b64encode(silent_wav(len(text) * 0.08, speech_sample_rate)).decode('ascii')
+        return SimpleNamespace(audios=[audio])
+
+
+class FakeAsyncSarvamAI:
+    """Stand-in for AsyncSarvamAI covering the endpoints used by AsyncSarvamAIService"""
+
+    def __init__(self, latency: LatencyModel = None):
+        self.latency = latency or LatencyModel()
+        self.calls = {}
+        self.speech_to_text = _FakeSpeechToText(self)
+        self.chat = _FakeChat(self)
+        self.text = _FakeText(self)
+        self.text_to_speech = _FakeTextToSpeech(self)
+        self.text_to_speech_streaming = _FakeTTSStreamingClient(self.latency)
+
+    async def _record(self, endpoint: str) -> None:
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        await self.latency.asleep(endpoint)
+
+    def analytics_transport(self) -> httpx.MockTransport:
+        """httpx transport answering the Text Analytics form endpoint"""
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await self._record('analytics')
+            form = dict(httpx.QueryParams(request.content.decode('utf-8')))
+            questions = json.loads(form.get('questions', '[]'))
+            return httpx.Response(200, json={
+                'answers': [{'id': q['id'], 'response': 'No recommendations'} for q in questions]
+            })
+        return httpx.MockTransport(handler)
+
+
+def build_fake_async_service(latency: LatencyModel = None, limits: Dict[str, int] = None) -> AsyncSarvamAIService:
+    """AsyncSarvamAIService wired to the in-process fakes, with the real concurrency and quota limits"""
+    import fakeredis.aioredis  # dev-only dependency (requirements-dev.txt)
+
+    client = FakeAsyncSarvamAI(latency)
+    service = AsyncSarvamAIService(
+        client=client,
+        http_client=httpx.AsyncClient(transport=client.analytics_transport()),
+        limits=limits,
+        rate_limiter=TokenBucketLimiter(redis_client=fakeredis.aioredis.FakeRedis())
+    )
+    service.fake_client = client
+    return service
@@ -0,0 +1,196 @@
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+import logging
+
+logger = logging.getLogger('sarvam_integration')
+
+# Unicode blocks of the scripts used by DEBATE_SETTINGS['SUPPORTED_LANGUAGES']
+SCRIPT_RANGES = [
+    (0x0041, 0x024F, 'latin'),
+    (0x0900, 0x097F, 'devanagari'),
+    (0xA8E0, 0xA8FF, 'devanagari'),
+    (0x0980, 0x09FF, 'bengali'),
+    (0x0A00, 0x0A7F, 'gurmukhi'),
+    (0x0A80, 0x0AFF, 'gujarati'),
+    (0x0B80, 0x0BFF, 'tamil'),
+    (0x0C00, 0x0C7F, 'telugu'),
+    (0x0C80, 0x0CFF, 'kannada'),
+    (0x0D00, 0x0D7F, 'malayalam'),
+]
+
+SCRIPT_LANGUAGES = {
+    'latin': ('en-IN', 'hi-Latn'),
+    'devanagari': ('hi-IN', 'mr-IN'),
+    'bengali': ('bn-IN',),
+    'gurmukhi': ('pa-IN',),
+    'gujarati': ('gu-IN',),
+    'tamil': ('ta-IN',),
+    'telugu': ('te-IN',),
+    'kannada': ('kn-IN',),
+    'malayalam': ('ml-IN',),
+}
+
+# Romanised Hindi is told apart from English locally but always left to the API,
+# which knows better whether the user should be answered in hi-IN or en-IN
+ROMANISED_LABELS = {'hi-Latn': 'hi-IN'}
+ROMANISED_MAX_CONFIDENCE = 0.5
+
+# Seed text for scripts shared by more than one language; character trigram
+# statistics from these separate the candidates
+SEED_TEXT = {
+    'hi-IN': (
+        "यह तर्क सही नहीं है क्योंकि इसके पीछे कोई ठोस प्रमाण नहीं है। हमें छात्रों के लिए बेहतर शिक्षा की ज़रूरत है। "
+        "मेरा मानना है कि गृहकार्य बच्चों पर अनावश्यक दबाव डालता है और उनके खेलने का समय कम करता है। "
+        "सरकार को इस विषय पर ध्यान देना चाहिए। यदि हम पर्यावरण की रक्षा नहीं करेंगे तो आने वाली पीढ़ियों को नुकसान होगा। "
+        "सोशल मीडिया से लोगों के बीच दूरी बढ़ रही है। मैं इस बात से सहमत हूँ कि तकनीक ने हमारा जीवन आसान बनाया है। "
+        "उन्होंने कहा था कि यह काम जल्दी किया जाएगा। क्या आप बता सकते हैं कि इसका समाधान क्या है? "
+        "लेकिन इससे समस्या हल नहीं होगी। विद्यालय में बच्चों को बहुत कुछ सीखने को मिलता है। "
+        "हर नागरिक का कर्तव्य है कि वह अपने देश के विकास में योगदान दे। इन सब बातों से साफ़ है कि बदलाव ज़रूरी है।"
+    ),
+    'mr-IN': (
+        "हा युक्तिवाद योग्य नाही कारण त्यामागे कोणताही ठोस पुरावा नाही. आपल्याला विद्यार्थ्यांसाठी चांगल्या शिक्षणाची गरज आहे. "
+        "माझे असे मत आहे की गृहपाठामुळे मुलांवर अनावश्यक ताण येतो आणि त्यांचा खेळण्याचा वेळ कमी होतो. "
+        "सरकारने या विषयाकडे लक्ष दिले पाहिजे. जर आपण पर्यावरणाचे रक्षण केले नाही तर पुढच्या पिढ्यांचे नुकसान होईल. "
+        "समाजमाध्यमांमुळे लोकांमधील अंतर वाढत आहे. तंत्रज्ञानाने आपले जीवन सोपे केले आहे या मताशी मी सहमत आहे. "
+        "त्यांनी सांगितले होते की हे काम लवकर केले जाईल. याचे उत्तर काय आहे हे तुम्ही सांगू शकाल का? "
+        "पण यामुळे प्रश्न सुटणार नाही. शाळेत मुलांना खूप काही शिकायला मिळते. "
+        "प्रत्येक नागरिकाचे कर्तव्य आहे की त्याने आपल्या देशाच्या विकासात योगदान द्यावे. या सगळ्यावरून स्पष्ट होते की बदल आवश्यक आहे."
+    ),
+    'en-IN': (
+        "This argument is not valid because there is no solid evidence behind it. We need better education for students. "
+        "I believe that homework puts unnecessary pressure on children and reduces the time they have to play. "
+        "The government should pay attention to this issue. If we do not protect the environment, future generations will suffer. "
+        "Social media is increasing the distance between people. I agree that technology has made our lives easier. "
+        "They said that the work would be done quickly. Can you tell me what the solution to this problem is? "
+        "But this will not solve the problem. Children learn a lot of things at school. "
+        "Every citizen has a duty to contribute to the development of their country. All of this shows that change is necessary."
+    ),
+    'hi-Latn': (
+        "yeh tark sahi nahi hai kyunki iske peeche koi thos saboot nahi hai. hamein chhatron ke liye behtar shiksha ki zaroorat hai. "
+        "mera maanna hai ki homework bachchon par bekaar ka dabaav daalta hai aur unke khelne ka samay kam karta hai. "
+        "sarkar ko is vishay par dhyan dena chahiye. agar hum paryavaran ki raksha nahi karenge to aane wali peedhiyon ka nuksaan hoga. "
+        "social media se logon ke beech doori badh rahi hai. main is baat se sehmat hoon ki technology ne hamari zindagi aasaan banayi hai. "
+        "unhone kaha tha ki yeh kaam jaldi kiya jayega. kya aap bata sakte hain ki iska hal kya hai? "
+        "lekin isse samasya hal nahi hogi. school mein bachchon ko bahut kuch seekhne ko milta hai. "
+        "har nagrik ka kartavya hai ki woh apne desh ke vikas mein yogdaan de. in sab baaton se saaf hai ki badlav zaroori hai."
+    ),
+}
+
+WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def script_of(char: str) -> Optional[str]:
+    code = ord(char)
+    for start, end, script in SCRIPT_RANGES:
+        if start <= code <= end:
+            return script
+    return None
+
+
+def trigrams(text: str) -> List[str]:
+    """Character trigrams of each word, padded with spaces so word edges count"""
+    grams = []
+    for word in WORD.findall(text.lower()):
+        padded = f' {word} '
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NgramModel:
+    """Naive Bayes over character trigrams, with add-one smoothing"""
+
+    def __init__(self, samples: Dict[str, str]):
+        self.counts = {label: Counter(trigrams(text)) for label, text in samples.items()}
+        self.totals = {label: sum(counts.values()) for label, counts in self.counts.items()}
+        self.vocabulary = len(set().union(*self.counts.values()))
+
+    def classify(self, text: str, labels: Tuple[str, ...]) -> Tuple[str, float]:
+        """Best label among `labels` and its posterior (equal priors)"""
+        grams = trigrams(text)
+        scores = {
+            label: sum(
+                math.log((self.counts[label][gram] + 1) / (self.totals[label] + self.vocabulary))
+                for gram in grams
+            )
+            for label in labels
+        }
+        best = max(scores, key=scores.get)
+        # Trigrams within a word are far from independent; temper the evidence before normalising
+        scale = settings.LANGUAGE_DETECTION_SETTINGS['NGRAM_EVIDENCE_SCALE']
+        normaliser = sum(math.exp((score - scores[best]) / scale) for score in scores.values())
+        return best, 1.0 / normaliser
+
+
+class LanguageDetector:
+    """Local detector for the supported Indian languages.
+
+    The dominant Unicode script picks the language outright for scripts used
+    by one supported language, and narrows the candidates to Hindi/Marathi
+    (Devanagari) or English/romanised Hindi (Latin) otherwise; character
+    trigram statistics then choose between those. Confidence combines the
+    dominant script's share of letters, the trigram posterior and a penalty
+    for very short text, so callers can defer to the API below a threshold.
+    """
+
+    def __init__(self):
+        self.model = NgramModel(SEED_TEXT)
+        self._lock = threading.Lock()
+        self.counters = {'local': 0, 'api': 0}
+
+    def detect(self, text: str) -> Dict[str, Any]:
+        scripts = Counter()
+        for char in text:
+            if unicodedata.category(char)[0] in 'LM':
+                script = script_of(char)
+                scripts[script or 'other'] += 1
+
+        letters = sum(scripts.values())
+        if not letters:
+            return {'language_code': None, 'confidence': 0.0, 'script': None}
+
+        script, count = scripts.most_common(1)[0]
+        candidates = SCRIPT_LANGUAGES.get(script)
+        if not candidates:
+            return {'language_code': None, 'confidence': 0.0, 'script': script}
+
+        if len(candidates) == 1:
+            language, ngram_confidence = candidates[0], 1.0
+        else:
+            language, ngram_confidence = self.model.classify(text, candidates)
+
+        min_letters = settings.LANGUAGE_DETECTION_SETTINGS['MIN_LETTERS']
+        confidence = (count / letters) * min(1.0, letters / min_letters) * ngram_confidence
+        if language in ROMANISED_LABELS:
+            language = ROMANISED_LABELS[language]
+            confidence = min(confidence, ROMANISED_MAX_CONFIDENCE)
+
+        return {'language_code': language, 'confidence': round(confidence, 3), 'script': script}
+
+    def count(self, source: str) -> None:
+        with self._lock:
+            self.counters[source] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.counters)
+        total = stats['local'] + stats['api']
+        stats['api_calls_avoided_rate'] = round(stats['local'] / total, 3) if total else None
+        return stats
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_language_detector() -> LanguageDetector:
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = LanguageDetector()
+    return _detector
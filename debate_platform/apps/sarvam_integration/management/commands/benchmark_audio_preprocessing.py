@@ -0,0 +1,122 @@
+import statistics
+import time
+from pathlib import Path
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from apps.sarvam_integration.audio_preprocessing import AudioPreprocessor
+
+# name, sample rate, channels, sample format, leading/trailing silence (s), speech (s);
+# shaped like what browsers and the realtime client actually send
+SYNTHETIC_FIXTURES = [
+    ('chrome-48k-stereo-s16', 48000, 2, 's16', 1.2, 0.9, 6.0),
+    ('safari-44k1-mono-s16', 44100, 1, 's16', 0.6, 1.5, 9.0),
+    ('firefox-48k-stereo-f32', 48000, 2, 'f32', 2.0, 0.4, 4.0),
+    ('android-48k-mono-s16-noisy', 48000, 1, 's16', 0.8, 2.5, 12.0),
+    ('realtime-16k-pcm', 16000, 1, 'pcm', 0.5, 1.0, 5.0),
+    ('short-answer-44k1-stereo', 44100, 2, 's16', 1.5, 1.5, 1.5),
+]
+
+
+def synthetic_speech(seconds: float, sample_rate: int, rng: np.random.Generator) -> np.ndarray:
+    """Voiced, syllable-modulated harmonics: a stand-in for speech energy and spectrum"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pitch = 140 + 40 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 12) if k * 180 < sample_rate / 2)
+    syllables = np.clip(np.sin(2 * np.pi * 4.0 * t + rng.uniform(0, np.pi)), 0, None) ** 0.5
+    return (0.3 * voiced * (0.2 + 0.8 * syllables)).astype(np.float32)
+
+
+def build_fixture(spec, rng: np.random.Generator):
+    """(bytes, pcm sample rate or None, speech start s, speech end s)"""
+    name, rate, channels, sample_format, lead, trail, speech_seconds = spec
+    noise_level = 0.02 if 'noisy' in name else 0.002
+    speech = synthetic_speech(speech_seconds, rate, rng)
+    mono = np.concatenate([np.zeros(int(lead * rate)), speech, np.zeros(int(trail * rate))])
+    mono = mono + rng.normal(0, noise_level, len(mono))
+    samples = np.repeat(mono[:, None], channels, axis=1).astype(np.float32)
+
+    if sample_format == 'pcm':
+        return (np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes(), rate, lead, lead + speech_seconds
+    if sample_format == 'f32':
+        payload, audio_format, bits = samples.astype('<f4').tobytes(), 3, 32
+    else:
+        payload, audio_format, bits = (np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes(), 1, 16
+    block = channels * bits // 8
+    header = b'RIFF' + (36 + len(payload)).to_bytes(4, 'little') + b'WAVE'
+    header += b'fmt ' + (16).to_bytes(4, 'little') + audio_format.to_bytes(2, 'little')
+    header += channels.to_bytes(2, 'little') + rate.to_bytes(4, 'little') + (rate * block).to_bytes(4, 'little')
+    header += block.to_bytes(2, 'little') + bits.to_bytes(2, 'little')
+    header += b'data' + len(payload).to_bytes(4, 'little')
+    return header + payload, None, lead, lead + speech_seconds
+
+
+class Command(BaseCommand):
+    help = 'Report upload bytes and STT latency saved by audio pre-processing on a fixture set'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixtures', help='Directory of .wav files to use instead of the synthetic set')
+        parser.add_argument('--uplink-kbps', type=float, default=1000,
+                            help='Client uplink bandwidth for the modelled upload time (default: 1 Mbps)')
+        parser.add_argument('--stt-rtf', type=float, default=0.15,
+                            help='Modelled STT processing seconds per second of audio')
+        parser.add_argument('--repeat', type=int, default=5, help='Pre-processing runs per fixture for timing')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        if options['fixtures']:
+            paths = sorted(Path(options['fixtures']).glob('*.wav'))
+            if not paths:
+                raise CommandError(f"No .wav files in {options['fixtures']}")
+            fixtures = [(path.name, path.read_bytes(), None, None, None) for path in paths]
+        else:
+            fixtures = [(spec[0], *build_fixture(spec, rng)) for spec in SYNTHETIC_FIXTURES]
+
+        preprocessor = AudioPreprocessor()
+        bytes_per_second = options['uplink_kbps'] * 1000 / 8
+        self.stdout.write(
+            f"Modelled STT latency = upload at {options['uplink_kbps']:g} kbps + {options['stt_rtf']:g}s per audio second"
+        )
+        self.stdout.write(
+            f"{'fixture':28} {'bytes in':>10} {'bytes out':>10} {'audio s':>12} {'cpu ms':>7} "
+            f"{'stt ms before':>14} {'after':>7} {'speech cut ms':>14}"
+        )
+
+        totals = {'bytes_in': 0, 'bytes_out': 0, 'before': 0.0, 'after': 0.0}
+        for name, data, pcm_rate, speech_start, speech_end in fixtures:
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                prepared = preprocessor.preprocess(data, pcm_sample_rate=pcm_rate)
+                timings.append(time.perf_counter() - started)
+            if not prepared['processed']:
+                self.stdout.write(self.style.WARNING(f"{name:28} not processed ({prepared['content_type']})"))
+                continue
+
+            cpu = statistics.median(timings)
+            before = len(data) / bytes_per_second + prepared['original_duration'] * options['stt_rtf']
+            after = cpu + prepared['bytes'] / bytes_per_second + prepared['duration'] * options['stt_rtf']
+            totals['bytes_in'] += len(data)
+            totals['bytes_out'] += prepared['bytes']
+            totals['before'] += before
+            totals['after'] += after
+
+            # Speech the trim cut into, for synthetic fixtures whose speech span is known
+            speech_cut = '-'
+            if speech_start is not None:
+                kept_start, kept_end = prepared['kept_seconds']
+                speech_cut = f"{(max(0.0, kept_start - speech_start) + max(0.0, speech_end - kept_end)) * 1000:.0f}"
+
+            self.stdout.write(
+                f"{name:28} {len(data):10} {prepared['bytes']:10} "
+                f"{prepared['original_duration']:5.1f}->{prepared['duration']:<5.1f} {cpu * 1000:7.1f} "
+                f"{before * 1000:14.0f} {after * 1000:7.0f} {speech_cut:>14}"
+            )
+
+        if totals['bytes_in']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Upload bytes saved: {1 - totals['bytes_out'] / totals['bytes_in']:.1%}  "
+                f"modelled STT latency saved: {(totals['before'] - totals['after']) * 1000:.0f}ms "
+                f"({1 - totals['after'] / totals['before']:.1%}) across {len(fixtures)} fixtures"
+            ))
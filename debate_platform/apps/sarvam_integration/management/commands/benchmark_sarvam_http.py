@@ -0,0 +1,70 @@
+import statistics
+import time
+import requests
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from apps.sarvam_integration import clients
+from apps.sarvam_integration.async_service import AsyncSarvamAIService
+from apps.sarvam_integration.fakes import LatencyModel
+from apps.sarvam_integration.standin import StandInServer
+
+
+class Command(BaseCommand):
+    help = 'Measure per-call overhead of fresh vs pooled Sarvam HTTP clients against a local stand-in server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=200, help='Calls per scenario')
+        parser.add_argument('--server-latency', type=float, default=0.0,
+                            help='Simulated server processing time per call (ms)')
+
+    def handle(self, *args, **options):
+        server_latency = options['server_latency'] / 1000.0
+        latency = LatencyModel(jitter=0.0, **{endpoint: server_latency for endpoint in LatencyModel.DEFAULTS})
+        server = StandInServer(latency=latency).start()
+        base_url = server.base_url
+
+        form = {'text': 'Homework builds discipline.', 'questions': '[]'}
+
+        def bare_post():
+            requests.post(f'{base_url}/text-analytics', data=form).json()
+
+        async def fresh_client():
+            async with clients.build_async_http_client() as client:
+                (await client.post(f'{base_url}/text-analytics', data=form)).json()
+
+        async def pooled_client():
+            (await service._post_form('/text-analytics', form)).json()
+
+        self.stdout.write(
+            f"{options['calls']} calls per scenario, server latency {options['server_latency']}ms (plain HTTP; "
+            f"TLS handshakes make fresh connections considerably more expensive in production)"
+        )
+        self.stdout.write(f"{'scenario':34} {'mean':>8} {'p50':>8} {'p99':>8} {'connections':>12}")
+
+        try:
+            with override_settings(**server.settings_overrides()):
+                # The service the app uses: one pooled httpx client on its own loop
+                service = AsyncSarvamAIService()
+                scenarios = [
+                    ('text-analytics: requests.post', bare_post),
+                    ('text-analytics: client per call', lambda: service.run_sync(fresh_client())),
+                    ('text-analytics: service client', lambda: service.run_sync(pooled_client())),
+                ]
+                for name, call in scenarios:
+                    call()  # warm-up: imports, first connection
+
+                    server.reset_stats()
+                    timings = []
+                    for _ in range(options['calls']):
+                        start = time.perf_counter()
+                        call()
+                        timings.append((time.perf_counter() - start) * 1000)
+
+                    timings.sort()
+                    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+                    self.stdout.write(
+                        f"{name:34} {statistics.mean(timings):7.2f}ms {statistics.median(timings):7.2f}ms "
+                        f"{p99:7.2f}ms {server.stats().get('connections', 0):12}"
+                    )
+        finally:
+            server.stop()
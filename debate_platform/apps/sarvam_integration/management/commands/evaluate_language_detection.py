@@ -0,0 +1,66 @@
+import json
+from collections import Counter
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.sarvam_integration.language_detection import LanguageDetector
+
+DEFAULT_FIXTURE = Path(__file__).resolve().parents[2] / 'eval' / 'language_detection.jsonl'
+
+
+class Command(BaseCommand):
+    help = 'Score the local language detector on a labelled fixture and report how many API calls it avoids'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixture', default=str(DEFAULT_FIXTURE),
+                            help='JSON lines of {"text": ..., "language": ...}')
+        parser.add_argument('--threshold', type=float, help='Override MIN_CONFIDENCE')
+        parser.add_argument('--session-hint', action='store_true',
+                            help="Treat each label as the session's language (EXPECTED_MIN_CONFIDENCE applies)")
+        parser.add_argument('--verbose', action='store_true', help='List every sample that was misclassified or deferred')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['fixture'], encoding='utf-8') as f:
+                samples = [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read fixture: {e}")
+
+        config = settings.LANGUAGE_DETECTION_SETTINGS
+        threshold = options['threshold'] if options['threshold'] is not None else config['MIN_CONFIDENCE']
+        detector = LanguageDetector()
+
+        guessed_right = local = local_right = 0
+        per_language = Counter()
+        per_language_local = Counter()
+        for sample in samples:
+            guess = detector.detect(sample['text'])
+            language = guess['language_code']
+            min_confidence = threshold
+            if options['session_hint'] and language == sample['language']:
+                min_confidence = min(threshold, config['EXPECTED_MIN_CONFIDENCE'])
+            decided = language is not None and guess['confidence'] >= min_confidence
+
+            per_language[sample['language']] += 1
+            guessed_right += language == sample['language']
+            if decided:
+                local += 1
+                local_right += language == sample['language']
+                per_language_local[sample['language']] += 1
+
+            if options['verbose'] and (not decided or language != sample['language']):
+                outcome = 'WRONG' if decided else 'API'
+                self.stdout.write(
+                    f"{outcome:5} {sample['language']} -> {language} ({guess['confidence']}) {sample['text'][:60]}"
+                )
+
+        total = len(samples)
+        if not total:
+            raise CommandError('Fixture is empty')
+
+        self.stdout.write(self.style.SUCCESS(f"{total} samples, threshold {threshold}"))
+        self.stdout.write(f"{'top-guess accuracy':26} {guessed_right / total:.1%}")
+        self.stdout.write(f"{'decided locally':26} {local}/{total} ({local / total:.1%} of API calls avoided)")
+        self.stdout.write(f"{'accuracy when local':26} {local_right / local:.1%}" if local else f"{'accuracy when local':26} n/a")
+        for language in sorted(per_language):
+            self.stdout.write(f"  {language:8} local {per_language_local[language]}/{per_language[language]}")
@@ -0,0 +1,57 @@
+import threading
+from django.core.management.base import BaseCommand
+from apps.sarvam_integration.fakes import LatencyModel
+from apps.sarvam_integration.standin import ErrorInjector, StandInServer
+
+
+class Command(BaseCommand):
+    help = 'Serve a local Sarvam API stand-in (REST and streaming TTS) for offline development and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765, help='REST port')
+        parser.add_argument('--ws-port', type=int, default=8766, help='Streaming TTS websocket port')
+        for endpoint, default in LatencyModel.DEFAULTS.items():
+            parser.add_argument(f"--{endpoint.replace('_', '-')}-latency", type=float, default=default,
+                                help=f'Base {endpoint} latency in seconds (default {default})')
+        parser.add_argument('--distribution', choices=LatencyModel.DISTRIBUTIONS, default='lognormal',
+                            help='Latency distribution around each base latency')
+        parser.add_argument('--jitter', type=float, default=0.3,
+                            help='Relative spread (uniform) or sigma (lognormal) of the latency')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests failed with an error')
+        parser.add_argument('--error-status', type=int, action='append',
+                            help='HTTP status for injected errors (repeatable; default 503)')
+        parser.add_argument('--hang-rate', type=float, default=0.0,
+                            help='Fraction of requests that stall for --hang-seconds before answering')
+        parser.add_argument('--hang-seconds', type=float, default=60.0)
+        parser.add_argument('--seed', type=int, help='Seed latency and error draws for reproducible runs')
+
+    def handle(self, *args, **options):
+        latency = LatencyModel(
+            jitter=options['jitter'],
+            seed=options['seed'],
+            distribution=options['distribution'],
+            **{endpoint: options[f'{endpoint}_latency'] for endpoint in LatencyModel.DEFAULTS}
+        )
+        errors = ErrorInjector(
+            rate=options['error_rate'],
+            statuses=tuple(options['error_status'] or (503,)),
+            hang_rate=options['hang_rate'],
+            hang_seconds=options['hang_seconds'],
+            seed=options['seed'],
+        )
+        server = StandInServer(latency=latency, errors=errors, host=options['host'],
+                               port=options['port'], ws_port=options['ws_port']).start()
+
+        self.stdout.write(self.style.SUCCESS(f"Sarvam stand-in serving {server.base_url} and {server.ws_url}"))
+        self.stdout.write("Point the platform at it with:")
+        for name, value in server.settings_overrides().items():
+            self.stdout.write(f"  export {name}={value}")
+
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+            self.stdout.write(f"Requests served: {server.stats()}")
@@ -0,0 +1,235 @@
+import asyncio
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+from django.conf import settings
+import logging
+
+logger = logging.getLogger('sarvam_integration')
+
+UPSTREAM = 'upstream'  # AsyncSarvamAIService: what Sarvam actually served
+SERVICE = 'service'  # SarvamAIService: what callers saw, including cache hits and fallbacks
+
+# Upstream paths (as the SDK and async service call them) -> endpoint names
+ENDPOINT_PATHS = {
+    '/v1/chat/completions': 'llm',
+    '/text-analytics': 'analytics',
+    '/translate': 'translate',
+    '/text-lid': 'detect_language',
+    '/speech-to-text': 'stt',
+    '/speech-to-text-translate': 'stt',
+    '/text-to-speech': 'tts',
+}
+
+TOKEN_FIELDS = ('prompt_tokens', 'completion_tokens', 'total_tokens')
+
+_breakdown = ContextVar('sarvam_breakdown', default=None)
+
+
+def outcome_of(result: Any) -> str:
+    """Classify a service result dict for the outcome counters"""
+    if not isinstance(result, dict):
+        return 'ok'
+    if result.get('success'):
+        return 'fallback' if result.get('fallback') else 'ok'
+    for flag in ('rate_limited', 'timed_out', 'circuit_open'):
+        if result.get(flag):
+            return flag
+    return 'error'
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are reported as bucket upper bounds"""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets['+Inf'] = self.count
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 4),
+            'mean': round(self.sum / self.count, 4) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': buckets,
+        }
+
+
+class SarvamMetrics:
+    """In-process aggregation of Sarvam call metrics (per worker process).
+
+    Calls are recorded per layer and endpoint: latency histogram and outcome
+    counts for every call, plus token usage and billed characters for
+    upstream calls. HTTP status codes and payload bytes come from the HTTP
+    clients' response hooks, so retried attempts are counted too.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.calls = {}
+        self.http = {}
+
+    def _call_stats(self, layer: str, endpoint: str) -> Dict[str, Any]:
+        layer_stats = self.calls.setdefault(layer, {})
+        if endpoint not in layer_stats:
+            layer_stats[endpoint] = {
+                'calls': 0,
+                'outcomes': {},
+                'latency': Histogram(settings.SARVAM_METRICS_SETTINGS['LATENCY_BUCKETS']),
+                'tokens': dict.fromkeys(TOKEN_FIELDS, 0),
+                'billed_characters': 0,
+            }
+        return layer_stats[endpoint]
+
+    def record_call(self, layer: str, endpoint: str, seconds: float, outcome: str,
+                    usage: Optional[Dict[str, Any]] = None, billed_characters: int = 0) -> None:
+        if not settings.SARVAM_METRICS_SETTINGS['ENABLED']:
+            return
+        with self._lock:
+            stats = self._call_stats(layer, endpoint)
+            stats['calls'] += 1
+            stats['outcomes'][outcome] = stats['outcomes'].get(outcome, 0) + 1
+            stats['latency'].observe(seconds)
+            for field in TOKEN_FIELDS:
+                stats['tokens'][field] += int((usage or {}).get(field) or 0)
+            stats['billed_characters'] += billed_characters
+
+        breakdown = _breakdown.get()
+        if breakdown is not None:
+            entry = {'layer': layer, 'endpoint': endpoint, 'ms': round(seconds * 1000, 1), 'outcome': outcome}
+            if usage:
+                entry['total_tokens'] = usage.get('total_tokens')
+            breakdown.append(entry)
+
+    def record_http(self, endpoint: str, status_code: int, request_bytes: int, response_bytes: int) -> None:
+        if not settings.SARVAM_METRICS_SETTINGS['ENABLED']:
+            return
+        with self._lock:
+            stats = self.http.setdefault(endpoint, {
+                'requests': 0, 'status_codes': {}, 'request_bytes': 0, 'response_bytes': 0
+            })
+            stats['requests'] += 1
+            stats['status_codes'][str(status_code)] = stats['status_codes'].get(str(status_code), 0) + 1
+            stats['request_bytes'] += request_bytes
+            stats['response_bytes'] += response_bytes
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = {
+                layer: {endpoint: dict(stats, outcomes=dict(stats['outcomes']), tokens=dict(stats['tokens']),
+                                       latency=stats['latency'].snapshot())
+                        for endpoint, stats in endpoints.items()}
+                for layer, endpoints in self.calls.items()
+            }
+            http = {endpoint: dict(stats, status_codes=dict(stats['status_codes'])) for endpoint, stats in self.http.items()}
+        return {'uptime_seconds': round(time.time() - self.started_at), 'calls': calls, 'http': http}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self.calls = {}
+            self.http = {}
+
+
+_metrics = SarvamMetrics()
+
+
+def get_metrics() -> SarvamMetrics:
+    return _metrics
+
+
+def instrumented(endpoint: str, layer: str = UPSTREAM, billed_text: Optional[Callable[..., str]] = None):
+    """Record latency and outcome (and token usage) of a Sarvam call method, sync or async.
+
+    billed_text picks the character-billed input out of the call's arguments
+    (e.g. the text of a translation).
+    """
+    def decorator(func):
+        def record(started: float, result: Any, args, kwargs) -> None:
+            usage = result.get('usage') if layer == UPSTREAM and isinstance(result, dict) else None
+            characters = len(billed_text(*args, **kwargs) or '') if billed_text and layer == UPSTREAM else 0
+            _metrics.record_call(layer, endpoint, time.perf_counter() - started, outcome_of(result),
+                                 usage=usage, billed_characters=characters)
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                result = {'success': False}
+                try:
+                    result = await func(*args, **kwargs)
+                    return result
+                finally:
+                    record(started, result, args, kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = {'success': False}
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                record(started, result, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def endpoint_for_url(url) -> str:
+    path = url.path
+    for prefix, endpoint in ENDPOINT_PATHS.items():
+        if path == prefix or path.endswith(prefix):
+            return endpoint
+    return 'other'
+
+
+async def record_http_response(response) -> None:
+    """httpx response hook: status code and payload sizes of every HTTP attempt"""
+    request = response.request
+    _metrics.record_http(
+        endpoint_for_url(request.url),
+        response.status_code,
+        int(request.headers.get('Content-Length') or 0),
+        int(response.headers.get('Content-Length') or 0),
+    )
+
+
+@contextmanager
+def collect_breakdown():
+    """Collect every Sarvam call made in this block (and in work it hands to the service loop)"""
+    calls: List[Dict[str, Any]] = []
+    token = _breakdown.set(calls)
+    try:
+        yield calls
+    finally:
+        _breakdown.reset(token)
@@ -0,0 +1,36 @@
+from django.conf import settings
+from apps.sarvam_integration.metrics import UPSTREAM, collect_breakdown
+
+
+class SarvamBreakdownMiddleware:
+    """In debug mode, attach the Sarvam calls a request made to its response.
+
+    DRF responses with a dict body get a 'sarvam_breakdown' entry; every
+    response gets a Server-Timing header, which browser dev tools display.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SARVAM_METRICS_SETTINGS['REQUEST_BREAKDOWN']:
+            return self.get_response(request)
+
+        with collect_breakdown() as calls:
+            response = self.get_response(request)
+        if not calls:
+            return response
+
+        response['Server-Timing'] = ', '.join(
+            f"sarvam-{index};desc=\"{call['layer']} {call['endpoint']} {call['outcome']}\";dur={call['ms']}"
+            for index, call in enumerate(calls)
+        )
+        if isinstance(getattr(response, 'data', None), dict) and hasattr(response, 'accepted_renderer'):
+            response.data['sarvam_breakdown'] = {
+                'upstream_ms': round(sum(call['ms'] for call in calls if call['layer'] == UPSTREAM), 1),
+                'calls': calls,
+            }
+            # Already rendered by the time middleware sees it; render again with the breakdown
+            response._is_rendered = False
+            response.render()
+        return response
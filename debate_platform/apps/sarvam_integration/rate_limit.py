@@ -0,0 +1,151 @@
+import asyncio
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict
+from django.conf import settings
+import redis
+import redis.asyncio
+import logging
+
+logger = logging.getLogger('sarvam_integration')
+
+INTERACTIVE = 'interactive'
+STANDARD = 'standard'
+BACKGROUND = 'background'
+
+# Optimistic-transaction attempts per token take before backing off like a denial
+MAX_WATCH_ATTEMPTS = 5
+
+_priority = ContextVar('sarvam_priority', default=None)
+
+
+def current_priority() -> str:
+    return _priority.get() or settings.SARVAM_RATE_LIMIT_SETTINGS['DEFAULT_PRIORITY']
+
+
+@contextmanager
+def sarvam_priority(priority: str):
+    """Run Sarvam calls made inside this block (or decorated view) at the given priority class"""
+    if priority not in settings.SARVAM_RATE_LIMIT_SETTINGS['PRIORITIES']:
+        raise ValueError(f"Unknown Sarvam priority class: {priority}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimited(Exception):
+    def __init__(self, endpoint: str, priority: str, retry_after: float):
+        self.endpoint = endpoint
+        self.priority = priority
+        self.retry_after = retry_after
+        super().__init__(f"Sarvam {endpoint} quota exhausted for {priority} requests; retry in {retry_after:.1f}s")
+
+
+class TokenBucketLimiter:
+    """Redis token bucket per Sarvam endpoint, shared by every worker on the API key.
+
+    Each priority class has a reserve: the fraction of the bucket it may not
+    dip into. Interactive calls can drain the bucket; background calls are
+    refused once it is half empty, so they are deferred (and then shed) well
+    before live debates feel any pressure. A refused call waits up to its
+    class's MAX_WAIT for a token before it is shed with RateLimited.
+
+    Redis errors fail open, since the upstream API enforces the real quota.
+    """
+
+    def __init__(self, redis_client=None):
+        self._redis_client = redis_client
+        self._lock = threading.Lock()
+        self.counters = {}
+
+    @property
+    def redis_client(self):
+        # Created lazily on the loop that uses it (the Sarvam service loop)
+        if self._redis_client is None:
+            self._redis_client = redis.asyncio.from_url(settings.REDIS_URL)
+        return self._redis_client
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return settings.SARVAM_RATE_LIMIT_SETTINGS
+
+    def _count(self, endpoint: str, priority: str, outcome: str) -> None:
+        with self._lock:
+            counters = self.counters.setdefault(priority, {}).setdefault(
+                endpoint, {'admitted': 0, 'deferred': 0, 'shed': 0, 'errors': 0}
+            )
+            counters[outcome] += 1
+
+    async def _take(self, endpoint: str, rate: float, burst: int, floor: float) -> float:
+        """Take one token if the bucket stays at or above floor; otherwise return seconds until it would"""
+        key = f'sarvam_rate:{endpoint}'
+        async with self.redis_client.pipeline() as pipe:
+            for _ in range(MAX_WATCH_ATTEMPTS):
+                try:
+                    await pipe.watch(key)
+                    tokens, updated = await pipe.hmget(key, 'tokens', 'updated')
+                    now = time.time()
+                    if tokens is None:
+                        tokens = float(burst)
+                    else:
+                        tokens = min(float(burst), float(tokens) + max(0.0, now - float(updated)) * rate)
+
+                    if tokens - 1 < floor:
+                        await pipe.unwatch()
+                        return (floor + 1 - tokens) / rate
+
+                    pipe.multi()
+                    pipe.hset(key, mapping={'tokens': tokens - 1, 'updated': now})
+                    pipe.expire(key, math.ceil(burst / rate) + 60)
+                    await pipe.execute()
+                    return 0.0
+                except redis.WatchError:
+                    continue
+        # Heavy contention on the bucket: back off as if refused
+        return 1.0 / rate
+
+    async def acquire(self, endpoint: str, priority: str) -> None:
+        """Wait for a token for this endpoint, or raise RateLimited once the class's wait budget is spent"""
+        config = self.config
+        bucket = config['BUCKETS'].get(endpoint.upper())
+        if not config['ENABLED'] or bucket is None:
+            return
+
+        policy = config['PRIORITIES'][priority]
+        rate, burst = bucket['RATE'], bucket['BURST']
+        floor = burst * policy['RESERVE']
+        deadline = time.monotonic() + policy['MAX_WAIT']
+        waited = False
+
+        while True:
+            try:
+                retry_after = await self._take(endpoint, rate, burst, floor)
+            except redis.RedisError as e:
+                logger.warning(f"Sarvam rate limiter unavailable, admitting {endpoint} call: {str(e)}")
+                self._count(endpoint, priority, 'errors')
+                return
+
+            if not retry_after:
+                self._count(endpoint, priority, 'deferred' if waited else 'admitted')
+                return
+            if time.monotonic() + retry_after > deadline:
+                self._count(endpoint, priority, 'shed')
+                raise RateLimited(endpoint, priority, retry_after)
+
+            waited = True
+            # Jitter keeps waiters from retrying in lockstep
+            await asyncio.sleep(retry_after + random.uniform(0, 1.0 / rate))
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Admission counters per priority class, then per endpoint"""
+        with self._lock:
+            return {
+                priority: {endpoint: dict(counters) for endpoint, counters in endpoints.items()}
+                for priority, endpoints in self.counters.items()
+            }
@@ -0,0 +1,143 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from django.conf import settings
+import logging
+
+logger = logging.getLogger('sarvam_integration')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Served by the fast fallback path when the LLM is unavailable
+CANNED_REBUTTALS = [
+    "I see why that point is appealing, but it assumes the benefits outweigh the costs without showing it. "
+    "What evidence tells us this works in practice, and for whom might it backfire?",
+    "That argument rests on a single perspective. Consider who is affected differently by \"{topic}\" "
+    "and whether the same reasoning still holds for them.",
+    "You have stated a conclusion, but the link between your reason and your claim needs support. "
+    "Can you give a concrete example or data that shows the cause and effect?",
+    "Even if that is true in some cases, it does not follow that it is true in general. "
+    "What would you say to the strongest counter-example against your position on \"{topic}\"?",
+]
+
+_deadline = ContextVar('sarvam_deadline', default=None)
+
+
+@contextmanager
+def sarvam_deadline(seconds: Optional[float] = None):
+    """Give the Sarvam calls in this block (or decorated view) one shared latency budget.
+
+    Defaults to DEBATE_SETTINGS['AI_RESPONSE_TIMEOUT']. Nested budgets can only
+    shorten the enclosing one.
+    """
+    if seconds is None:
+        seconds = settings.DEBATE_SETTINGS['AI_RESPONSE_TIMEOUT']
+    deadline = time.monotonic() + seconds
+    enclosing = _deadline.get()
+    if enclosing is not None:
+        deadline = min(deadline, enclosing)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def call_timeout(endpoint: str) -> float:
+    """Timeout for one call: the endpoint's cap, clipped to what is left of the request deadline"""
+    cap = settings.SARVAM_RESILIENCE_SETTINGS['TIMEOUTS'][endpoint.upper()]
+    deadline = _deadline.get()
+    if deadline is None:
+        return cap
+    return min(cap, deadline - time.monotonic())
+
+
+def is_upstream_failure(result: Dict[str, Any]) -> bool:
+    """Failures that say something about Sarvam's health (not rate limiting or bad input)"""
+    if result.get('success') or result.get('rate_limited'):
+        return False
+    status_code = result.get('status_code')
+    return status_code is None or status_code >= 500 or status_code == 429
+
+
+def fallback_rebuttal(topic: str, student_argument: str) -> str:
+    """A canned (but argument-stable) rebuttal for when the LLM can't answer in time"""
+    index = int(hashlib.sha256(student_argument.encode('utf-8')).hexdigest(), 16) % len(CANNED_REBUTTALS)
+    return CANNED_REBUTTALS[index].format(topic=topic)
+
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker (per worker process).
+
+    After FAILURE_THRESHOLD consecutive upstream failures the circuit opens and
+    calls fail immediately. Once RESET_TIMEOUT seconds have passed it goes
+    half-open and lets up to HALF_OPEN_PROBES calls through: a successful probe
+    closes the circuit, a failed one opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 reset_timeout: Optional[float] = None, half_open_probes: Optional[int] = None):
+        config = settings.SARVAM_RESILIENCE_SETTINGS
+        self.name = name
+        self.failure_threshold = failure_threshold or config['BREAKER_FAILURE_THRESHOLD']
+        self.reset_timeout = reset_timeout or config['BREAKER_RESET_TIMEOUT']
+        self.half_open_probes = half_open_probes or config['BREAKER_HALF_OPEN_PROBES']
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self._lock = threading.Lock()
+        self.counters = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; every allowed call must be followed by a record_*()"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.probes_in_flight = 0
+                logger.info(f"Sarvam {self.name} circuit half-open, probing")
+
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self.probes_in_flight < self.half_open_probes:
+                self.probes_in_flight += 1
+                return True
+
+            self.counters['rejected'] += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.counters['successes'] += 1
+            self.failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self.probes_in_flight = 0
+                logger.info(f"Sarvam {self.name} circuit closed")
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.counters['failures'] += 1
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.counters['opened'] += 1
+                    logger.warning(f"Sarvam {self.name} circuit opened after {self.failures} failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.probes_in_flight = 0
+
+    def record_neutral(self) -> None:
+        """The call ended without telling us anything about upstream health (e.g. rate limited)"""
+        with self._lock:
+            if self.state == HALF_OPEN and self.probes_in_flight:
+                self.probes_in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters, state=self.state, consecutive_failures=self.failures)
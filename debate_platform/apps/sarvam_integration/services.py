@@ -1,268 +1,419 @@
+import asyncio
+import concurrent.futures
 import json
-import requests
+import math
+import os
 import logging
 from django.conf import settings
-from typing import Dict, Any, List, Optional
-from sarvamai import SarvamAI
-from sarvamai.core.api_error import ApiError
+from django.urls import reverse
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from .async_service import AsyncSarvamAIService, SarvamServiceError, get_async_sarvam_service
+from .audio_preprocessing import get_audio_preprocessor
+from .audio_store import get_audio_store
+from .cache import content_key, get_cache
+from .language_detection import get_language_detector
+from .metrics import SERVICE, instrumented
+from .resilience import fallback_rebuttal
+from .singleflight import get_single_flight
+from .translation_memory import get_translation_memory
 
-from sarvamai.play import play, save
+from sarvamai.play import save
 
 logger = logging.getLogger('sarvam_integration')
 
+ARGUMENT_QUALITY_QUESTIONS = [
+    {
+        "id": "structure_score",
+        "text": "Rate the logical structure of this argument from 1-10, where 10 is perfectly structured with clear claim, evidence, and reasoning.",
+        "type": "number"
+    },
+    {
+        "id": "evidence_quality",
+        "text": "Rate the quality and relevance of evidence provided in this argument from 1-10.",
+        "type": "number"
+    },
+    {
+        "id": "effectiveness",
+        "text": "Rate the overall persuasiveness and effectiveness of this argument from 1-10.",
+        "type": "number"
+    },
+    {
+        "id": "logical_issues",
+        "text": "Identify any logical fallacies or reasoning errors in this argument. List them clearly.",
+        "type": "long answer"
+    },
+    {
+        "id": "improvements",
+        "text": "Provide specific suggestions to improve this argument's structure, evidence, and persuasiveness.",
+        "type": "long answer"
+    }
+]
+
+# Part of the analysis cache key, so editing the questions invalidates cached answers
+ARGUMENT_QUALITY_QUESTIONS_VERSION = content_key(json.dumps(ARGUMENT_QUALITY_QUESTIONS, sort_keys=True))[:12]
+
+def succeeded(result: Dict[str, Any]) -> bool:
+    """Only successful results are shared with other workers"""
+    return bool(result.get('success'))
+
+def batch_arguments(texts: List[str], max_arguments: int, max_chars: int) -> List[List[int]]:
+    """Group argument indices into Text Analytics batches within the per-request limits"""
+    batches, current, size = [], [], 0
+    for index, text in enumerate(texts):
+        if current and (len(current) >= max_arguments or size + len(text) > max_chars):
+            batches.append(current)
+            current, size = [], 0
+        current.append(index)
+        size += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+def build_batch_request(texts: List[str]) -> Tuple[str, list]:
+    """Pack arguments into one delimited document, asking every quality question once per argument"""
+    documents, questions = [], []
+    for number, text in enumerate(texts, 1):
+        documents.append(f"[ARGUMENT {number}]\n{text}\n[END ARGUMENT {number}]")
+        for question in ARGUMENT_QUALITY_QUESTIONS:
+            questions.append({
+                "id": f"{number}:{question['id']}",
+                "text": f"For ARGUMENT {number} only: {question['text']}",
+                "type": question['type']
+            })
+    return '\n\n'.join(documents), questions
+
+def split_batch_answers(answers: list, count: int) -> List[Optional[list]]:
+    """Map a batch's answers back to each argument by question id; None where any answer is missing"""
+    questions = {question['id']: question['text'] for question in ARGUMENT_QUALITY_QUESTIONS}
+    found = [{} for _ in range(count)]
+    for answer in answers:
+        number, _, question_id = str(answer.get('id', '')).partition(':')
+        if number.isdigit() and 1 <= int(number) <= count and question_id in questions:
+            found[int(number) - 1][question_id] = dict(answer, id=question_id, text=questions[question_id])
+    return [
+        [answers_by_id[question_id] for question_id in questions] if len(answers_by_id) == len(questions) else None
+        for answers_by_id in found
+    ]
+
 class SarvamAIService:
-    def __init__(self):
-        self.client = SarvamAI(
-            api_subscription_key=settings.SARVAM_API_KEY
-        )
+    """Synchronous facade over AsyncSarvamAIService.
 
-        self.base_url = settings.SARVAM_BASE_URL
-        self.headers = {
-            'api-subscription-key': settings.SARVAM_API_KEY,
-            'Content-Type': 'application/json'
-        }
+    Upstream calls run on the shared async service (so they count against its
+    per-endpoint concurrency limits); caching, single-flight and the TTS audio
+    store stay here.
+    """
 
-        self.api_key = settings.SARVAM_API_KEY
+    def __init__(self, async_service: Optional[AsyncSarvamAIService] = None):
+        self.async_service = async_service or get_async_sarvam_service()
+    
+    def _call(self, coro, timeout: Optional[float] = None) -> Any:
+        """Run an async-service call, abandoning it if the service loop stalls past every timeout"""
+        config = settings.SARVAM_RESILIENCE_SETTINGS
+        if timeout is None:
+            timeout = max(config['TIMEOUTS'].values()) + config['BACKSTOP_GRACE']
+        try:
+            return self.async_service.run_sync(coro, timeout)
+        except concurrent.futures.TimeoutError:
+            logger.error("Sarvam call abandoned: service loop did not respond in time")
+            return {'success': False, 'error': 'Sarvam call did not complete in time', 'timed_out': True}
     
     def preprocess_text(self, text: str) -> str:
         text = text.strip()
         text = ' '.join(text.split())
         return text
     
+    @instrumented('create_debate_opponent_response', layer=SERVICE)
     def create_debate_opponent_response(self, topic: str, student_argument: str, 
                                      stance: str = "opposing", language: str = 'en-IN') -> Dict[str, Any]:
         """Generate AI opponent response using Sarvam AI"""
         
         clean_argument = self.preprocess_text(student_argument)
         
-        system_prompt = f"""You are an AI debate opponent. Your task is to argue the {stance} position on the topic: "{topic}".
+        # Identical concurrent requests (e.g. a whole class on one prompt) share one completion
+        flight_key = content_key(topic, clean_argument, stance, language)
+        result = get_single_flight('opponent_response', shareable=succeeded).do(
+            flight_key, lambda: self._call(
+                self.async_service.create_debate_opponent_response(topic, clean_argument, stance, language)
+            )
+        )
+        if result['success']:
+            return result
         
-Rules:
-1. Provide logical counter-arguments to the student's position
-2. Use evidence and examples when possible
-3. Identify any logical fallacies in the student's argument
-4. Keep responses focused and under 200 words
-5. Be respectful but firm in your opposition
-6. If student argument is off topic then point it to him instead of giving counter arguments
-Student's argument: {clean_argument}
+        # Fast fallback: keep the debate moving with a canned rebuttal
+        logger.warning(f"Serving fallback rebuttal for topic {topic}: {result.get('error')}")
+        return {
+            'success': True,
+            'response': fallback_rebuttal(topic, clean_argument),
+            'usage': {},
+            'fallback': True,
+            'upstream_error': result.get('error')
+        }
 
-Your response:"""
-        
+    def stream_debate_opponent_response(self, topic: str, student_argument: str,
+                                        stance: str = "opposing", language: str = 'en-IN') -> Iterator[str]:
+        """Yield the AI opponent response as it is generated.
+
+        If the stream fails before its first token, the response is fetched
+        in one piece (with create_debate_opponent_response's fallback); a
+        stream cut off later ends with what was received.
+        """
+        clean_argument = self.preprocess_text(student_argument)
+        received = False
         try:
-            response = self.client.chat.completions(
-                messages=[
-                    {"role": "system", "content": "You are an expert debate opponent."},
-                    {"role": "user", "content": system_prompt}
-                ],
-            )
-            
-            logger.info(f"AI opponent response generated for topic: {topic}")
-            return {
-                'success': True,
-                'response': response.choices[0].message.content,
-                'usage': getattr(response, 'usage', {})
-            }
-            
-        except ApiError as e:
-            logger.error(f"Sarvam AI API error: {e.status_code} - {e.body}")
-            return {'success': False, 'error': f"API Error: {e.status_code}"}
-        except Exception as e:
-            logger.error(f"Unexpected error: {str(e)}")
-            return {'success': False, 'error': str(e)}
+            for delta in self.async_service.iter_debate_opponent_response(topic, clean_argument, stance):
+                received = True
+                yield delta
+        except SarvamServiceError as e:
+            if received:
+                logger.warning(f"Opponent response stream cut off for topic {topic}: {str(e)}")
+                return
+            logger.warning(f"Opponent response stream failed, answering in one piece: {str(e)}")
+            yield self.create_debate_opponent_response(topic, student_argument, stance, language)['response']
 
+    @instrumented('text_analytics', layer=SERVICE)
     def text_analytics(self, text: str, questions: list) -> Dict[str, Any]:
         """
         Analyze text using Sarvam AI Text Analytics API
         """
-        try:
-            url = f"{self.base_url}/text-analytics"
-            
-            # Format questions for the API
-            questions_formatted = json.dumps(questions)
-            
-            payload = {
-                "text": text,
-                "questions": questions_formatted
-            }
-            
-            headers = {
-                "Content-Type": "application/x-www-form-urlencoded",
-                "api-subscription-key": self.api_key
-            }
-            
-            response = requests.post(url, data=payload, headers=headers)
-            
-            if response.status_code == 200:
-                return {
-                    'success': True,
-                    'data': response.json()
-                }
-            else:
-                logger.error(f"Text analytics API error: {response.status_code} - {response.text}")
-                return {
-                    'success': False,
-                    'error': f"API error: {response.status_code}"
-                }
-                
-        except Exception as e:
-            logger.error(f"Text analytics error: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
-    }
+        flight_key = content_key(text, json.dumps(questions, sort_keys=True))
+        return get_single_flight('text_analytics', shareable=succeeded).do(
+            flight_key, lambda: self._call(self.async_service.text_analytics(text, questions))
+        )
     
-    def analyze_argument_quality(self, argument_text: str) -> Dict[str, Any]:        
+    @instrumented('analyze_argument_quality', layer=SERVICE)
+    def analyze_argument_quality(self, argument_text: str, use_cache: Optional[bool] = None) -> Dict[str, Any]:
+        """Score an argument with Text Analytics.
+        
+        Results are cached by normalised text and question-set version; pass
+        use_cache=False (or disable SARVAM_CACHE_SETTINGS['ENABLED']) to force a
+        fresh analysis, which then refreshes the cached copy.
+        """
         clean_text = self.preprocess_text(argument_text)
+        questions = ARGUMENT_QUALITY_QUESTIONS
         
-        questions = [
-            {
-                "id": "structure_score",
-                "text": "Rate the logical structure of this argument from 1-10, where 10 is perfectly structured with clear claim, evidence, and reasoning.",
-                "type": "number"
-            },
-            {
-                "id": "evidence_quality",
-                "text": "Rate the quality and relevance of evidence provided in this argument from 1-10.",
-                "type": "number"
-            },
-            {
-                "id": "effectiveness",
-                "text": "Rate the overall persuasiveness and effectiveness of this argument from 1-10.",
-                "type": "number"
-            },
-            {
-                "id": "logical_issues",
-                "text": "Identify any logical fallacies or reasoning errors in this argument. List them clearly.",
-                "type": "long answer"
-            },
-            {
-                "id": "improvements",
-                "text": "Provide specific suggestions to improve this argument's structure, evidence, and persuasiveness.",
-                "type": "long answer"
-            }
-        ]
-
-        url = f"{self.base_url}/text-analytics"
+        if use_cache is None:
+            use_cache = settings.SARVAM_CACHE_SETTINGS['ENABLED']
+        cache = get_cache('argument_quality', settings.SARVAM_CACHE_SETTINGS['ARGUMENT_QUALITY_TTL'])
+        cache_key = content_key(ARGUMENT_QUALITY_QUESTIONS_VERSION, clean_text)
         
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded",
-            "api-subscription-key": settings.SARVAM_API_KEY,
-        }
+        if use_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info("Argument analysis served from cache")
+                return cached
+
+        result = get_single_flight('argument_quality', shareable=succeeded).do(
+            cache_key, lambda: self._analyze_argument_upstream(clean_text, questions)
+        )
+        if result['success']:
+            cache.set(cache_key, result)
+        elif not use_cache:
+            # Fast fallback: a forced refresh failed, so serve the previous analysis if there is one
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.warning(f"Serving cached argument analysis: {result.get('error')}")
+                return dict(cached, fallback=True)
+        return result
+    
+    def _analyze_argument_upstream(self, clean_text: str, questions: list) -> Dict[str, Any]:
+        result = self._call(self.async_service.text_analytics(clean_text, questions))
+        if not result['success']:
+            return {'success': False, 'error': f"Analysis failed: {result['error']}"}
         
-        payload = {
-            "text": clean_text,
-            "questions": json.dumps(questions)
-        }
+        logger.info("Argument analysis completed using Text Analytics API")
+        return {'success': True, 'analysis': result['data'].get('answers', [])}
 
-        try:
-            response = requests.post(url, headers=headers, data=payload)
-            response.raise_for_status()
-            
-            result = response.json()
-            answers = result.get('answers', [])
-                        
-            logger.info("Argument analysis completed using Text Analytics API")
-            return {'success': True, 'analysis': answers}
+    @instrumented('analyze_arguments', layer=SERVICE)
+    def analyze_arguments(self, argument_texts: List[str], use_cache: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """Score many arguments with as few Text Analytics calls as the batch limits allow.
+        
+        Results line up with argument_texts and look like analyze_argument_quality's.
+        Cached and duplicate arguments are not sent; the rest are packed into
+        SARVAM_ANALYTICS_BATCH_SETTINGS-sized requests that run concurrently. An
+        argument whose answers don't all come back is retried on its own.
+        """
+        if use_cache is None:
+            use_cache = settings.SARVAM_CACHE_SETTINGS['ENABLED']
+        cache = get_cache('argument_quality', settings.SARVAM_CACHE_SETTINGS['ARGUMENT_QUALITY_TTL'])
+        
+        clean_texts = [self.preprocess_text(text) for text in argument_texts]
+        keys = [content_key(ARGUMENT_QUALITY_QUESTIONS_VERSION, text) for text in clean_texts]
+        texts_by_key = dict(zip(keys, clean_texts))
+        
+        results = {}
+        if use_cache:
+            for key in texts_by_key:
+                cached = cache.get(key)
+                if cached is not None:
+                    results[key] = cached
+        
+        pending = [key for key in texts_by_key if key not in results]
+        if pending:
+            config = settings.SARVAM_ANALYTICS_BATCH_SETTINGS
+            batches = [
+                [pending[index] for index in batch]
+                for batch in batch_arguments([texts_by_key[key] for key in pending],
+                                             config['MAX_ARGUMENTS'], config['MAX_CHARS'])
+            ]
+            analyses = self._call(
+                self._analyze_batches([[texts_by_key[key] for key in batch] for batch in batches]),
+                timeout=self._batches_timeout(len(batches))
+            )
+            if isinstance(analyses, dict):  # the whole run was abandoned
+                analyses = [[None] * len(batch) for batch in batches]
             
-        except requests.RequestException as e:
-            logger.error(f"Text Analytics API error: {str(e)}")
-
-            if hasattr(e, 'response') and e.response is not None:
-                logger.error(f"Response content: {e.response.text}")
-            return {'success': False, 'error': f"Analysis failed: {str(e)}"}
-        except Exception as e:
-            logger.error(f"Analysis error: {str(e)}")
-            return {'success': False, 'error': str(e)}
+            for batch, batch_analyses in zip(batches, analyses):
+                for key, analysis in zip(batch, batch_analyses):
+                    if analysis is not None:
+                        results[key] = {'success': True, 'analysis': analysis}
+                        cache.set(key, results[key])
+            logger.info(f"Batch analysis: {len(pending)} arguments in {len(batches)} requests, "
+                        f"{len(texts_by_key) - len(pending)} from cache")
+        
+        for key in pending:
+            if key not in results:
+                logger.warning("Argument missing from batch analysis, analysing it alone")
+                results[key] = self.analyze_argument_quality(texts_by_key[key], use_cache=use_cache)
+        
+        return [results[key] for key in keys]
+    
+    def _batches_timeout(self, batch_count: int) -> float:
+        config = settings.SARVAM_RESILIENCE_SETTINGS
+        waves = math.ceil(batch_count / self.async_service.limits['analytics'])
+        return waves * (config['TIMEOUTS']['ANALYTICS'] + config['BACKSTOP_GRACE'])
+    
+    async def _analyze_batches(self, batches: List[List[str]]) -> List[List[Optional[list]]]:
+        # Start no more batches than there are analytics slots, so queued ones don't burn their call budget waiting
+        gate = asyncio.Semaphore(self.async_service.limits['analytics'])
+        
+        async def analyze(texts: List[str]) -> List[Optional[list]]:
+            async with gate:
+                result = await self.async_service.text_analytics(*build_batch_request(texts))
+            if not result['success']:
+                logger.error(f"Batch analysis of {len(texts)} arguments failed: {result['error']}")
+                return [None] * len(texts)
+            return split_batch_answers(result['data'].get('answers', []), len(texts))
+        
+        return await asyncio.gather(*(analyze(texts) for texts in batches))
 
-    def translate_text(self, text: str, target_language: str = 'hi-IN') -> Dict[str, Any]:
+    @instrumented('translate_text', layer=SERVICE)
+    def translate_text(self, text: str, target_language: str = 'hi-IN', source_language: str = 'en-IN',
+                       mode: str = 'formal', use_cache: Optional[bool] = None) -> Dict[str, Any]:
+        """Translate through the sentence-level translation memory (see translation_memory.py)"""
+        if source_language == target_language:
+            return {'success': True, 'translated_text': text}
+        
+        if use_cache is None:
+            use_cache = settings.SARVAM_CACHE_SETTINGS['ENABLED']
+        
+        def translate_chunk(chunk: str) -> str:
+            result = self._call(
+                self.async_service.translate(chunk, source_language, target_language, mode)
+            )
+            if not result['success']:
+                raise SarvamServiceError(result['error'])
+            return result['translated_text']
+        
+        def translate_upstream(chunk: str) -> str:
+            return get_single_flight('translate').do(
+                content_key(source_language, target_language, mode, chunk),
+                lambda: translate_chunk(chunk)
+            )
+        
         try:
-            response = self.client.text.translate(
-                input=text,
-                source_language_code="en-IN",
-                target_language_code=target_language,
-                mode="formal"
+            translated_text = get_translation_memory().translate(
+                text, source_language, target_language, mode, translate_upstream, use_cache=use_cache
             )
             
             return {
                 'success': True,
-                'translated_text': response.translated_text
+                'translated_text': translated_text
             }
             
-        except ApiError as e:
-            logger.error(f"Translation error: {e.status_code} - {e.body}")
-            return {'success': False, 'error': f"Translation failed: {e.status_code}"}
+        except SarvamServiceError as e:
+            # Fast fallback: untranslated text beats failing the whole turn
+            logger.warning(f"Serving untranslated text: {str(e)}")
+            return {'success': True, 'translated_text': text, 'fallback': True, 'upstream_error': str(e)}
     
-    def detect_language(self, text: str) -> Dict[str, Any]:
-        try:
-            response = self.client.text.identify_language(input=text)
-            
-            return {
-                'success': True,
-                'language_code': response.language_code,
-                'confidence': getattr(response, 'confidence', None)
-            }
-            
-        except ApiError as e:
-            logger.error(f"Language detection error: {e.status_code} - {e.body}")
-            return {'success': False, 'error': f"Language detection failed: {e.status_code}"}
+    @instrumented('detect_language', layer=SERVICE)
+    def detect_language(self, text: str, expected_language: Optional[str] = None) -> Dict[str, Any]:
+        """Identify the language locally when the script and n-grams are conclusive, else ask the API.
+        
+        expected_language (e.g. the session's language) lowers the confidence
+        needed to accept a matching local guess.
+        """
+        config = settings.LANGUAGE_DETECTION_SETTINGS
+        detector = get_language_detector()
+        
+        if config['LOCAL_ENABLED']:
+            guess = detector.detect(text)
+            min_confidence = config['MIN_CONFIDENCE']
+            if expected_language and guess['language_code'] == expected_language:
+                min_confidence = config['EXPECTED_MIN_CONFIDENCE']
+            if guess['language_code'] and guess['confidence'] >= min_confidence:
+                detector.count('local')
+                return {
+                    'success': True,
+                    'language_code': guess['language_code'],
+                    'confidence': guess['confidence'],
+                    'source': 'local'
+                }
+        
+        detector.count('api')
+        return dict(self._call(self.async_service.detect_language(text)), source='api')
+        
+    @instrumented('text_to_speech', layer=SERVICE)
+    def text_to_speech(self, text: str, language: str = 'hi-IN', speaker: str = 'anushka',
+                       model: str = 'bulbul:v2', sample_rate: int = 8000) -> Dict[str, Any]:
+        """Synthesize speech into the content-addressed audio store.
+        
+        Identical (text, language, speaker, model, sample_rate) requests are
+        served from disk without calling the API. Returns the store key and a
+        URL path for the WAV file.
+        """
+        store = get_audio_store()
+        audio_key = store.key(text, language, speaker, model, sample_rate)
         
-    def text_to_speech(self, text: str, language: str = 'hi-IN', speaker: str = 'anushka') -> Dict[str, Any]:
         try:
-            response = self.client.text_to_speech.convert(
-                text=text,
-                target_language_code=language,
-                speaker=speaker,
-                model="bulbul:v2",
-                speech_sample_rate=8000
-            )
-            
-            # Save using the play utility
-            save(response, "output.wav")
+            cached = store.get(audio_key) is not None
+            if not cached:
+                result = self._call(
+                    self.async_service.text_to_speech(text, language, speaker, model, sample_rate)
+                )
+                if not result['success']:
+                    return result
+                # save() merges the returned WAV chunks into one file
+                store.put(audio_key, lambda temp_path: save(result['response'], temp_path))
             
             return {
                 'success': True,
-                'audio_data': response
+                'audio_key': audio_key,
+                'audio_url': reverse('sarvam-tts-audio', args=[audio_key]),
+                'cached': cached
             }
                 
-        except ApiError as e:
-            logger.error(f"Text-to-speech error: {e.status_code} - {e.body}")
-            return {'success': False, 'error': f"Speech synthesis failed: {e.status_code}"}
         except Exception as e:
             logger.error(f"TTS unexpected error: {str(e)}")
             return {'success': False, 'error': str(e)}
 
+    def _read_upload(self, audio_file) -> Tuple[str, bytes, str]:
+        """Read and pre-process an upload in the caller's thread so only compact bytes cross to the service loop"""
+        name = os.path.basename(getattr(audio_file, 'name', None) or 'audio.wav')
+        prepared = get_audio_preprocessor().preprocess(audio_file.read(), getattr(audio_file, 'content_type', None))
+        if prepared['processed']:
+            name = f"{os.path.splitext(name)[0]}.wav"
+            logger.info(f"Audio pre-processed: {prepared['original_bytes']} -> {prepared['bytes']} bytes, "
+                        f"{prepared['original_duration']}s -> {prepared['duration']}s")
+        return (name, prepared['audio'], prepared['content_type'])
+
+    @instrumented('speech_to_text', layer=SERVICE)
     def speech_to_text(self, audio_file, language_code: str = 'hi-IN') -> Dict[str, Any]:
-        try:
-            response = self.client.speech_to_text.transcribe(
-                file=audio_file,
-                language_code=language_code,
-                model="saarika:v2"
-            )
-            
-            return {
-                'success': True,
-                'transcript': response.transcript,
-                'language_detected': getattr(response, 'language_code', language_code)
-            }
-            
-        except ApiError as e:
-            logger.error(f"Speech-to-text error: {e.status_code} - {e.body}")
-            return {'success': False, 'error': f"Speech recognition failed: {e.status_code}"}
+        return self._call(
+            self.async_service.speech_to_text(self._read_upload(audio_file), language_code)
+        )
 
+    @instrumented('speech_to_text_translate', layer=SERVICE)
     def speech_to_text_translate(self, audio_file, target_language: str = 'en-IN') -> Dict[str, Any]:
-        try:
-            response = self.client.speech_to_text.translate(
-                file=audio_file,
-                model="saaras:v2"
-            )
-            
-            return {
-                'success': True,
-                'transcript': response.transcript,
-                'language': response.language
-            }
-            
-        except ApiError as e:
-            logger.error(f"Speech-to-text-translate error: {e.status_code} - {e.body}")
-            return {'success': False, 'error': f"Speech translation failed: {e.status_code}"}
-
+        return self._call(
+            self.async_service.speech_to_text_translate(self._read_upload(audio_file))
+        )
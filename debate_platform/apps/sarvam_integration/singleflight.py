@@ -0,0 +1,171 @@
+import json
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict
+from django.conf import settings
+import redis
+from .clients import get_redis_client
+import logging
+
+logger = logging.getLogger('sarvam_integration')
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls so they share one upstream request.
+
+    Within a process, followers wait on the leader's call directly. Across
+    workers, the leader holds a Redis lock while it calls upstream and then
+    publishes the result under a short-lived key; followers in other workers
+    poll for that key. If the leader fails (no result and no lock) or the wait
+    times out, a follower falls back to making the call itself.
+
+    Results must be JSON-serialisable. Only results accepted by `shareable`
+    are published to other workers, so failures are never fanned out.
+    """
+
+    def __init__(self, namespace: str, redis_client=None,
+                 shareable: Callable[[Any], bool] = lambda result: True):
+        self.namespace = namespace
+        self.shareable = shareable
+        self._redis_client = redis_client
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.counters = {'leader_calls': 0, 'local_shared': 0, 'remote_shared': 0, 'fallback_calls': 0}
+
+    @property
+    def redis_client(self):
+        if self._redis_client is None:
+            self._redis_client = get_redis_client()
+        return self._redis_client
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return settings.SARVAM_SINGLE_FLIGHT_SETTINGS
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        if not self.config['ENABLED']:
+            return fn()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            self._count('local_shared')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._do_shared(key, fn)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _do_shared(self, key: str, fn: Callable[[], Any]) -> Any:
+        lock_key = f'single_flight:{self.namespace}:{key}:lock'
+        result_key = f'single_flight:{self.namespace}:{key}:result'
+        token = uuid.uuid4().hex
+
+        try:
+            raw = self.redis_client.get(result_key)
+            if raw is not None:
+                self._count('remote_shared')
+                return json.loads(raw)
+            acquired = self.redis_client.set(lock_key, token, nx=True, px=int(self.config['LOCK_TTL'] * 1000))
+        except redis.RedisError as e:
+            logger.warning(f"Single-flight unavailable for {self.namespace}, calling directly: {str(e)}")
+            self._count('fallback_calls')
+            return fn()
+
+        if acquired:
+            return self._lead(lock_key, result_key, token, fn)
+        return self._follow(lock_key, result_key, fn)
+
+    def _lead(self, lock_key: str, result_key: str, token: str, fn: Callable[[], Any]) -> Any:
+        self._count('leader_calls')
+        try:
+            result = fn()
+            if self.shareable(result):
+                self.redis_client.setex(result_key, self.config['RESULT_TTL'], json.dumps(result))
+            return result
+        finally:
+            self._release(lock_key, token)
+
+    def _release(self, lock_key: str, token: str) -> None:
+        """Delete the lock only if we still own it (it may have expired and been re-acquired)"""
+        try:
+            with self.redis_client.pipeline() as pipe:
+                pipe.watch(lock_key)
+                owner = pipe.get(lock_key)
+                if owner is not None and owner.decode() == token:
+                    pipe.multi()
+                    pipe.delete(lock_key)
+                    pipe.execute()
+                else:
+                    pipe.unwatch()
+        except redis.WatchError:
+            pass
+        except redis.RedisError as e:
+            logger.warning(f"Failed to release single-flight lock {lock_key}: {str(e)}")
+
+    def _follow(self, lock_key: str, result_key: str, fn: Callable[[], Any]) -> Any:
+        deadline = time.monotonic() + self.config['WAIT_TIMEOUT']
+        while time.monotonic() < deadline:
+            time.sleep(self.config['POLL_INTERVAL'])
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.get(result_key)
+                pipe.exists(lock_key)
+                raw, locked = pipe.execute()
+            except redis.RedisError:
+                break
+            if raw is not None:
+                self._count('remote_shared')
+                return json.loads(raw)
+            if not locked:
+                break  # leader finished without a shareable result
+
+        self._count('fallback_calls')
+        return fn()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters, in_flight=len(self._calls))
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(namespace: str, shareable: Callable[[Any], bool] = lambda result: True) -> SingleFlight:
+    """Process-wide SingleFlight per namespace"""
+    if namespace not in _flights:
+        with _flights_lock:
+            if namespace not in _flights:
+                _flights[namespace] = SingleFlight(namespace, shareable=shareable)
+    return _flights[namespace]
+
+
+def single_flight_stats() -> Dict[str, Dict[str, int]]:
+    return {namespace: flight.stats() for namespace, flight in _flights.items()}
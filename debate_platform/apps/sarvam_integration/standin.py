@@ -0,0 +1,362 @@
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import websockets.asyncio.server
+from .fakes import LatencyModel, silent_wav
+from .language_detection import get_language_detector
+from .metrics import ENDPOINT_PATHS
+import logging
+
+logger = logging.getLogger('sarvam_integration')
+
+TRANSCRIPTS = [
+    'Homework builds discipline and reinforces what students learn in class.',
+    'Social media connects people but it also spreads misinformation quickly.',
+    'Renewable energy is cheaper in the long run than coal or gas.',
+    'School uniforms reduce peer pressure and help students focus on learning.',
+]
+
+REBUTTAL = (
+    "That argument overlooks the costs involved and relies on assumptions "
+    "that the evidence does not support (ref {digest})."
+)
+
+STREAM_CHARS_PER_CHUNK = 40
+
+
+def digest(*parts: Any) -> str:
+    return hashlib.sha256('\x00'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+class ErrorInjector:
+    """Randomly fail a fraction of requests with an HTTP error, or hang them to trigger client timeouts"""
+
+    def __init__(self, rate: float = 0.0, statuses: Tuple[int, ...] = (503,), hang_rate: float = 0.0,
+                 hang_seconds: float = 60.0, seed: Optional[int] = None):
+        self.rate = rate
+        self.statuses = tuple(statuses)
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> Optional[Any]:
+        """None to answer normally, 'hang' to stall, or an HTTP status to fail with"""
+        with self._lock:
+            roll = self._random.random()
+            if roll < self.hang_rate:
+                return 'hang'
+            if roll < self.hang_rate + self.rate:
+                return self._random.choice(self.statuses)
+        return None
+
+
+# Deterministic payloads: the same request always gets the same response body
+def chat_completion_payload(body: Dict[str, Any]) -> Dict[str, Any]:
+    messages = body.get('messages') or [{'content': ''}]
+    prompt = messages[-1].get('content') or ''
+    content = REBUTTAL.format(digest=digest(prompt)[:8])
+    prompt_tokens = sum(len((m.get('content') or '').split()) for m in messages)
+    completion_tokens = len(content.split())
+    return {
+        'id': f"chatcmpl-{digest(prompt)[:16]}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': body.get('model') or 'sarvam-m',
+        'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': content}}],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def text_analytics_payload(form: Dict[str, str]) -> Dict[str, Any]:
+    text = form.get('text', '')
+    answers = []
+    for question in json.loads(form.get('questions') or '[]'):
+        if question.get('type') == 'number':
+            response = int(digest(text, question['id'])[:8], 16) % 10 + 1
+        else:
+            response = 'No major issues found; support the claim with a concrete example.'
+        answers.append({'id': question['id'], 'text': question.get('text'), 'response': response})
+    return {'answers': answers}
+
+
+def translate_payload(body: Dict[str, Any]) -> Dict[str, Any]:
+    # Echoing keeps sentence boundaries intact, so the translation memory can align runs
+    return {
+        'request_id': digest(body)[:16],
+        'translated_text': body.get('input', ''),
+        'source_language_code': body.get('source_language_code', 'en-IN'),
+    }
+
+
+def identify_language_payload(body: Dict[str, Any]) -> Dict[str, Any]:
+    guess = get_language_detector().detect(body.get('input', ''))
+    return {
+        'request_id': digest(body)[:16],
+        'language_code': guess['language_code'] or 'en-IN',
+        'script_code': guess['script'],
+    }
+
+
+def speech_to_text_payload(fields: Dict[str, str], audio: bytes) -> Dict[str, Any]:
+    return {
+        'request_id': digest(audio)[:16],
+        'transcript': TRANSCRIPTS[int(digest(audio)[:8], 16) % len(TRANSCRIPTS)],
+        'language_code': fields.get('language_code') or 'en-IN',
+    }
+
+
+def text_to_speech_payload(body: Dict[str, Any]) -> Dict[str, Any]:
+    text = body.get('text', '')
+    audio = silent_wav(len(text) * 0.08, int(body.get('speech_sample_rate') or 8000))
+    return {'request_id': digest(body)[:16], 'audios': [base64.b64encode(audio).decode('ascii')]}
+
+
+def parse_multipart(content_type: str, body: bytes) -> Tuple[Dict[str, str], Dict[str, bytes]]:
+    message = BytesParser(policy=HTTP).parsebytes(f'Content-Type: {content_type}\r\n\r\n'.encode() + body)
+    fields, files = {}, {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        if part.get_filename() is not None:
+            files[name] = part.get_payload(decode=True)
+        else:
+            fields[name] = part.get_payload(decode=True).decode('utf-8')
+    return fields, files
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body are separate writes; avoid delayed-ACK stalls
+
+    def setup(self):
+        super().setup()
+        self.server.standin.count('connections')
+
+    def do_POST(self):
+        standin = self.server.standin
+        raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        path = urlsplit(self.path).path
+        endpoint = ENDPOINT_PATHS.get(path)
+        if endpoint is None:
+            self._send_json(404, {'error': {'message': f'Unknown endpoint {path}', 'code': 404}})
+            return
+
+        streaming = False
+        if path == '/v1/chat/completions':
+            try:
+                streaming = bool(json.loads(raw or b'{}').get('stream'))
+            except ValueError:
+                pass  # reported as a bad request below
+        standin.count('llm_stream' if streaming else endpoint)
+        fault = standin.errors.draw()
+        if fault == 'hang':
+            time.sleep(standin.errors.hang_seconds)
+        time.sleep(standin.latency.sample('llm_first_token' if streaming else endpoint))
+        if fault not in (None, 'hang'):
+            standin.count('errors')
+            self._send_json(fault, {'error': {'message': 'Injected failure', 'code': fault}})
+            return
+
+        if streaming:
+            self._send_chat_stream(chat_completion_payload(json.loads(raw)))
+            return
+        try:
+            self._send_json(200, self._payload(path, raw))
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {'error': {'message': f'Bad request: {e}', 'code': 400}})
+
+    def _payload(self, path: str, raw: bytes) -> Dict[str, Any]:
+        content_type = self.headers.get('Content-Type', '')
+        if path == '/text-analytics':
+            form = {key: values[0] for key, values in parse_qs(raw.decode('utf-8')).items()}
+            return text_analytics_payload(form)
+        if path.startswith('/speech-to-text'):
+            fields, files = parse_multipart(content_type, raw)
+            return speech_to_text_payload(fields, files.get('file', b''))
+
+        body = json.loads(raw or b'{}')
+        if path == '/v1/chat/completions':
+            return chat_completion_payload(body)
+        if path == '/translate':
+            return translate_payload(body)
+        if path == '/text-lid':
+            return identify_language_payload(body)
+        return text_to_speech_payload(body)
+
+    def _send_chat_stream(self, completion: Dict[str, Any]) -> None:
+        """The completion as OpenAI-style chat.completion.chunk events, one word per chunk"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def send(data: str) -> None:
+            event = f"data: {data}\n\n".encode()
+            self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+            self.wfile.flush()
+
+        words = completion['choices'][0]['message']['content'].split(' ')
+        for index, word in enumerate(words):
+            if index:
+                time.sleep(self.server.standin.latency.sample('llm_token'))
+            chunk = {
+                'id': completion['id'],
+                'object': 'chat.completion.chunk',
+                'created': completion['created'],
+                'model': completion['model'],
+                'choices': [{
+                    'index': 0,
+                    'delta': {'content': word if not index else f' {word}'},
+                    'finish_reason': 'stop' if index == len(words) - 1 else None,
+                }],
+            }
+            if index == len(words) - 1:
+                chunk['usage'] = completion['usage']
+            send(json.dumps(chunk))
+        send('[DONE]')
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_json(self, status_code: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer:
+    """Hermetic stand-in for the Sarvam API, for offline tests and benchmarks.
+
+    REST endpoints (chat completions, text analytics, translate, language
+    identification, STT, STT-translate and TTS) are served over plain HTTP;
+    streaming TTS is served on a separate websocket port, matching the SDK's
+    separate base and streaming URLs. Responses are deterministic for a given
+    request; latency comes from a LatencyModel and failures from an
+    ErrorInjector.
+
+        with StandInServer() as server, override_settings(**server.settings_overrides()):
+            ...
+    """
+
+    def __init__(self, latency: Optional[LatencyModel] = None, errors: Optional[ErrorInjector] = None,
+                 host: str = '127.0.0.1', port: int = 0, ws_port: int = 0):
+        self.latency = latency or LatencyModel(jitter=0.0, **{key: 0.0 for key in LatencyModel.DEFAULTS})
+        self.errors = errors or ErrorInjector()
+        self.host = host
+        self.port = port
+        self.ws_port = ws_port
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._http_server = None
+        self._ws_loop = None
+        self._ws_server = None
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.counters = {}
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.host}:{self._http_server.server_address[1]}'
+
+    @property
+    def ws_url(self) -> str:
+        return f'ws://{self.host}:{self.ws_port}'
+
+    def settings_overrides(self) -> Dict[str, str]:
+        return {'SARVAM_BASE_URL': self.base_url, 'SARVAM_WS_URL': self.ws_url, 'SARVAM_API_KEY': 'stand-in'}
+
+    def start(self) -> 'StandInServer':
+        self._http_server = ThreadingHTTPServer((self.host, self.port), _StandInHandler)
+        self._http_server.daemon_threads = True
+        self._http_server.standin = self
+        threading.Thread(target=self._http_server.serve_forever, name='sarvam-standin-http', daemon=True).start()
+
+        self._ws_loop = asyncio.new_event_loop()
+        threading.Thread(target=self._ws_loop.run_forever, name='sarvam-standin-ws', daemon=True).start()
+        self._ws_server = asyncio.run_coroutine_threadsafe(self._serve_ws(), self._ws_loop).result()
+        self.ws_port = self._ws_server.sockets[0].getsockname()[1]
+        logger.info(f"Sarvam stand-in listening on {self.base_url} and {self.ws_url}")
+        return self
+
+    def stop(self) -> None:
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+        if self._ws_server is not None:
+            self._ws_server.close()
+            asyncio.run_coroutine_threadsafe(self._ws_server.wait_closed(), self._ws_loop).result()
+            self._ws_loop.call_soon_threadsafe(self._ws_loop.stop)
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    async def _serve_ws(self):
+        return await websockets.asyncio.server.serve(self._stream_tts, self.host, self.ws_port)
+
+    async def _stream_tts(self, websocket) -> None:
+        """Streaming TTS: config, text and flush messages in; audio chunks and a final event out"""
+        if urlsplit(websocket.request.path).path != '/text-to-speech/ws':
+            await websocket.close(code=1008, reason='Unknown endpoint')
+            return
+
+        self.count('tts_streams')
+        await asyncio.sleep(self.latency.sample('tts'))
+        fault = self.errors.draw()
+        if fault is not None:
+            self.count('errors')
+            code = 504 if fault == 'hang' else fault
+            await websocket.send(json.dumps({'type': 'error', 'data': {'message': 'Injected failure', 'code': code}}))
+            await websocket.close()
+            return
+
+        sample_rate, pending = 22050, []
+        async for raw in websocket:
+            message = json.loads(raw)
+            if message.get('type') == 'config':
+                sample_rate = int(message['data'].get('speech_sample_rate') or sample_rate)
+            elif message.get('type') == 'text':
+                pending.append(message['data']['text'])
+            elif message.get('type') == 'flush':
+                text = ' '.join(pending)
+                chunk_audio = base64.b64encode(
+                    silent_wav(STREAM_CHARS_PER_CHUNK * 0.08, sample_rate)
+                ).decode('ascii')
+                for _ in range(max(1, -(-len(text) // STREAM_CHARS_PER_CHUNK))):
+                    await asyncio.sleep(self.latency.sample('tts_chunk'))
+                    await websocket.send(json.dumps({
+                        'type': 'audio',
+                        'data': {'content_type': 'audio/wav', 'audio': chunk_audio, 'request_id': digest(text)[:16]}
+                    }))
+                await websocket.send(json.dumps({'type': 'event', 'data': {'event_type': 'final'}}))
+                await websocket.close()
+                return
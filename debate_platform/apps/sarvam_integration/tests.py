@@ -1,3 +1,655 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+import fakeredis
+import fakeredis.aioredis
+import numpy as np
+import redis
+from django.contrib.auth.models import AnonymousUser
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory
+from apps.sarvam_integration.api_views import get_tts_audio
+from apps.sarvam_integration.audio_preprocessing import (
+    WEBM_CLUSTER_ID, WEBM_MAGIC, AudioPreprocessor, UnsupportedAudio, WebmStream, decode_wav, resample, speech_bounds
+)
+from apps.sarvam_integration.audio_store import AudioStore
+from apps.sarvam_integration.cache import TwoTierCache
+from apps.sarvam_integration.async_service import AsyncSarvamAIService, SarvamServiceError
+from apps.sarvam_integration.rate_limit import (
+    BACKGROUND, INTERACTIVE, STANDARD, RateLimited, TokenBucketLimiter, current_priority, sarvam_priority
+)
+from apps.sarvam_integration.resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, call_timeout, is_upstream_failure, sarvam_deadline
+)
+from apps.sarvam_integration.services import (
+    ARGUMENT_QUALITY_QUESTIONS, batch_arguments, build_batch_request, split_batch_answers
+)
+from apps.sarvam_integration.singleflight import SingleFlight
+from apps.sarvam_integration.translation_memory import TranslationMemory, join_sentences, split_sentences
 
-# Create your tests here.
+SINGLE_FLIGHT = {'ENABLED': True, 'LOCK_TTL': 5, 'RESULT_TTL': 10, 'WAIT_TIMEOUT': 2, 'POLL_INTERVAL': 0.01}
+
+RATE_LIMIT = {
+    'ENABLED': True,
+    'BUCKETS': {'LLM': {'RATE': 20, 'BURST': 4}},
+    'PRIORITIES': {
+        INTERACTIVE: {'RESERVE': 0.0, 'MAX_WAIT': 1.0},
+        STANDARD: {'RESERVE': 0.25, 'MAX_WAIT': 0.0},
+        BACKGROUND: {'RESERVE': 0.5, 'MAX_WAIT': 0.0},
+    },
+    'DEFAULT_PRIORITY': STANDARD,
+}
+
+
+@override_settings(SARVAM_SINGLE_FLIGHT_SETTINGS=SINGLE_FLIGHT)
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+
+    def test_concurrent_local_calls_share_the_leader(self):
+        flight = SingleFlight('test', redis_client=self.redis)
+        started, release, calls, results = threading.Event(), threading.Event(), [], []
+
+        def upstream():
+            calls.append(1)
+            started.set()
+            release.wait(2)
+            return {'answer': 42}
+
+        leader = threading.Thread(target=lambda: results.append(flight.do('key', upstream)))
+        leader.start()
+        started.wait(2)
+        followers = [threading.Thread(target=lambda: results.append(flight.do('key', upstream))) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(2)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'answer': 42}] * 4)
+        self.assertEqual(flight.stats()['local_shared'], 3)
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+    def test_other_workers_reuse_the_published_result(self):
+        SingleFlight('test', redis_client=self.redis).do('key', lambda: {'answer': 1})
+
+        other_worker = SingleFlight('test', redis_client=self.redis)
+        self.assertEqual(other_worker.do('key', lambda: self.fail('upstream called again')), {'answer': 1})
+        self.assertEqual(other_worker.stats()['remote_shared'], 1)
+
+    def test_result_expires_after_result_ttl_and_lock_is_released(self):
+        SingleFlight('test', redis_client=self.redis).do('key', lambda: {'answer': 1})
+
+        ttl = self.redis.ttl('single_flight:test:key:result')
+        self.assertTrue(0 < ttl <= SINGLE_FLIGHT['RESULT_TTL'])
+        self.assertFalse(self.redis.exists('single_flight:test:key:lock'))
+
+    def test_follower_waits_for_the_remote_leader(self):
+        self.redis.set('single_flight:test:key:lock', 'other-worker')
+
+        def publish():
+            time.sleep(0.05)
+            self.redis.setex('single_flight:test:key:result', 10, json.dumps({'answer': 7}))
+
+        threading.Thread(target=publish).start()
+        flight = SingleFlight('test', redis_client=self.redis)
+        self.assertEqual(flight.do('key', lambda: self.fail('follower called upstream')), {'answer': 7})
+        self.assertEqual(flight.stats()['remote_shared'], 1)
+
+    def test_unshareable_results_are_not_published(self):
+        flight = SingleFlight('test', redis_client=self.redis, shareable=lambda result: result['success'])
+        flight.do('key', lambda: {'success': False})
+        self.assertFalse(self.redis.exists('single_flight:test:key:result'))
+
+        # Followers of a leader that finished without a result call upstream themselves
+        self.redis.set('single_flight:test:key:lock', 'other-worker')
+        threading.Timer(0.05, self.redis.delete, args=['single_flight:test:key:lock']).start()
+        self.assertEqual(flight.do('key', lambda: {'success': True}), {'success': True})
+        self.assertEqual(flight.stats()['fallback_calls'], 1)
+
+
+class _BrokenRedis:
+    def pipeline(self):
+        raise redis.ConnectionError('redis is down')
+
+
+@override_settings(SARVAM_RATE_LIMIT_SETTINGS=RATE_LIMIT)
+class TokenBucketLimiterTests(SimpleTestCase):
+    def run_limiter(self, *calls, redis_client=None):
+        """Run acquire() for each (endpoint, priority) in order on one limiter; returns it and the outcomes"""
+        async def run():
+            limiter = TokenBucketLimiter(redis_client=redis_client or fakeredis.aioredis.FakeRedis())
+            outcomes = []
+            for endpoint, priority in calls:
+                try:
+                    await limiter.acquire(endpoint, priority)
+                    outcomes.append('ok')
+                except RateLimited:
+                    outcomes.append('shed')
+            return limiter, outcomes
+        return asyncio.run(run())
+
+    def test_reserve_sheds_lower_priorities_first(self):
+        limiter, outcomes = self.run_limiter(
+            *[('llm', BACKGROUND)] * 3, *[('llm', STANDARD)] * 2, *[('llm', INTERACTIVE)] * 2
+        )
+        # Burst 4: background stops at half the bucket, standard at a quarter, interactive drains it
+        self.assertEqual(outcomes, ['ok', 'ok', 'shed', 'ok', 'shed', 'ok', 'ok'])
+        self.assertEqual(limiter.stats()[BACKGROUND]['llm'], {'admitted': 2, 'deferred': 0, 'shed': 1, 'errors': 0})
+
+    def test_interactive_waits_for_a_refilled_token(self):
+        started = time.monotonic()
+        limiter, outcomes = self.run_limiter(*[('llm', INTERACTIVE)] * 5)
+        self.assertEqual(outcomes, ['ok'] * 5)
+        self.assertGreaterEqual(time.monotonic() - started, 1 / 20)  # one token at 20/s
+        self.assertEqual(limiter.stats()[INTERACTIVE]['llm']['deferred'], 1)
+
+    def test_tokens_refill_at_the_bucket_rate(self):
+        async def run():
+            client = fakeredis.aioredis.FakeRedis()
+            await client.hset('sarvam_rate:llm', mapping={'tokens': 0, 'updated': time.time() - 0.1})
+            limiter = TokenBucketLimiter(redis_client=client)
+            return [await limiter._take('llm', 20, 4, 0.0) for _ in range(3)]
+
+        first, second, third = asyncio.run(run())
+        # 0.1s at 20 tokens/s refilled two tokens; the third take has to wait for the next one
+        self.assertEqual((first, second), (0.0, 0.0))
+        self.assertAlmostEqual(third, 1 / 20, delta=0.01)
+
+    def test_unlimited_endpoints_and_redis_errors_admit(self):
+        with self.assertLogs('sarvam_integration', 'WARNING'):
+            limiter, outcomes = self.run_limiter(('tts', BACKGROUND), ('llm', BACKGROUND),
+                                                 redis_client=_BrokenRedis())
+        self.assertEqual(outcomes, ['ok', 'ok'])
+        self.assertEqual(limiter.stats()[BACKGROUND]['llm']['errors'], 1)
+
+    def test_priority_context(self):
+        self.assertEqual(current_priority(), STANDARD)
+        with sarvam_priority(INTERACTIVE):
+            self.assertEqual(current_priority(), INTERACTIVE)
+        self.assertEqual(current_priority(), STANDARD)
+        with self.assertRaises(ValueError):
+            with sarvam_priority('urgent'):
+                pass
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def open_breaker(self) -> CircuitBreaker:
+        breaker = CircuitBreaker('llm', failure_threshold=2, reset_timeout=0.05, half_open_probes=1)
+        for _ in range(2):
+            self.assertTrue(breaker.allow())
+            breaker.record_failure()
+        return breaker
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker('llm', failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()  # a success resets the count
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.stats()['rejected'], 1)
+
+    def test_half_open_probe_success_closes(self):
+        breaker = self.open_breaker()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())  # only one probe at a time
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_half_open_probe_failure_reopens(self):
+        breaker = self.open_breaker()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.stats()['opened'], 2)
+
+    def test_neutral_outcome_frees_the_probe(self):
+        breaker = self.open_breaker()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record_neutral()  # e.g. the probe was rate limited
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertTrue(breaker.allow())
+
+    def test_upstream_failures(self):
+        self.assertTrue(is_upstream_failure({'success': False}))
+        self.assertTrue(is_upstream_failure({'success': False, 'status_code': 503}))
+        self.assertTrue(is_upstream_failure({'success': False, 'status_code': 429}))
+        self.assertFalse(is_upstream_failure({'success': False, 'status_code': 400}))
+        self.assertFalse(is_upstream_failure({'success': False, 'rate_limited': True}))
+        self.assertFalse(is_upstream_failure({'success': True}))
+
+
+class _StalledStream:
+    """Streaming TTS websocket that accepts the text and never answers"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def configure(self, **kwargs):
+        pass
+
+    async def convert(self, text):
+        pass
+
+    async def flush(self):
+        pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(60)
+
+
+class DeadlineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        stalled = SimpleNamespace(text_to_speech_streaming=SimpleNamespace(connect=lambda model: _StalledStream()))
+        cls.service = AsyncSarvamAIService(
+            client=stalled, rate_limiter=TokenBucketLimiter(redis_client=fakeredis.aioredis.FakeRedis())
+        )
+
+    def test_call_timeout_is_clipped_to_the_deadline(self):
+        cap = call_timeout('llm')
+        with sarvam_deadline(1.0):
+            self.assertLessEqual(call_timeout('llm'), 1.0)
+            with sarvam_deadline(30.0):  # nested budgets can't extend the enclosing one
+                self.assertLessEqual(call_timeout('llm'), 1.0)
+            with sarvam_deadline(0.2):
+                self.assertLessEqual(call_timeout('llm'), 0.2)
+        self.assertEqual(call_timeout('llm'), cap)
+
+    def test_exhausted_budget_fails_without_calling_upstream(self):
+        async def call():
+            self.fail('upstream called without budget')
+
+        with sarvam_deadline(0.1):
+            result = self.service.run_sync(self.service._admit('llm', call))
+        self.assertFalse(result['success'])
+        self.assertTrue(result['timed_out'])
+
+    def test_call_is_cut_off_at_the_deadline(self):
+        async def call():
+            await asyncio.sleep(5)
+
+        started = time.monotonic()
+        with sarvam_deadline(0.6):
+            result = self.service.run_sync(self.service._admit('analytics', call))
+        self.assertTrue(result['timed_out'])
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(self.service.breakers['analytics'].stats()['failures'], 1)
+
+    def test_stalled_tts_stream_is_cut_off_at_the_deadline(self):
+        async def consume():
+            with sarvam_deadline(0.6):
+                async for _ in self.service.stream_tts('Hello', 'en-IN', 'anushka'):
+                    pass
+
+        started = time.monotonic()
+        with self.assertRaises(SarvamServiceError):
+            asyncio.run(consume())
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(self.service.breakers['tts'].stats()['failures'], 1)
+
+
+
+class BatchAnalysisTests(SimpleTestCase):
+    def test_batches_respect_both_limits(self):
+        texts = ['a' * 40, 'b' * 40, 'c' * 40, 'd' * 10, 'e' * 10, 'f' * 200]
+        self.assertEqual(batch_arguments(texts, max_arguments=3, max_chars=100),
+                         [[0, 1], [2, 3, 4], [5]])  # an over-long argument still gets a batch of its own
+        self.assertEqual(batch_arguments([], max_arguments=3, max_chars=100), [])
+
+    def test_request_asks_every_question_for_every_argument(self):
+        document, questions = build_batch_request(['Homework helps', 'Homework hurts'])
+        self.assertIn('[ARGUMENT 2]\nHomework hurts\n[END ARGUMENT 2]', document)
+        self.assertEqual(len(questions), 2 * len(ARGUMENT_QUALITY_QUESTIONS))
+        self.assertEqual(questions[len(ARGUMENT_QUALITY_QUESTIONS)]['id'],
+                         f"2:{ARGUMENT_QUALITY_QUESTIONS[0]['id']}")
+
+    def test_answers_are_mapped_back_by_question_id(self):
+        _, questions = build_batch_request(['Homework helps', 'Homework hurts', 'Homework is optional'])
+        answers = [{'id': question['id'], 'response': question['id']} for question in reversed(questions)]
+        answers = [answer for answer in answers if not answer['id'].startswith('3:')] + [
+            {'id': '3:unknown', 'response': 'ignored'}, {'id': '9:effectiveness', 'response': 'ignored'}, {}
+        ]
+
+        first, second, third = split_batch_answers(answers, 3)
+        self.assertEqual([answer['id'] for answer in first], [question['id'] for question in ARGUMENT_QUALITY_QUESTIONS])
+        self.assertEqual(second[0]['response'], f"2:{ARGUMENT_QUALITY_QUESTIONS[0]['id']}")
+        self.assertEqual(second[0]['text'], ARGUMENT_QUALITY_QUESTIONS[0]['text'])
+        self.assertIsNone(third)  # its answers are missing, so it is retried on its own
+
+
+
+class SentenceSplitTests(SimpleTestCase):
+    TEXTS = [
+        'Homework helps. It builds habits!  Does it?',
+        '  Leading and trailing space.  \n',
+        'Points:\n1. Homework helps.\n2) It builds habits.',
+        'i. First point. ii. Second point.',
+        'गृहकार्य उपयोगी है। यह आदतें बनाता है॥ ठीक?',
+        'One sentence without a full stop',
+        '',
+        '   ',
+    ]
+
+    def test_join_rebuilds_the_text_exactly(self):
+        for text in self.TEXTS:
+            with self.subTest(text=text):
+                sentences, separators = split_sentences(text)
+                self.assertEqual(len(separators), len(sentences) + 1)
+                self.assertEqual(join_sentences(sentences, separators), text)
+
+    def test_sentences_and_list_items(self):
+        self.assertEqual(split_sentences(self.TEXTS[0])[0], ['Homework helps.', 'It builds habits!', 'Does it?'])
+        self.assertEqual(split_sentences(self.TEXTS[2])[0], ['Points:', '1. Homework helps.', '2) It builds habits.'])
+        self.assertEqual(split_sentences(self.TEXTS[3])[0], ['i. First point.', 'ii. Second point.'])
+        self.assertEqual(split_sentences(self.TEXTS[4])[0], ['गृहकार्य उपयोगी है।', 'यह आदतें बनाता है॥', 'ठीक?'])
+
+    def test_empty_sentences_are_dropped_with_their_separator(self):
+        self.assertEqual(join_sentences(['A.', '', 'C.'], ['', ' ', '\n', '']), 'A.\nC.')
+
+
+class TranslationMemoryTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        self.memory = self.fresh_memory()
+        self.requests = []
+
+    def fresh_memory(self):
+        """A memory with an empty local tier, sharing the Redis tier (like another worker)"""
+        memory = TranslationMemory()
+        memory.cache = TwoTierCache('translation', 60, redis_client=self.redis)
+        return memory
+
+    def translate(self, text, memory=None):
+        def translate_fn(run_text):
+            self.requests.append(run_text)
+            return run_text.upper()
+        return (memory or self.memory).translate(text, 'en-IN', 'hi-IN', 'formal', translate_fn)
+
+    def test_misses_are_translated_in_one_run_and_remembered(self):
+        self.assertEqual(self.translate('Homework helps. It builds habits.'), 'HOMEWORK HELPS. IT BUILDS HABITS.')
+        self.assertEqual(self.requests, ['Homework helps. It builds habits.'])
+
+        self.assertEqual(self.translate('Homework helps. It builds habits.'), 'HOMEWORK HELPS. IT BUILDS HABITS.')
+        self.assertEqual(len(self.requests), 1)  # the whole text is a hit
+
+    def test_only_unseen_sentences_go_upstream(self):
+        self.translate('Homework helps. It builds habits.')
+        self.assertEqual(self.translate('It builds habits. Teachers agree.\nHomework helps.'),
+                         'IT BUILDS HABITS. TEACHERS AGREE.\nHOMEWORK HELPS.')
+        self.assertEqual(self.requests[1:], ['Teachers agree.'])
+        self.assertEqual(self.memory.stats()['sentences_from_memory'], 2)
+
+    def test_sentence_hits_are_fetched_in_one_mget(self):
+        self.translate('Homework helps. It builds habits.')
+        other_worker = self.fresh_memory()
+        with mock.patch.object(self.redis, 'get', wraps=self.redis.get) as get, \
+                mock.patch.object(self.redis, 'mget', wraps=self.redis.mget) as mget:
+            self.assertEqual(self.translate('It builds habits. Homework helps.', memory=other_worker),
+                             'IT BUILDS HABITS. HOMEWORK HELPS.')
+
+        self.assertEqual(get.call_count, 1)  # the whole-text lookup
+        self.assertEqual(mget.call_count, 1)
+        self.assertEqual(len(mget.call_args.args[0]), 2)
+        self.assertEqual(other_worker.cache.stats()['redis_hits'], 2)
+        self.assertEqual(len(self.requests), 1)
+
+    def test_unaligned_runs_are_stored_whole(self):
+        def merge_sentences(run_text):
+            self.requests.append(run_text)
+            return 'EK VAKYA'  # two sentences translated as one
+        self.memory.translate('Homework helps. It builds habits.', 'en-IN', 'hi-IN', 'formal', merge_sentences)
+
+        self.assertEqual(self.translate('Homework helps. It builds habits.', memory=self.fresh_memory()), 'EK VAKYA')
+        self.assertEqual(self.translate('Homework helps.'), 'HOMEWORK HELPS.')  # not stored on its own
+        self.assertEqual(self.requests, ['Homework helps. It builds habits.', 'Homework helps.'])
+
+
+
+class AudioStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.store = AudioStore(root=self.root, max_bytes=10_000)
+
+    def put(self, text, size=100):
+        key = AudioStore.key(text, 'en-IN', 'anushka', 'bulbul:v2', 22050)
+        return key, self.store.put(key, lambda temp_path: open(temp_path, 'wb').write(b'\0' * size))
+
+    def test_put_renames_a_complete_file_into_place(self):
+        key, path = self.put('Homework helps')
+        self.assertEqual(path, self.store.path(key))
+        self.assertEqual(path.parent.name, key[:2])
+        self.assertEqual(path.stat().st_size, 100)
+        self.assertEqual(self.store.get(key), path)
+        self.assertEqual([file.name for file in path.parent.iterdir()], [path.name])  # no temp file left behind
+
+    def test_failed_write_leaves_nothing_behind(self):
+        key = AudioStore.key('Homework hurts', 'en-IN', 'anushka', 'bulbul:v2', 22050)
+
+        def write(temp_path):
+            open(temp_path, 'wb').write(b'partial')
+            raise OSError('disk full')
+
+        with self.assertRaises(OSError):
+            self.store.put(key, write)
+        self.assertIsNone(self.store.get(key))
+        self.assertEqual(list(self.store.path(key).parent.iterdir()), [])
+
+    def test_keys_must_be_sha256_hex(self):
+        self.assertRegex(AudioStore.key('Homework helps', 'en-IN', 'anushka', 'bulbul:v2', 22050), r'^[0-9a-f]{64}$')
+        for key in ['../../etc/passwd', 'a' * 63, 'A' * 64, 'g' * 64, 'a' * 64 + '/']:
+            with self.subTest(key=key), self.assertRaises(ValueError):
+                self.store.get(key)
+
+    def test_least_recently_used_files_are_evicted_first(self):
+        paths = {text: self.put(text)[1] for text in ['first', 'second', 'third', 'fourth']}
+        for age, text in enumerate(['fourth', 'third', 'second', 'first']):
+            os.utime(paths[text], (1_000_000 - age, 1_000_000 - age))  # 'first' is the oldest
+        self.store.get(AudioStore.key('first', 'en-IN', 'anushka', 'bulbul:v2', 22050))  # a hit makes it the newest
+
+        self.store.max_bytes = 250
+        self.assertEqual(self.store.evict(), 200)
+        self.assertEqual({text for text, path in paths.items() if path.exists()}, {'first', 'fourth'})
+        self.assertEqual(self.store.evict(), 0)  # already within budget
+
+    def test_writes_past_the_budget_trigger_eviction(self):
+        self.store.max_bytes = 250
+        for text in ['first', 'second', 'third', 'fourth']:
+            self.put(text)
+        self.assertLessEqual(sum(path.stat().st_size for path in self.store.root.glob('*/*.wav')), 250)
+
+
+class TtsAudioViewTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.store = AudioStore(root=root, max_bytes=10_000)
+        patcher = mock.patch('apps.sarvam_integration.api_views.get_audio_store', return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, key):
+        request = APIRequestFactory().get(f'/api/sarvam/tts/{key}.wav')
+        request.user = AnonymousUser()
+        return get_tts_audio(request, audio_key=key)
+
+    def test_stored_audio_is_served_as_immutable(self):
+        key = AudioStore.key('Homework helps', 'en-IN', 'anushka', 'bulbul:v2', 22050)
+        self.store.put(key, lambda temp_path: open(temp_path, 'wb').write(b'RIFF'))
+        response = self.get(key)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'RIFF')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        response.close()
+
+    def test_invalid_and_unknown_keys_are_404s(self):
+        for key in ['..%2F..%2Fsettings', 'not-a-key', 'a' * 64]:
+            with self.subTest(key=key):
+                self.assertEqual(self.get(key).status_code, 404)
+
+
+
+def make_wav(payload, audio_format=1, channels=1, sample_rate=16000, bits=16, extensible=False, extra_chunk=b''):
+    """A WAV file around raw sample bytes, optionally WAVE_FORMAT_EXTENSIBLE or with a chunk before the data"""
+    block_align = channels * bits // 8
+    fmt = struct.pack('<HHIIHH', 0xFFFE if extensible else audio_format, channels, sample_rate,
+                      sample_rate * block_align, block_align, bits)
+    if extensible:
+        fmt += struct.pack('<HHI', 22, bits, 0) + struct.pack('<H', audio_format) + b'\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71'
+    chunks = b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+    if extra_chunk:
+        chunks += b'LIST' + struct.pack('<I', len(extra_chunk)) + extra_chunk + b'\x00' * (len(extra_chunk) & 1)
+    chunks += b'data' + struct.pack('<I', len(payload)) + payload
+    return b'RIFF' + struct.pack('<I', 4 + len(chunks)) + b'WAVE' + chunks
+
+
+def tone(frequency, seconds, sample_rate, amplitude=0.5):
+    return (amplitude * np.sin(2 * np.pi * frequency * np.arange(int(seconds * sample_rate)) / sample_rate)).astype(np.float32)
+
+
+class DecodeWavTests(SimpleTestCase):
+    SAMPLES = np.array([0.0, 0.5, -0.5, -1.0], dtype=np.float32)
+
+    def assertDecodes(self, wav, expected=SAMPLES, channels=1, tolerance=1e-6):
+        samples, sample_rate = decode_wav(wav)
+        self.assertEqual(sample_rate, 16000)
+        self.assertEqual(samples.shape, (len(expected) // channels, channels))
+        np.testing.assert_allclose(samples.ravel(), expected, atol=tolerance)
+
+    def test_integer_pcm_widths(self):
+        ints = {
+            8: (self.SAMPLES * 128 + 128).astype(np.uint8).tobytes(),
+            16: (self.SAMPLES * 32768).astype('<i2').tobytes(),
+            32: (self.SAMPLES.astype(np.float64) * 2 ** 31).astype('<i4').tobytes(),
+        }
+        values = (self.SAMPLES * 2 ** 23).astype(np.int32)
+        ints[24] = b''.join(struct.pack('<i', int(value))[:3] for value in values)
+        for bits, payload in ints.items():
+            with self.subTest(bits=bits):
+                self.assertDecodes(make_wav(payload, bits=bits))
+
+    def test_float_and_extensible(self):
+        self.assertDecodes(make_wav(self.SAMPLES.astype('<f4').tobytes(), audio_format=3, bits=32))
+        self.assertDecodes(make_wav(self.SAMPLES.astype('<f8').tobytes(), audio_format=3, bits=64))
+        self.assertDecodes(make_wav((self.SAMPLES * 32768).astype('<i2').tobytes(), bits=16, extensible=True))
+        self.assertDecodes(make_wav(self.SAMPLES.astype('<f4').tobytes(), audio_format=3, bits=32, extensible=True))
+
+    def test_channels_odd_chunks_and_truncated_data(self):
+        stereo = (self.SAMPLES * 32768).astype('<i2').tobytes()
+        self.assertDecodes(make_wav(stereo, channels=2, extra_chunk=b'odd'), channels=2)
+        self.assertDecodes(make_wav(stereo + b'\x01'))  # a partial trailing frame is dropped
+
+    def test_unsupported_audio(self):
+        for wav in [b'OggS' + bytes(40), make_wav(bytes(8), audio_format=2, bits=4),
+                    make_wav(bytes(8))[:36]]:  # no data chunk
+            with self.assertRaises(UnsupportedAudio):
+                decode_wav(wav)
+
+
+@override_settings(AUDIO_PREPROCESSING_SETTINGS={
+    'ENABLED': True, 'TARGET_SAMPLE_RATE': 16000, 'VAD_FRAME_MS': 30, 'VAD_THRESHOLD_DB': 15,
+    'VAD_MIN_DBFS': -50, 'VAD_PADDING_MS': 250,
+})
+class AudioPreprocessingTests(SimpleTestCase):
+    def test_resample_keeps_speech_band_and_removes_aliases(self):
+        speech = resample(tone(1000, 1, 48000), 48000, 16000)
+        self.assertEqual(len(speech), 16000)
+        self.assertAlmostEqual(float(np.abs(speech[1000:-1000]).max()), 0.5, delta=0.02)
+
+        alias = resample(tone(20000, 1, 48000), 48000, 16000)  # would fold down to 4 kHz
+        self.assertLess(float(np.abs(alias[1000:-1000]).max()), 0.05)
+
+    def test_resample_never_upsamples(self):
+        samples = tone(1000, 0.1, 8000)
+        self.assertIs(resample(samples, 8000, 16000), samples)
+
+    def test_speech_bounds_trim_silence_with_padding(self):
+        rate = 16000
+        noise = np.random.default_rng(0).normal(0, 1e-4, 3 * rate).astype(np.float32)
+        samples = noise.copy()
+        samples[rate:2 * rate] += tone(300, 1, rate)
+
+        start, end = speech_bounds(samples, rate)
+        frame, padding = int(rate * 0.03), int(rate * 0.25)
+        self.assertAlmostEqual(start, rate - padding, delta=frame)
+        self.assertAlmostEqual(end, 2 * rate + padding, delta=frame)
+        self.assertIsNone(speech_bounds(noise, rate))
+        self.assertIsNone(speech_bounds(samples[:10], rate))
+
+    def test_preprocess_downmixes_downsamples_and_trims(self):
+        rate = 48000
+        mono = np.zeros(3 * rate, dtype=np.float32)
+        mono[rate:2 * rate] = tone(300, 1, rate)
+        stereo = np.repeat(mono, 2)
+        wav = make_wav((stereo * 32767).astype('<i2').tobytes(), channels=2, sample_rate=rate)
+
+        result = AudioPreprocessor().preprocess(wav)
+        self.assertTrue(result['processed'])
+        self.assertEqual(decode_wav(result['audio'])[1], 16000)
+        self.assertAlmostEqual(result['duration'], 1.5, delta=0.1)
+        self.assertLess(result['bytes'], result['original_bytes'] / 10)
+
+    def test_compressed_audio_passes_through(self):
+        data = WEBM_MAGIC + bytes(32)
+        result = AudioPreprocessor().preprocess(data)
+        self.assertEqual((result['audio'], result['content_type'], result['processed']), (data, 'audio/webm', False))
+
+
+class WebmStreamTests(SimpleTestCase):
+    HEADER = WEBM_MAGIC + b'ebml+tracks'
+
+    @staticmethod
+    def cluster(timecode, frames):
+        # Unknown-size cluster (as MediaRecorder writes them) opening with its Timecode element
+        return WEBM_CLUSTER_ID + b'\xff' + b'\xe7\x81' + bytes([timecode]) + frames
+
+    def test_headerless_pieces_get_the_header_and_open_cluster(self):
+        stream = WebmStream()
+        first = self.HEADER + self.cluster(1, b'frames-1')
+        self.assertEqual(stream.frame(first), first)
+        self.assertEqual(stream.frame(b'frames-2'), self.HEADER + self.cluster(1, b'') + b'frames-2')
+
+        # A piece that opens a new cluster only needs the header, and later pieces continue that cluster
+        self.assertEqual(stream.frame(self.cluster(2, b'frames-3')), self.HEADER + self.cluster(2, b'frames-3'))
+        self.assertEqual(stream.frame(b'frames-4'), self.HEADER + self.cluster(2, b'') + b'frames-4')
+
+    def test_a_new_header_restarts_the_stream(self):
+        stream = WebmStream()
+        stream.frame(self.HEADER + self.cluster(1, b'frames-1'))
+        restarted = WEBM_MAGIC + b'new-tracks'
+        self.assertEqual(stream.frame(restarted), restarted)
+        self.assertEqual(stream.frame(b'frames-2'), restarted + b'frames-2')
+
+    def test_pieces_before_any_header_are_left_alone(self):
+        self.assertEqual(WebmStream().frame(b'frames-1'), b'frames-1')
+
+    def test_malformed_cluster_headers_are_ignored(self):
+        self.assertEqual(WebmStream._cluster_header(WEBM_CLUSTER_ID + b'\xff\xa3\x81\x01'), b'')  # no Timecode first
+        self.assertEqual(WebmStream._cluster_header(WEBM_CLUSTER_ID + b'\xff\xe7\x82\x00'), b'')  # truncated value
+        self.assertEqual(WebmStream._cluster_header(WEBM_CLUSTER_ID), b'')
@@ -0,0 +1,171 @@
+import re
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+from django.conf import settings
+from .cache import content_key, get_cache
+import logging
+
+logger = logging.getLogger('sarvam_integration')
+
+# Sentence boundaries: whitespace after Latin punctuation or the Devanagari danda/double danda, and line breaks
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?।॥])\s+|\s*\n\s*')
+
+# A list enumerator ("1.", "b)", "iv.") is the start of its item, not a sentence of its own
+ENUMERATOR = re.compile(r'(?:\d{1,3}|[A-Za-z]|[ivxIVX]{1,4})[.)]')
+
+# Upstream translate requests are kept below the API's per-request character limit
+MAX_REQUEST_CHARS = 900
+
+
+def normalize_text(text: str) -> str:
+    """Cache-key form of text: runs of spaces collapsed, line breaks kept"""
+    return '\n'.join(' '.join(line.split()) for line in text.strip().splitlines())
+
+
+def split_sentences(text: str) -> Tuple[List[str], List[str]]:
+    """(sentences, separators): separators[i] is the whitespace before sentences[i]
+    and separators[-1] the whitespace after the last one, so join_sentences
+    rebuilds text exactly."""
+    end = len(text.rstrip())
+    start = len(text) - len(text.lstrip()) if end else end
+    sentences, separators = [], [text[:start]]
+    for boundary in SENTENCE_BOUNDARY.finditer(text, start, end):
+        sentence = text[start:boundary.start()]
+        if ENUMERATOR.fullmatch(sentence) and '\n' not in boundary.group():
+            continue
+        sentences.append(sentence)
+        separators.append(boundary.group())
+        start = boundary.end()
+    if start < end:
+        sentences.append(text[start:end])
+    else:
+        separators.pop()
+    separators.append(text[end:])
+    return sentences, separators
+
+
+def join_sentences(sentences: List[str], separators: List[str]) -> str:
+    """Inverse of split_sentences; empty sentences (and the separator before them) are skipped"""
+    if not sentences:
+        return separators[0]  # blank text: its one separator is both the leading and trailing whitespace
+    parts = [separators[0]]
+    for index, sentence in enumerate(sentences):
+        if sentence:
+            if index:
+                parts.append(separators[index])
+            parts.append(sentence)
+    parts.append(separators[-1])
+    return ''.join(parts)
+
+
+class TranslationMemory:
+    """Sentence-level translation cache in front of the Sarvam translate API.
+
+    Text is split into sentences; cached sentences are reused and each
+    contiguous run of misses is translated in one request. When the
+    translated run splits back into the same number of sentences, each
+    sentence is stored individually so later texts that share only part of
+    this one still hit; otherwise the run is stored as a single unit. The
+    result keeps the source's separators (line breaks, list layout).
+    """
+
+    def __init__(self):
+        self.cache = get_cache('translation', settings.SARVAM_CACHE_SETTINGS['TRANSLATION_TTL'])
+        self._lock = threading.Lock()
+        self.counters = {
+            'requests': 0,
+            'sentences': 0,
+            'sentences_from_memory': 0,
+            'upstream_calls': 0,
+            'chars_translated': 0,
+            'chars_from_memory': 0,
+        }
+
+    def _count(self, **amounts: int) -> None:
+        with self._lock:
+            for counter, amount in amounts.items():
+                self.counters[counter] += amount
+
+    @staticmethod
+    def _key(text: str, source: str, target: str, mode: str) -> str:
+        return content_key(source, target, mode, text)
+
+    def _runs(self, sentences: List[str], translations: List[Any]) -> List[List[int]]:
+        """Group indexes of untranslated sentences into contiguous, size-capped runs"""
+        runs, current, size = [], [], 0
+        for index, translation in enumerate(translations):
+            if translation is not None or (current and size + len(sentences[index]) > MAX_REQUEST_CHARS):
+                if current:
+                    runs.append(current)
+                current, size = [], 0
+            if translation is None:
+                current.append(index)
+                size += len(sentences[index]) + 1
+        if current:
+            runs.append(current)
+        return runs
+
+    def translate(self, text: str, source: str, target: str, mode: str,
+                  translate_fn: Callable[[str], str], use_cache: bool = True) -> str:
+        """Translate text, calling translate_fn(text) only for sentences not in memory"""
+        normalized = normalize_text(text)
+        self._count(requests=1)
+
+        # Exact repeats (including texts stored as one unaligned run) resolve in one lookup
+        whole = self.cache.get(self._key(normalized, source, target, mode)) if use_cache else None
+        if whole is not None:
+            self._count(chars_from_memory=len(normalized))
+            return whole
+
+        sentences, separators = split_sentences(text)
+        keys = [self._key(normalize_text(sentence), source, target, mode) for sentence in sentences]
+        translations = self.cache.get_many(keys) if use_cache else [None] * len(keys)
+        hits = [sentence for sentence, translation in zip(sentences, translations) if translation is not None]
+        self._count(
+            sentences=len(sentences),
+            sentences_from_memory=len(hits),
+            chars_from_memory=sum(len(sentence) for sentence in hits)
+        )
+
+        for run in self._runs(sentences, translations):
+            # Sent with its original separators, so line breaks and list layout survive translation
+            run_text = sentences[run[0]] + ''.join(separators[index] + sentences[index] for index in run[1:])
+            translated = translate_fn(run_text).strip()
+            self._count(upstream_calls=1, chars_translated=len(run_text))
+
+            translated_sentences, _ = split_sentences(translated)
+            if len(translated_sentences) == len(run):
+                for index, translated_sentence in zip(run, translated_sentences):
+                    translations[index] = translated_sentence
+                    self.cache.set(keys[index], translated_sentence)
+            else:
+                # Alignment unknown: keep the run together under its own key
+                translations[run[0]] = translated
+                for index in run[1:]:
+                    translations[index] = ''
+                self.cache.set(self._key(normalize_text(run_text), source, target, mode), translated)
+
+        result = join_sentences(translations, separators).strip()
+        if len(sentences) > 1:
+            self.cache.set(self._key(normalized, source, target, mode), result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.counters)
+        total_chars = stats['chars_translated'] + stats['chars_from_memory']
+        stats['char_hit_rate'] = round(stats['chars_from_memory'] / total_chars, 3) if total_chars else None
+        return stats
+
+
+_memory = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> TranslationMemory:
+    global _memory
+    if _memory is None:
+        with _memory_lock:
+            if _memory is None:
+                _memory = TranslationMemory()
+    return _memory
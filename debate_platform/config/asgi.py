@@ -9,13 +9,14 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django_asgi_app = get_asgi_application()
 
 from realtime_debate.routing import websocket_urlpatterns
+from debates.routing import websocket_urlpatterns as debate_websocket_urlpatterns
 print(websocket_urlpatterns)
 application = ProtocolTypeRouter({
     'http': django_asgi_app,
     
     'websocket': AllowedHostsOriginValidator(
         AuthMiddlewareStack(
-            URLRouter(websocket_urlpatterns)
+            URLRouter(websocket_urlpatterns + debate_websocket_urlpatterns)
         )
     ),
 })
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 from datetime import timedelta
 
@@ -18,7 +19,121 @@ DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
 
 # Sarvam AI Configuration
 SARVAM_API_KEY = os.getenv('SARVAM_API_KEY')
-SARVAM_BASE_URL = 'https://api.sarvam.ai'
+SARVAM_BASE_URL = os.getenv('SARVAM_BASE_URL', 'https://api.sarvam.ai')
+# Streaming TTS websocket origin; derived from SARVAM_BASE_URL when unset
+# (point both at `manage.py run_sarvam_standin` for offline runs)
+SARVAM_WS_URL = os.getenv('SARVAM_WS_URL')
+
+# Pooled HTTP client of the shared AsyncSarvamAIService (see sarvam_integration/clients.py)
+SARVAM_HTTP_SETTINGS = {
+    'POOL_MAXSIZE': 20,  # keep-alive connections per host
+    'MAX_RETRIES': 2,  # connect errors and 429/502/503/504 only
+    'BACKOFF_FACTOR': 0.3,
+    'BACKOFF_JITTER': 0.3,  # seconds of random jitter added to each backoff
+    'TIMEOUT': 30,  # seconds
+}
+
+# Per-endpoint caps on in-flight Sarvam calls (see sarvam_integration/async_service.py)
+SARVAM_CONCURRENCY_SETTINGS = {
+    'STT': 8,
+    'LLM': 8,
+    'TTS': 8,  # includes open streaming TTS sockets
+    'ANALYTICS': 8,
+    'TRANSLATE': 8,
+    'DETECT_LANGUAGE': 16,
+}
+
+# Shared Sarvam quota: a Redis token bucket per endpoint (RATE tokens/s, up to BURST).
+# A priority class may not take the bucket below RESERVE x BURST, and waits at most
+# MAX_WAIT seconds for a token before the call is shed.
+SARVAM_RATE_LIMIT_SETTINGS = {
+    'ENABLED': os.getenv('SARVAM_RATE_LIMIT_ENABLED', 'True') == 'True',
+    'BUCKETS': {
+        'STT': {'RATE': 5, 'BURST': 20},
+        'LLM': {'RATE': 5, 'BURST': 20},
+        'TTS': {'RATE': 5, 'BURST': 20},
+        'ANALYTICS': {'RATE': 5, 'BURST': 20},
+        'TRANSLATE': {'RATE': 10, 'BURST': 40},
+        'DETECT_LANGUAGE': {'RATE': 10, 'BURST': 40},
+    },
+    'PRIORITIES': {
+        'interactive': {'RESERVE': 0.0, 'MAX_WAIT': 10.0},  # live debates
+        'standard': {'RESERVE': 0.2, 'MAX_WAIT': 5.0},
+        'background': {'RESERVE': 0.5, 'MAX_WAIT': 1.0},  # recommendations, dashboards
+    },
+    'DEFAULT_PRIORITY': 'standard',
+}
+
+# Timeouts and circuit breaking around Sarvam calls (see sarvam_integration/resilience.py).
+# A call's timeout is its endpoint cap, clipped to what remains of the request deadline.
+SARVAM_RESILIENCE_SETTINGS = {
+    'TIMEOUTS': {  # seconds
+        'STT': 20,
+        'LLM': 25,
+        'TTS': 20,
+        'ANALYTICS': 15,
+        'TRANSLATE': 10,
+        'DETECT_LANGUAGE': 5,
+    },
+    'MIN_CALL_TIMEOUT': 0.5,  # fail fast rather than start a call with less budget than this
+    'BACKSTOP_GRACE': 5,  # extra seconds a sync caller waits before abandoning a stalled call
+    'BREAKER_FAILURE_THRESHOLD': 5,  # consecutive upstream failures before the circuit opens
+    'BREAKER_RESET_TIMEOUT': 30,  # seconds open before half-open probes
+    'BREAKER_HALF_OPEN_PROBES': 1,
+}
+
+# Local language detection in front of the Sarvam language-identification API
+LANGUAGE_DETECTION_SETTINGS = {
+    'LOCAL_ENABLED': os.getenv('LOCAL_LANGUAGE_DETECTION', 'True') == 'True',
+    'MIN_CONFIDENCE': 0.85,  # below this the API is asked instead
+    'EXPECTED_MIN_CONFIDENCE': 0.6,  # when the guess matches the session's language
+    'MIN_LETTERS': 12,  # shorter text is penalised proportionally
+    'NGRAM_EVIDENCE_SCALE': 4.0,  # tempering of trigram log-likelihoods (higher = less confident)
+}
+
+# Coalescing of identical concurrent Sarvam calls (in-process and across workers via Redis)
+SARVAM_SINGLE_FLIGHT_SETTINGS = {
+    'ENABLED': True,
+    'LOCK_TTL': 60,  # seconds a leader may hold the upstream call
+    'RESULT_TTL': 10,  # seconds a finished result stays available to followers
+    'WAIT_TIMEOUT': 45,  # seconds a follower waits before calling upstream itself
+    'POLL_INTERVAL': 0.05,  # seconds between follower polls
+}
+
+# In-process Sarvam call metrics, served at /api/sarvam/metrics/ (see sarvam_integration/metrics.py)
+SARVAM_METRICS_SETTINGS = {
+    'ENABLED': os.getenv('SARVAM_METRICS_ENABLED', 'True').lower() == 'true',
+    'LATENCY_BUCKETS': (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 20, 30),  # seconds
+    'REQUEST_BREAKDOWN': DEBUG,  # attach per-request call timings to API responses
+    'ALLOWED_IPS': ('127.0.0.1', '::1'),  # besides staff users
+}
+
+# Speech audio is downmixed, downsampled and silence-trimmed before STT upload
+# (see sarvam_integration/audio_preprocessing.py)
+AUDIO_PREPROCESSING_SETTINGS = {
+    'ENABLED': os.getenv('AUDIO_PREPROCESSING_ENABLED', 'True').lower() == 'true',
+    'TARGET_SAMPLE_RATE': 16000,  # Hz; what the STT models are trained on
+    'VAD_FRAME_MS': 30,
+    'VAD_THRESHOLD_DB': 15,  # speech must be this far above the recording's noise floor
+    'VAD_MIN_DBFS': -50,  # and never quieter than this
+    'VAD_PADDING_MS': 250,  # kept either side of the speech so word edges aren't clipped
+}
+
+# Bulk grading: several arguments packed into one Text Analytics request
+SARVAM_ANALYTICS_BATCH_SETTINGS = {
+    'MAX_ARGUMENTS': 5,  # per request (each adds one copy of every quality question)
+    'MAX_CHARS': 6000,  # packed text per request; a longer argument goes alone
+}
+
+# Two-tier (in-process LRU + Redis) cache for Sarvam API results
+SARVAM_CACHE_SETTINGS = {
+    'ENABLED': os.getenv('SARVAM_CACHE_ENABLED', 'True').lower() == 'true',  # disable for grading runs
+    'LOCAL_MAX_ENTRIES': 1024,  # per cache, per process
+    'ARGUMENT_QUALITY_TTL': 7 * 24 * 3600,  # seconds
+    'TRANSLATION_TTL': 30 * 24 * 3600,  # seconds
+    'TTS_ROOT': BASE_DIR / 'media' / 'tts_cache',  # content-addressed synthesized audio
+    'TTS_MAX_BYTES': 512 * 1024 * 1024,  # LRU eviction budget
+}
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -103,12 +218,15 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add this
+    'apps.sarvam_integration.middleware.SarvamBreakdownMiddleware',
 ]
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 ROOT_URLCONF = 'config.urls'
 
@@ -239,9 +357,33 @@ DEBATE_SETTINGS = {
     ],
     'DEFAULT_LANGUAGE': 'en-IN',
     'AI_RESPONSE_TIMEOUT': 30,  # seconds
+    'TURN_STAGE_WORKERS': int(os.getenv('DEBATE_TURN_STAGE_WORKERS', '32')),  # Sarvam calls in flight across turns
+    'DEFER_ANALYSIS': os.getenv('DEBATE_DEFER_ANALYSIS', 'False').lower() == 'true',  # default for ?defer_analysis
+    'DEFERRED_ANALYSIS_RETRY_AFTER': 120,  # seconds an argument can stay pending before the worker re-scores it
+    'AGENT_TIMEOUTS': {'opponent': 20, 'coach': 15, 'moderator': 20},  # seconds per MultiAgentDebateEngine agent
+    'EXPORT_CHUNK_SIZE': 2000,  # rows fetched per query round-trip by transcript exports
     'VOICE_UPLOAD_MAX_SIZE': 5 * 1024 * 1024,  # 5MB
 }
 
+# Idempotency-Key support for voice-debate/ and text-debate/ (retried by mobile clients on timeout)
+DEBATE_IDEMPOTENCY_SETTINGS = {
+    'ENABLED': True,
+    'RETENTION': int(os.getenv('DEBATE_IDEMPOTENCY_RETENTION', str(24 * 60 * 60))),  # seconds a response is replayed
+    'LOCK_TTL': 120,  # seconds a request holds its key while running
+    'WAIT_TIMEOUT': 60,  # seconds a repeat waits for the in-flight request before getting 409
+    'POLL_INTERVAL': 0.25,  # seconds between a waiting repeat's checks
+}
+
+# Voice/text turns submitted with ?async=1 (run by manage.py run_debate_worker)
+DEBATE_JOB_SETTINGS = {
+    'WORKER_POLL_INTERVAL': 0.5,  # seconds an idle worker waits before checking the queue again
+    'STREAM_POLL_INTERVAL': 0.25,  # seconds between progress checks of an open event stream
+    'HEARTBEAT_INTERVAL': 15,  # seconds of silence before an event stream sends a keep-alive
+    'STREAM_TIMEOUT': 300,  # seconds before an event stream gives up on an unfinished job
+    'STALE_AFTER': 300,  # seconds a running job may go unfinished before it is requeued
+    'MAX_ATTEMPTS': 2,
+}
+
 REALTIME_DEBATE_SETTINGS = {
     'MAX_AUDIO_CHUNK_SIZE': 1024 * 1024,  # 1MB per audio chunk
     'AUDIO_SAMPLE_RATE': 16000,  # 16kHz
@@ -249,6 +391,12 @@ REALTIME_DEBATE_SETTINGS = {
     'MAX_BUFFER_DURATION': 30.0,  # 30 seconds max buffer
     'SESSION_TIMEOUT': 7200,  # 2 hours
     'HEARTBEAT_INTERVAL': 30,  # 30 seconds
+    'AUDIO_ARCHIVE_ENABLED': True,
+    'AUDIO_ARCHIVE_ROOT': MEDIA_ROOT / 'debate_audio',
+    'AUDIO_ARCHIVE_SEGMENT_SIZE': 16 * 1024 * 1024,  # 16MB per segment file
+    'AUDIO_ARCHIVE_QUEUE_SIZE': 256,  # pending writes before audio is dropped
+    'ROOM_COUNTER_FLUSH_INTERVAL': 30,  # seconds between write-behind counter flushes
+    'EVENT_REPLAY_MAXLEN': 500,  # outbound events kept per room for reconnecting clients
 }
 
 # Gamification Settings